@@ -0,0 +1,294 @@
+import argparse
+import json
+import math
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+from dataTypes import Point, Polygon
+from main import ShortestPathFinder, GRAPH_BUILDERS, compute_shortest_path
+from graphSearch import SEARCH_STRATEGIES
+from unitDisc import find_robot_path
+from configSpaceCache import robot_spaces
+from navMesh import compute_mesh_path
+from polygonUnion import signed_area
+
+World = Tuple[List[Polygon], Point, Point]
+
+# Every generator takes the number of obstacle corners it should roughly
+# produce and a seed, the same arguments always give the same world. The
+# obstacles come out clockwise, the order unitDisc.make_bigger grows outward.
+
+def clockwise(obstacle: Polygon) -> Polygon:
+    return list(obstacle) if signed_area(obstacle) <= 0 else list(reversed(obstacle))
+
+def convex_world(vertices: int, seed: int = 0) -> World:
+    # random convex polygons (3 to 8 corners on a circle), one per grid cell
+    rng = random.Random(seed)
+    side = max(1, math.ceil(math.sqrt(vertices / 3)))
+    cells = [(x, y) for x in range(side) for y in range(side)]
+    rng.shuffle(cells)
+    
+    obstacles = []
+    remaining = vertices
+    for x, y in cells:
+        if remaining < 3:
+            break
+        corners = min(rng.randint(3, 8), remaining)
+        if remaining - corners < 3:
+            corners = remaining
+        center = (x * 10 + 5, y * 10 + 5)
+        radius = rng.uniform(2.5, 4.0)
+        angles = sorted(rng.uniform(0, 2 * math.pi) for _ in range(corners))
+        obstacles.append([(center[0] + radius * math.cos(angle), center[1] + radius * math.sin(angle)) for angle in angles])
+        remaining -= corners
+    
+    return [clockwise(obstacle) for obstacle in obstacles], (-5.0, -5.0), (side * 10 + 5.0, side * 10 + 5.0)
+
+def clutter_world(vertices: int, seed: int = 0) -> World:
+    # many small triangles, jittered inside a tight grid
+    rng = random.Random(seed)
+    count = max(1, vertices // 3)
+    side = math.ceil(math.sqrt(count))
+    cells = [(x, y) for x in range(side) for y in range(side)]
+    rng.shuffle(cells)
+    
+    obstacles = []
+    for x, y in cells[:count]:
+        radius = rng.uniform(0.6, 1.2)
+        center = (x * 3 + 1.5 + rng.uniform(-1.5 + radius, 1.5 - radius),
+                  y * 3 + 1.5 + rng.uniform(-1.5 + radius, 1.5 - radius))
+        turn = rng.uniform(0, 2 * math.pi)
+        obstacles.append([(center[0] + radius * math.cos(turn + k * 2 * math.pi / 3),
+                           center[1] + radius * math.sin(turn + k * 2 * math.pi / 3)) for k in range(3)])
+    
+    return [clockwise(obstacle) for obstacle in obstacles], (-2.0, -2.0), (side * 3 + 2.0, side * 3 + 2.0)
+
+def wall(x1: float, y1: float, x2: float, y2: float, thickness: float = 0.2) -> Polygon:
+    return [(min(x1, x2) - thickness, min(y1, y2) - thickness), (max(x1, x2) + thickness, min(y1, y2) - thickness),
+            (max(x1, x2) + thickness, max(y1, y2) + thickness), (min(x1, x2) - thickness, max(y1, y2) + thickness)]
+
+def maze_world(vertices: int, seed: int = 0) -> World:
+    # a perfect maze carved by a random depth first walk, every wall between
+    # two cells that stayed closed is a thin rectangle
+    rng = random.Random(seed)
+    size = max(2, round(math.sqrt(max(vertices - 16, 4) / 4)) + 1)
+    cell = 4.0
+    
+    opened = set()
+    visited = {(0, 0)}
+    stack = [(0, 0)]
+    while stack:
+        x, y = stack[-1]
+        options = [(x + dx, y + dy) for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1))
+                   if 0 <= x + dx < size and 0 <= y + dy < size and (x + dx, y + dy) not in visited]
+        if not options:
+            stack.pop()
+            continue
+        next_cell = rng.choice(options)
+        opened.add(frozenset(((x, y), next_cell)))
+        visited.add(next_cell)
+        stack.append(next_cell)
+    
+    obstacles = []
+    for x in range(size):
+        for y in range(size):
+            if x + 1 < size and frozenset(((x, y), (x + 1, y))) not in opened:
+                obstacles.append(wall((x + 1) * cell, y * cell, (x + 1) * cell, (y + 1) * cell))
+            if y + 1 < size and frozenset(((x, y), (x, y + 1))) not in opened:
+                obstacles.append(wall(x * cell, (y + 1) * cell, (x + 1) * cell, (y + 1) * cell))
+    
+    end = size * cell
+    obstacles += [wall(0, 0, end, 0), wall(0, end, end, end), wall(0, 0, 0, end), wall(end, 0, end, end)]
+    return [clockwise(obstacle) for obstacle in obstacles], (cell / 2, cell / 2), (end - cell / 2, end - cell / 2)
+
+def corridor_world(vertices: int, seed: int = 0) -> World:
+    # a long corridor with baffles coming alternately from the floor and the
+    # ceiling, the path has to weave around every one of them
+    rng = random.Random(seed)
+    baffles = max(1, (vertices - 8) // 4)
+    spacing = 4.0
+    height = 10.0
+    length = (baffles + 1) * spacing
+    
+    obstacles = [[(0, -1), (length, -1), (length, 0), (0, 0)],
+                 [(0, height), (length, height), (length, height + 1), (0, height + 1)]]
+    for k in range(baffles):
+        x = (k + 1) * spacing
+        reach = rng.uniform(0.55, 0.8) * height
+        if k % 2 == 0:
+            obstacles.append([(x - 0.5, 0), (x + 0.5, 0), (x + 0.5, reach), (x - 0.5, reach)])
+        else:
+            obstacles.append([(x - 0.5, height - reach), (x + 0.5, height - reach), (x + 0.5, height), (x - 0.5, height)])
+    
+    return [clockwise(obstacle) for obstacle in obstacles], (spacing / 2, height / 2), (length - spacing / 2, height / 2)
+
+WORLDS: Dict[str, Callable[[int, int], World]] = {
+    "convex": convex_world,
+    "clutter": clutter_world,
+    "maze": maze_world,
+    "corridor": corridor_world,
+}
+
+def timed(function: Callable, *args) -> Tuple[object, float]:
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+def run_case(world: str, vertices: int, seed: int = 0, builder: str = "naive", search: str = "dijkstra",
+             reduced: bool = False, robot: bool = True, mesh: bool = False) -> Dict:
+    # The phases are timed one after the other on the same world, the peak
+    # memory comes from a separate traced run so tracing does not slow down
+    # the timed ones. Worker processes of "parallel" are not traced.
+    obstacles, start, goal = WORLDS[world](vertices, seed)
+    
+    finder, index_time = timed(ShortestPathFinder, obstacles, start, goal, builder, search, reduced)
+    graph, build_time = timed(finder.make_visibility_graph)
+    (path, distance, expanded), search_time = timed(SEARCH_STRATEGIES[search], graph, finder.all_points, 0, 1)
+    _, end_to_end_time = timed(compute_shortest_path, obstacles, start, goal, builder, search, reduced)
+    
+    tracemalloc.start()
+    compute_shortest_path(obstacles, start, goal, builder, search, reduced)
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    
+    result = {
+        "world": world,
+        "vertices": len(finder.all_points) - 2,
+        "seed": seed,
+        "builder": builder,
+        "search": search,
+        "reduced": reduced,
+        "index_seconds": index_time,
+        "build_seconds": build_time,
+        "search_seconds": search_time,
+        "end_to_end_seconds": end_to_end_time,
+        "peak_memory_bytes": peak_memory,
+        "edges": sum(len(row) for row in graph.values()) // 2,
+        "nodes_expanded": expanded,
+        "path_points": len(path),
+        "distance": distance if distance != float('inf') else None,
+    }
+    
+    if robot:
+        # timed from scratch, not from the spaces earlier runs left in the cache
+        robot_spaces.clear()
+        (_, robot_distance), robot_time = timed(find_robot_path, obstacles, start, goal, builder, search, reduced)
+        # The robot sees the obstacles grown, it can never get through
+        # shorter. Only the reduced graph keeps every path out of the
+        # obstacles (the full one may cut along a diagonal of an obstacle or
+        # of a merged outline), so that is where it is checked.
+        if reduced and robot_distance < distance and not math.isclose(robot_distance, distance, rel_tol=1e-9):
+            raise ValueError(f"{world}/{vertices}/{seed}: robot distance {robot_distance} is shorter than the point "
+                             f"distance {distance}, the obstacles were not grown outward")
+        result["robot_seconds"] = robot_time
+        result["robot_distance"] = robot_distance if robot_distance != float('inf') else None
+        
+        if reduced:
+            # The reduced graph drops edges of the full one, its path is never
+            # shorter, and it only gets longer where the full graph cuts a
+            # diagonal. A reduced graph that finds no path at all dropped edges
+            # it needed (the corners of a hole in a merged outline, say).
+            _, full_distance = find_robot_path(obstacles, start, goal, builder, search, False)
+            if ((robot_distance == float('inf')) != (full_distance == float('inf')) or
+                    robot_distance < full_distance and not math.isclose(robot_distance, full_distance, rel_tol=1e-9)):
+                raise ValueError(f"{world}/{vertices}/{seed}: reduced robot distance {robot_distance} does not fit "
+                                 f"the full graph's {full_distance}")
+            result["robot_full_distance"] = full_distance if full_distance != float('inf') else None
+    
+    if mesh:
+        # the mesh path is never the shorter one where both are valid, the
+        # ratio is how much longer its channel choice makes it (in mazes the
+        # visibility graph slips between overlapping walls, the ratio is the
+        # price of not doing that)
+        (_, mesh_distance), mesh_time = timed(compute_mesh_path, obstacles, start, goal)
+        result["mesh_seconds"] = mesh_time
+        result["mesh_distance"] = mesh_distance if mesh_distance != float('inf') else None
+        if distance not in (0, float('inf')) and mesh_distance != float('inf'):
+            result["mesh_ratio"] = mesh_distance / distance
+    
+    return result
+
+def run_suite(worlds: List[str], sizes: List[int], builders: List[str], searches: List[str], seeds: List[int],
+              reduced: bool = False, robot: bool = True, output=sys.stdout, mesh: bool = False) -> List[Dict]:
+    results = []
+    for world in worlds:
+        for vertices in sizes:
+            for seed in seeds:
+                for builder in builders:
+                    for search in searches:
+                        result = run_case(world, vertices, seed, builder, search, reduced, robot, mesh)
+                        output.write(json.dumps(result) + "\n")
+                        output.flush()
+                        results.append(result)
+    return results
+
+def load_results(path: str) -> List[Dict]:
+    with open(path) as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+def compare_results(baseline: List[Dict], current: List[Dict], tolerance: float = 1.25,
+                    min_seconds: float = 0.001) -> List[str]:
+    # Matches runs on (world, vertices, seed, builder, search, reduced) and
+    # reports every phase that got slower by more than the tolerance factor
+    # (and by at least min_seconds, tiny phases are mostly noise) and every
+    # distance that changed.
+    def key(result: Dict) -> Tuple:
+        return (result["world"], result["vertices"], result["seed"], result["builder"], result["search"], result["reduced"])
+    
+    old_runs = {key(result): result for result in baseline}
+    problems = []
+    for result in current:
+        old = old_runs.get(key(result))
+        if old is None:
+            continue
+        name = "/".join(str(part) for part in key(result))
+        for phase in ("index_seconds", "build_seconds", "search_seconds", "end_to_end_seconds", "robot_seconds",
+                      "mesh_seconds"):
+            if phase not in old or phase not in result:
+                continue
+            if result[phase] > old[phase] * tolerance and result[phase] - old[phase] >= min_seconds:
+                problems.append(f"{name}: {phase} {old[phase]:.4f} -> {result[phase]:.4f}")
+        for field in ("distance", "robot_distance", "mesh_distance"):
+            if field in old and field in result and old[field] != result[field]:
+                if old[field] is None or result[field] is None or abs(old[field] - result[field]) > 1e-9:
+                    problems.append(f"{name}: {field} {old[field]} -> {result[field]}")
+    return problems
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time graph build, search and whole queries on generated worlds")
+    parser.add_argument("--worlds", default=",".join(WORLDS), help="comma separated, from " + ", ".join(WORLDS))
+    parser.add_argument("--sizes", default="10,100,1000", help="comma separated obstacle corner counts")
+    parser.add_argument("--builders", default="naive,sweep", help="comma separated, from " + ", ".join(GRAPH_BUILDERS))
+    parser.add_argument("--searches", default="dijkstra", help="comma separated, from " + ", ".join(SEARCH_STRATEGIES))
+    parser.add_argument("--seeds", default="0", help="comma separated seeds")
+    parser.add_argument("--reduced", action="store_true", help="use the reduced (tangent) graph")
+    parser.add_argument("--no-robot", action="store_true", help="skip the find_robot_path run")
+    parser.add_argument("--mesh", action="store_true", help="also time navMesh.compute_mesh_path and report its distance ratio")
+    parser.add_argument("--output", help="write JSON lines here instead of stdout")
+    parser.add_argument("--compare", help="JSON lines file of an earlier run to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="allowed slowdown factor for --compare")
+    args = parser.parse_args()
+    
+    worlds = args.worlds.split(",")
+    builders = args.builders.split(",")
+    searches = args.searches.split(",")
+    for name, chosen, known in (("world", worlds, WORLDS), ("builder", builders, GRAPH_BUILDERS),
+                                ("search", searches, SEARCH_STRATEGIES)):
+        for option in chosen:
+            if option not in known:
+                raise ValueError(f"Unknown {name} '{option}', expected one of {tuple(known)}")
+    
+    output = open(args.output, "w") if args.output else sys.stdout
+    results = run_suite(worlds, [int(size) for size in args.sizes.split(",")], builders, searches,
+                        [int(seed) for seed in args.seeds.split(",")], args.reduced, not args.no_robot, output,
+                        args.mesh)
+    if args.output:
+        output.close()
+    
+    if args.compare:
+        problems = compare_results(load_results(args.compare), results, args.tolerance)
+        for problem in problems:
+            print(problem, file=sys.stderr)
+        sys.exit(1 if problems else 0)
@@ -0,0 +1,74 @@
+import sys
+from collections import OrderedDict
+from typing import List
+from dataTypes import Point, Polygon, PathResult
+from obstacleMap import ObstacleMap
+from graphFile import geometry_hash
+from graphSearch import SEARCH_STRATEGIES
+from unitDisc import grow_obstacles, grown_holes, grown_free_space
+from main import DEFAULT_BUILDER
+
+def estimate_bytes(obstacle_map: ObstacleMap) -> int:
+    # the nested dicts of the corner graph are nearly all of an entry
+    size = sys.getsizeof(obstacle_map.graph) + sys.getsizeof(obstacle_map.corners)
+    for row in obstacle_map.graph.values():
+        size += sys.getsizeof(row) + 24 * len(row)
+    size += sum(sys.getsizeof(shape) + 64 * len(shape) for shape in obstacle_map.obstacles)
+    return size
+
+class ConfigurationSpaceCache:
+    # Grown obstacles and their corner graph per (map, radius), least
+    # recently used entries go first once there are more than max_entries of
+    # them or they take more than max_bytes together. A robot class that was
+    # planned for before only attaches its start and goal to the graph.
+    def __init__(self, max_entries: int = 16, max_bytes: int = 256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+    
+    def configuration_space(self, obstacles: List[Polygon], radius: float = 1.0, builder: str = DEFAULT_BUILDER,
+                            reduced: bool = False, merge: bool = True) -> ObstacleMap:
+        key = (geometry_hash(obstacles), radius, builder, reduced, merge)
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key][0]
+        
+        self.misses += 1
+        grown, crossing_corners = grow_obstacles(obstacles, radius, merge)
+        space = ObstacleMap(grown, builder, reduced, skipped=crossing_corners,
+                            free_space=grown_free_space(obstacles, radius), holes=grown_holes(grown) if merge else ())
+        size = estimate_bytes(space)
+        self.entries[key] = (space, size)
+        self.total_bytes += size
+        
+        # the newest entry stays even when it is over the cap on its own
+        while len(self.entries) > 1 and (len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes):
+            _, (_, old_size) = self.entries.popitem(last=False)
+            self.total_bytes -= old_size
+        return space
+    
+    def find_robot_path(self, obstacles: List[Polygon], start: Point, end: Point, radius: float = 1.0,
+                        builder: str = DEFAULT_BUILDER, search: str = "dijkstra", reduced: bool = False,
+                        merge: bool = True) -> PathResult:
+        if search not in SEARCH_STRATEGIES:
+            raise ValueError(f"Unknown search '{search}', expected one of {tuple(SEARCH_STRATEGIES)}")
+        space = self.configuration_space(obstacles, radius, builder, reduced, merge)
+        return space.find_shortest_path(start, end, search)
+    
+    def forget(self, geometry: bytes):
+        # drops every entry grown from the obstacles with this geometry_hash
+        for key in [key for key in self.entries if key[0] == geometry]:
+            _, size = self.entries.pop(key)
+            self.total_bytes -= size
+    
+    def clear(self):
+        self.entries.clear()
+        self.total_bytes = 0
+
+# the cache unitDisc.find_robot_path and RobotPathFinder share, so repeated
+# queries on a map and radius reuse its grown obstacles and graph
+robot_spaces = ConfigurationSpaceCache()
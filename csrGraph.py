@@ -0,0 +1,178 @@
+import heapq
+import math
+from array import array
+from collections.abc import Mapping
+from typing import Iterator, List, Optional, Tuple
+from dataTypes import Point, Polygon, VisibilityGraph, PathResult, SearchResult
+from main import ShortestPathFinder, DEFAULT_BUILDER
+
+class CsrGraph:
+    # Compressed sparse rows: the neighbors of node i are
+    # neighbors[offsets[i]:offsets[i + 1]] with the matching weights, about
+    # 16 bytes per directed edge instead of a dict entry.
+    def __init__(self, offsets: array, neighbors: array, weights: array):
+        self.offsets = offsets
+        self.neighbors = neighbors
+        self.weights = weights
+    
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+    
+    def edges(self, index: int) -> Iterator[Tuple[int, float]]:
+        first, last = self.offsets[index], self.offsets[index + 1]
+        return zip(self.neighbors[first:last], self.weights[first:last])
+    
+    def to_graph(self) -> VisibilityGraph:
+        return {i: dict(self.edges(i)) for i in range(len(self))}
+    
+    def rows(self, first: int = 0) -> "CsrRows":
+        return CsrRows(self, first)
+
+class CsrRow(Mapping):
+    # One row seen as a read-only dict, the lookup dict is only made when a
+    # single neighbor is asked for.
+    def __init__(self, neighbors, weights):
+        self.neighbors = neighbors
+        self.weights = weights
+        self.lookup = None
+    
+    def __getitem__(self, index: int) -> float:
+        if self.lookup is None:
+            self.lookup = dict(zip(self.neighbors, self.weights))
+        return self.lookup[index]
+    
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.neighbors)
+    
+    def __len__(self) -> int:
+        return len(self.neighbors)
+    
+    def items(self) -> Iterator[Tuple[int, float]]:
+        return zip(self.neighbors, self.weights)
+
+class CsrRows(Mapping):
+    # The rows from first on as a read-only VisibilityGraph, so the searches
+    # and ObstacleMap can use a CSR graph (also a memory-mapped one) as it is.
+    def __init__(self, graph: CsrGraph, first: int = 0):
+        self.graph = graph
+        self.first = first
+    
+    def __getitem__(self, index: int) -> CsrRow:
+        if not self.first <= index < len(self.graph):
+            raise KeyError(index)
+        first, last = self.graph.offsets[index], self.graph.offsets[index + 1]
+        return CsrRow(self.graph.neighbors[first:last], self.graph.weights[first:last])
+    
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(self.first, len(self.graph)))
+    
+    def __len__(self) -> int:
+        return max(0, len(self.graph) - self.first)
+
+def graph_to_csr(graph: VisibilityGraph, node_count: Optional[int] = None) -> CsrGraph:
+    if node_count is None:
+        node_count = max(graph) + 1 if graph else 0
+    
+    offsets = array('q', [0])
+    neighbors = array('q')
+    weights = array('d')
+    for i in range(node_count):
+        for j, distance in graph.get(i, {}).items():
+            neighbors.append(j)
+            weights.append(distance)
+        offsets.append(len(neighbors))
+    return CsrGraph(offsets, neighbors, weights)
+
+def csr_from_pairs(node_count: int, firsts: array, seconds: array, distances: array) -> CsrGraph:
+    # Every pair is stored in both directions. A counting sort on the source
+    # node keeps the pair order, so pairs listed by (i, j) give rows sorted
+    # by neighbor, the same order the dict builders insert them in.
+    counts = array('q', [0]) * (node_count + 1)
+    for i, j in zip(firsts, seconds):
+        counts[i + 1] += 1
+        counts[j + 1] += 1
+    for i in range(node_count):
+        counts[i + 1] += counts[i]
+    
+    offsets = array('q', counts)
+    neighbors = array('q', [0]) * (2 * len(firsts))
+    weights = array('d', [0.0]) * (2 * len(firsts))
+    for i, j, distance in zip(firsts, seconds, distances):
+        neighbors[counts[i]] = j
+        weights[counts[i]] = distance
+        counts[i] += 1
+        neighbors[counts[j]] = i
+        weights[counts[j]] = distance
+        counts[j] += 1
+    return CsrGraph(offsets, neighbors, weights)
+
+def csr_visibility_graph(finder: ShortestPathFinder) -> CsrGraph:
+    # The "naive" builder writes its pairs straight into flat arrays, other
+    # builders go through their dict graph once.
+    if finder.builder != "naive":
+        return graph_to_csr(finder.make_visibility_graph(), len(finder.all_points))
+    
+    all_points = finder.all_points
+    firsts = array('q')
+    seconds = array('q')
+    distances = array('d')
+    for i in range(len(all_points)):
+        if i in finder.removed_points:
+            continue
+        for j in range(i + 1, len(all_points)):
+            if j not in finder.removed_points and finder.should_link(i, j):
+                p1 = all_points[i]
+                p2 = all_points[j]
+                firsts.append(i)
+                seconds.append(j)
+                distances.append(math.sqrt((p2[0] - p1[0])**2 + (p2[1] - p1[1])**2))
+    
+    return csr_from_pairs(len(all_points), firsts, seconds, distances)
+
+def csr_dijkstra(graph: CsrGraph, all_points: List[Point], start_idx: int, end_idx: int) -> SearchResult:
+    offsets, neighbors, weights = graph.offsets, graph.neighbors, graph.weights
+    distances = array('d', [float('inf')]) * len(graph)
+    distances[start_idx] = 0
+    came_from = array('q', [-1]) * len(graph)
+    
+    to_visit = [(0, start_idx)]
+    expanded = 0
+    
+    while to_visit:
+        current_dist, current = heapq.heappop(to_visit)
+        
+        if current == end_idx:
+            break
+        
+        if current_dist > distances[current]:
+            continue
+        
+        expanded += 1
+        first, last = offsets[current], offsets[current + 1]
+        for next_point, dist in zip(neighbors[first:last], weights[first:last]):
+            total_dist = current_dist + dist
+            
+            if total_dist < distances[next_point]:
+                distances[next_point] = total_dist
+                came_from[next_point] = current
+                heapq.heappush(to_visit, (total_dist, next_point))
+    
+    if distances[end_idx] == float('inf'):
+        return [], float('inf'), expanded
+    
+    path = []
+    current = end_idx
+    while current != -1:
+        path.append(all_points[current])
+        current = came_from[current]
+    path.reverse()
+    return path, distances[end_idx], expanded
+
+def compute_csr_shortest_path(obstacles: List[Polygon], start: Point, goal: Point, builder: str = DEFAULT_BUILDER,
+                              reduced: bool = False, check_reachable: bool = True) -> PathResult:
+    # turned down before any graph is built, as in compute_shortest_path
+    finder = ShortestPathFinder(obstacles, start, goal, builder, reduced=reduced, check_reachable=check_reachable)
+    if check_reachable and not finder.is_reachable():
+        return [], float('inf')
+    path, distance, finder.nodes_expanded = csr_dijkstra(csr_visibility_graph(finder), finder.all_points, 0, 1)
+    return path, distance
@@ -3,9 +3,11 @@ from typing import List, Tuple, Dict, Set
 Point = Tuple[float, float]
 Edge = Tuple[int, int]
 Polygon = List[Point] 
+Segment = Tuple[Point, Point]
 
 VisibilityGraph = Dict[int, Dict[int, float]]
 DistanceMap = Dict[int, float]
 PreviousMap = Dict[int, int] 
 
-PathResult = Tuple[List[Point], float]
\ No newline at end of file
+PathResult = Tuple[List[Point], float]
+SearchResult = Tuple[List[Point], float, int]
\ No newline at end of file
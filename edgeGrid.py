@@ -0,0 +1,92 @@
+import math
+from collections import defaultdict
+from typing import Dict, Iterator, List, Tuple
+from dataTypes import Point, Segment
+
+class EdgeGrid:
+    # Uniform grid over the obstacle edges. Every edge is stored in each cell
+    # it passes through, so a segment query only has to look at the edges
+    # registered in the cells the segment itself passes through.
+    def __init__(self, segments: List[Segment]):
+        self.segments = segments
+        self.cells: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        
+        if not segments:
+            self.min_x = self.min_y = 0.0
+            self.cell_size = 1.0
+            self.columns = self.rows = 1
+            self.margin = 0.0
+            return
+        
+        xs = [point[0] for segment in segments for point in segment]
+        ys = [point[1] for segment in segments for point in segment]
+        self.min_x, self.min_y = min(xs), min(ys)
+        width = max(xs) - self.min_x
+        height = max(ys) - self.min_y
+        
+        if width > 0 and height > 0:
+            self.cell_size = math.sqrt(width * height / len(segments))
+        else:
+            self.cell_size = max(width, height) / len(segments)
+        if self.cell_size <= 0:
+            self.cell_size = 1.0
+        
+        self.columns = int(width // self.cell_size) + 1
+        self.rows = int(height // self.cell_size) + 1
+        # edges that only touch a cell border still have to land in both cells
+        self.margin = 1e-9 * max(1.0, width, height)
+        
+        for k, (a, b) in enumerate(segments):
+            for cell in self.cells_along(a, b):
+                self.cells[cell].append(k)
+    
+    def clamp(self, value: int, count: int) -> int:
+        return min(max(value, 0), count - 1)
+    
+    def cells_along(self, p: Point, q: Point) -> Iterator[Tuple[int, int]]:
+        left, right = (p, q) if p[0] <= q[0] else (q, p)
+        
+        # anything outside the grid is folded into the border cells, so edges
+        # added after construction are still found wherever they are
+        first_column = self.clamp(math.floor((left[0] - self.margin - self.min_x) / self.cell_size), self.columns)
+        last_column = self.clamp(math.floor((right[0] + self.margin - self.min_x) / self.cell_size), self.columns)
+        
+        dx = right[0] - left[0]
+        slope = (right[1] - left[1]) / dx if dx != 0 else 0.0
+        
+        for column in range(first_column, last_column + 1):
+            column_start = self.min_x + column * self.cell_size
+            x_low = left[0] if column == first_column else min(max(left[0], column_start), right[0])
+            x_high = right[0] if column == last_column else max(min(right[0], column_start + self.cell_size), left[0])
+            
+            if dx == 0:
+                y_a, y_b = left[1], right[1]
+            else:
+                y_a = left[1] + (x_low - left[0]) * slope
+                y_b = left[1] + (x_high - left[0]) * slope
+            
+            first_row = self.clamp(math.floor((min(y_a, y_b) - self.margin - self.min_y) / self.cell_size), self.rows)
+            last_row = self.clamp(math.floor((max(y_a, y_b) + self.margin - self.min_y) / self.cell_size), self.rows)
+            for row in range(first_row, last_row + 1):
+                yield column, row
+    
+    def add(self, segment: Segment) -> int:
+        k = len(self.segments)
+        self.segments.append(segment)
+        for cell in self.cells_along(segment[0], segment[1]):
+            self.cells[cell].append(k)
+        return k
+    
+    def remove(self, k: int):
+        a, b = self.segments[k]
+        for cell in self.cells_along(a, b):
+            self.cells[cell].remove(k)
+        self.segments[k] = None
+    
+    def candidates(self, p: Point, q: Point) -> Iterator[int]:
+        seen = set()
+        for cell in self.cells_along(p, q):
+            for k in self.cells.get(cell, ()):
+                if k not in seen:
+                    seen.add(k)
+                    yield k
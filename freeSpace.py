@@ -0,0 +1,84 @@
+import math
+from collections import OrderedDict, defaultdict
+from typing import Dict, List, Optional, Tuple
+from dataTypes import Point, Polygon
+from polygonUnion import union_polygons, signed_area, locate
+
+OUTSIDE = -1
+BLOCKED = -2
+
+class FreeSpaceIndex:
+    # Connected pieces of the free space. With every obstacle turned
+    # counterclockwise their union is a set of outer rings (obstacles) and
+    # clockwise rings (holes, free space walled in by touching obstacles).
+    # The innermost ring around a point decides its piece: OUTSIDE for the
+    # open space around everything, the ring number of a hole, or BLOCKED
+    # inside an obstacle. Rings are found through a grid of their boxes.
+    def __init__(self, obstacles: List[Polygon]):
+        shapes = [list(shape) if signed_area(shape) >= 0 else list(reversed(shape)) for shape in obstacles if len(shape) >= 3]
+        self.rings = union_polygons(shapes)
+        self.areas = [signed_area(ring) for ring in self.rings]
+        self.boxes = [(min(p[0] for p in ring), min(p[1] for p in ring), max(p[0] for p in ring), max(p[1] for p in ring))
+                      for ring in self.rings]
+        self.cells: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        
+        if not self.rings:
+            self.min_x = self.min_y = 0.0
+            self.cell_size = 1.0
+            return
+        
+        self.min_x = min(box[0] for box in self.boxes)
+        self.min_y = min(box[1] for box in self.boxes)
+        width = max(box[2] for box in self.boxes) - self.min_x
+        height = max(box[3] for box in self.boxes) - self.min_y
+        self.cell_size = max(width, height, 1e-9) / max(1, math.ceil(math.sqrt(len(self.rings))))
+        
+        for k, (min_x, min_y, max_x, max_y) in enumerate(self.boxes):
+            for column in range(self.cell(min_x, self.min_x), self.cell(max_x, self.min_x) + 1):
+                for row in range(self.cell(min_y, self.min_y), self.cell(max_y, self.min_y) + 1):
+                    self.cells[(column, row)].append(k)
+    
+    def cell(self, value: float, low: float) -> int:
+        return math.floor((value - low) / self.cell_size)
+    
+    def label(self, point: Point) -> Optional[int]:
+        # None when the point is on an obstacle boundary, there the answer
+        # depends on the visibility rules and is left to the search
+        innermost = OUTSIDE
+        for k in self.cells.get((self.cell(point[0], self.min_x), self.cell(point[1], self.min_y)), ()):
+            min_x, min_y, max_x, max_y = self.boxes[k]
+            if not (min_x <= point[0] <= max_x and min_y <= point[1] <= max_y):
+                continue
+            place = locate(point, self.rings[k])
+            if place == 0:
+                return None
+            if place == 1 and (innermost == OUTSIDE or abs(self.areas[k]) < abs(self.areas[innermost])):
+                innermost = k
+        if innermost == OUTSIDE:
+            return OUTSIDE
+        return BLOCKED if self.areas[innermost] > 0 else innermost
+    
+    def connects(self, point1: Point, point2: Point) -> bool:
+        # False only when the two points surely cannot be joined
+        if point1 == point2:
+            return True
+        label1, label2 = self.label(point1), self.label(point2)
+        if label1 is None or label2 is None:
+            return True
+        return label1 != BLOCKED and label2 != BLOCKED and label1 == label2
+
+# The one-shot planners (compute_shortest_path, find_robot_path) look their
+# index up here, so repeated queries on the same obstacles build it once.
+RECENT_INDEXES = 8
+recent_indexes: OrderedDict = OrderedDict()
+
+def free_space_index(obstacles: List[Polygon]) -> FreeSpaceIndex:
+    key = tuple(tuple((point[0], point[1]) for point in obstacle) for obstacle in obstacles)
+    if key in recent_indexes:
+        recent_indexes.move_to_end(key)
+        return recent_indexes[key]
+    index = FreeSpaceIndex(obstacles)
+    recent_indexes[key] = index
+    if len(recent_indexes) > RECENT_INDEXES:
+        recent_indexes.popitem(last=False)
+    return index
@@ -0,0 +1,84 @@
+import hashlib
+import mmap
+import struct
+from array import array
+from typing import List, Optional
+from dataTypes import Polygon
+from obstacleMap import ObstacleMap
+from main import DEFAULT_BUILDER
+from csrGraph import CsrGraph, graph_to_csr
+
+GRAPH_FILE_MAGIC = b"VISGRAPH"
+GRAPH_FILE_VERSION = 1
+
+# magic, version, reduced flag, geometry hash, corner count, obstacle count,
+# directed edge count. The sections that follow are all 8 byte values:
+# obstacle sizes, corner coordinates, row offsets, neighbors, weights.
+HEADER = struct.Struct("<8sII32sqqq")
+
+def geometry_hash(obstacles: List[Polygon]) -> bytes:
+    sizes = array('q', [len(obstacle) for obstacle in obstacles])
+    coordinates = array('d', [value for obstacle in obstacles for point in obstacle for value in point])
+    return hashlib.sha256(sizes.tobytes() + coordinates.tobytes()).digest()
+
+def save_obstacle_map(path: str, obstacle_map: ObstacleMap):
+    # Corners keep their indices from 2 on, rows 0 and 1 (start and goal) are
+    # stored empty. The obstacle edges follow from the obstacle sizes.
+    obstacles = obstacle_map.obstacles
+    csr = graph_to_csr(obstacle_map.graph, len(obstacle_map.corners) + 2)
+    header = HEADER.pack(GRAPH_FILE_MAGIC, GRAPH_FILE_VERSION, obstacle_map.finder.tangent_filter is not None,
+                         geometry_hash(obstacles), len(obstacle_map.corners), len(obstacles), len(csr.neighbors))
+    
+    with open(path, "wb") as file:
+        file.write(header)
+        file.write(array('q', [len(obstacle) for obstacle in obstacles]).tobytes())
+        file.write(array('d', [value for point in obstacle_map.corners for value in point]).tobytes())
+        file.write(csr.offsets.tobytes())
+        file.write(csr.neighbors.tobytes())
+        file.write(csr.weights.tobytes())
+
+def load_obstacle_map(path: str, builder: str = DEFAULT_BUILDER, obstacles: Optional[List[Polygon]] = None) -> ObstacleMap:
+    # The graph is read straight out of the mapped file, processes that load
+    # the same file share its pages. Pass the obstacles to make sure the file
+    # was built for them.
+    with open(path, "rb") as file:
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    
+    if len(data) < HEADER.size:
+        raise ValueError(f"'{path}' is not a visibility graph file")
+    magic, version, reduced, stored_hash, corner_count, obstacle_count, edge_count = HEADER.unpack_from(data)
+    if magic != GRAPH_FILE_MAGIC:
+        raise ValueError(f"'{path}' is not a visibility graph file")
+    if version != GRAPH_FILE_VERSION:
+        raise ValueError(f"Unsupported graph file version {version}, expected {GRAPH_FILE_VERSION}")
+    if len(data) != HEADER.size + 8 * (obstacle_count + 3 * corner_count + 3 + 2 * edge_count):
+        raise ValueError(f"'{path}' is damaged, its size does not match its header")
+    
+    view = memoryview(data)
+    position = HEADER.size
+    
+    def section(code: str, count: int) -> memoryview:
+        nonlocal position
+        part = view[position:position + 8 * count].cast(code)
+        position += 8 * count
+        return part
+    
+    sizes = section('q', obstacle_count)
+    coordinates = section('d', 2 * corner_count)
+    offsets = section('q', corner_count + 3)
+    neighbors = section('q', edge_count)
+    weights = section('d', edge_count)
+    
+    file_obstacles = []
+    first = 0
+    for size in sizes:
+        file_obstacles.append([(coordinates[2 * k], coordinates[2 * k + 1]) for k in range(first, first + size)])
+        first += size
+    
+    if geometry_hash(file_obstacles) != stored_hash:
+        raise ValueError(f"'{path}' is damaged, its geometry does not match its hash")
+    if obstacles is not None and geometry_hash(obstacles) != stored_hash:
+        raise ValueError(f"'{path}' was built for different obstacles")
+    
+    graph = CsrGraph(offsets, neighbors, weights).rows(2)
+    return ObstacleMap(file_obstacles, builder, bool(reduced), graph)
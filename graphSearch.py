@@ -0,0 +1,293 @@
+import math
+import heapq
+from typing import Callable, Collection, Dict, Iterable, List, Optional, Tuple
+from dataTypes import Point, VisibilityGraph, DistanceMap, PreviousMap, SearchResult
+
+def rebuild_path(came_from: PreviousMap, all_points: List[Point], end_idx: int) -> List[Point]:
+    path = []
+    current = end_idx
+    while current is not None:
+        path.append(all_points[current])
+        current = came_from[current]
+    
+    path.reverse()
+    return path
+
+def dijkstra(graph: VisibilityGraph, all_points: List[Point], start_idx: int, end_idx: int,
+             push: Callable = heapq.heappush, pop: Callable = heapq.heappop) -> SearchResult:
+    distances = {i: float('inf') for i in range(len(all_points))}
+    distances[start_idx] = 0
+    
+    to_visit = [(0, start_idx)]
+    
+    came_from = {i: None for i in range(len(all_points))}
+    expanded = 0
+    
+    while to_visit:
+        current_dist, current = pop(to_visit)
+        
+        if current == end_idx:
+            break
+        
+        if current_dist > distances[current]:
+            continue
+        
+        expanded += 1
+        for next_point, dist in graph[current].items():
+            total_dist = current_dist + dist
+            
+            if total_dist < distances[next_point]:
+                distances[next_point] = total_dist
+                came_from[next_point] = current
+                push(to_visit, (total_dist, next_point))
+    
+    if distances[end_idx] == float('inf'):
+        return [], float('inf'), expanded
+    
+    return rebuild_path(came_from, all_points, end_idx), distances[end_idx], expanded
+
+def astar(graph: VisibilityGraph, all_points: List[Point], start_idx: int, end_idx: int,
+          push: Callable = heapq.heappush, pop: Callable = heapq.heappop) -> SearchResult:
+    # Every edge weight is the straight-line length of the edge, so the
+    # straight-line distance to the goal never overestimates what is left.
+    goal = all_points[end_idx]
+    
+    def remaining(index: int) -> float:
+        point = all_points[index]
+        return math.sqrt((goal[0] - point[0])**2 + (goal[1] - point[1])**2)
+    
+    distances = {i: float('inf') for i in range(len(all_points))}
+    distances[start_idx] = 0
+    
+    to_visit = [(remaining(start_idx), 0, start_idx)]
+    
+    came_from = {i: None for i in range(len(all_points))}
+    expanded = 0
+    
+    while to_visit:
+        _, current_dist, current = pop(to_visit)
+        
+        if current == end_idx:
+            break
+        
+        if current_dist > distances[current]:
+            continue
+        
+        expanded += 1
+        for next_point, dist in graph[current].items():
+            total_dist = current_dist + dist
+            
+            if total_dist < distances[next_point]:
+                distances[next_point] = total_dist
+                came_from[next_point] = current
+                push(to_visit, (total_dist + remaining(next_point), total_dist, next_point))
+    
+    if distances[end_idx] == float('inf'):
+        return [], float('inf'), expanded
+    
+    return rebuild_path(came_from, all_points, end_idx), distances[end_idx], expanded
+
+def bidirectional_search(graph: VisibilityGraph, all_points: List[Point], start_idx: int, end_idx: int,
+                         potential: Optional[Callable[[int], float]] = None, push: Callable = heapq.heappush,
+                         pop: Callable = heapq.heappop) -> SearchResult:
+    # Grows one search from the start and one from the goal (the graph is
+    # undirected) and stops once the two queue heads together can no longer
+    # beat the best meeting point found so far. With a potential both sides
+    # use the averaged A* keys g + p and g - p, which keeps that rule exact.
+    if start_idx == end_idx:
+        return [all_points[start_idx]], 0.0, 0
+    
+    if potential is None:
+        potential = lambda index: 0.0
+    
+    signs = (1, -1)
+    distances: List[Dict[int, float]] = [{start_idx: 0.0}, {end_idx: 0.0}]
+    came_from: List[PreviousMap] = [{start_idx: None}, {end_idx: None}]
+    to_visit = [[(potential(start_idx), start_idx)], [(-potential(end_idx), end_idx)]]
+    finished = [set(), set()]
+    
+    best = float('inf')
+    meeting = None
+    expanded = 0
+    
+    while to_visit[0] and to_visit[1]:
+        if to_visit[0][0][0] + to_visit[1][0][0] >= best:
+            break
+        
+        side = 0 if to_visit[0][0][0] <= to_visit[1][0][0] else 1
+        _, current = pop(to_visit[side])
+        
+        if current in finished[side]:
+            continue
+        finished[side].add(current)
+        
+        expanded += 1
+        mine, theirs = distances[side], distances[1 - side]
+        for next_point, dist in graph[current].items():
+            total_dist = mine[current] + dist
+            
+            if total_dist < mine.get(next_point, float('inf')):
+                mine[next_point] = total_dist
+                came_from[side][next_point] = current
+                push(to_visit[side], (total_dist + signs[side] * potential(next_point), next_point))
+            
+            if next_point in theirs and mine[next_point] + theirs[next_point] < best:
+                best = mine[next_point] + theirs[next_point]
+                meeting = next_point
+    
+    if meeting is None:
+        return [], float('inf'), expanded
+    
+    path = rebuild_path(came_from[0], all_points, meeting)
+    current = came_from[1][meeting]
+    while current is not None:
+        path.append(all_points[current])
+        current = came_from[1][current]
+    
+    return path, best, expanded
+
+def bidirectional_dijkstra(graph: VisibilityGraph, all_points: List[Point], start_idx: int, end_idx: int,
+                           push: Callable = heapq.heappush, pop: Callable = heapq.heappop) -> SearchResult:
+    return bidirectional_search(graph, all_points, start_idx, end_idx, None, push, pop)
+
+def bidirectional_astar(graph: VisibilityGraph, all_points: List[Point], start_idx: int, end_idx: int,
+                        push: Callable = heapq.heappush, pop: Callable = heapq.heappop) -> SearchResult:
+    start = all_points[start_idx]
+    goal = all_points[end_idx]
+    
+    def potential(index: int) -> float:
+        point = all_points[index]
+        to_goal = math.sqrt((goal[0] - point[0])**2 + (goal[1] - point[1])**2)
+        to_start = math.sqrt((start[0] - point[0])**2 + (start[1] - point[1])**2)
+        return (to_goal - to_start) / 2
+    
+    return bidirectional_search(graph, all_points, start_idx, end_idx, potential, push, pop)
+
+def shortest_path_tree(graph: VisibilityGraph, start_idx: int, targets: Optional[Collection[int]] = None,
+                       terminals: Collection[int] = ()) -> Tuple[DistanceMap, PreviousMap, int]:
+    # Single-source Dijkstra that runs until every target is settled (or the
+    # whole graph when targets is None). Terminals are reached but never
+    # expanded, so other query points attached to the graph are not used as
+    # stepping stones.
+    distances = {start_idx: 0}
+    came_from = {start_idx: None}
+    remaining = set(targets) if targets is not None else None
+    
+    to_visit = [(0, start_idx)]
+    expanded = 0
+    
+    while to_visit:
+        current_dist, current = heapq.heappop(to_visit)
+        
+        if current_dist > distances[current]:
+            continue
+        
+        if remaining is not None:
+            remaining.discard(current)
+            if not remaining:
+                break
+        
+        if current in terminals and current != start_idx:
+            continue
+        
+        expanded += 1
+        for next_point, dist in graph[current].items():
+            total_dist = current_dist + dist
+            
+            if total_dist < distances.get(next_point, float('inf')):
+                distances[next_point] = total_dist
+                came_from[next_point] = current
+                heapq.heappush(to_visit, (total_dist, next_point))
+    
+    return distances, came_from, expanded
+
+def lazy_astar(all_points: List[Point], start_idx: int, end_idx: int, can_link: Callable[[int, int], bool],
+               skipped: Collection[int] = (), push: Callable = heapq.heappush,
+               pop: Callable = heapq.heappop) -> SearchResult:
+    # A* over the complete graph on all_points without building it. Every
+    # pair is assumed visible with its straight-line length and the entry
+    # for a node remembers the node it came from, only when the entry is
+    # popped is that one edge checked with can_link (a blocked entry is
+    # dropped). A blocked edge can only make a path longer, so the first
+    # time the goal comes out with a checked edge its path is the shortest.
+    goal = all_points[end_idx]
+    
+    def remaining(index: int) -> float:
+        point = all_points[index]
+        return math.sqrt((goal[0] - point[0])**2 + (goal[1] - point[1])**2)
+    
+    came_from: PreviousMap = {}
+    to_visit = [(remaining(start_idx), 0, start_idx, -1)]
+    expanded = 0
+    
+    while to_visit:
+        _, current_dist, current, previous = pop(to_visit)
+        if current in came_from:
+            continue
+        if previous != -1 and not can_link(previous, current):
+            continue
+        
+        came_from[current] = previous if previous != -1 else None
+        if current == end_idx:
+            return rebuild_path(came_from, all_points, end_idx), current_dist, expanded
+        
+        expanded += 1
+        p1 = all_points[current]
+        for next_point in range(len(all_points)):
+            if next_point in came_from or next_point in skipped:
+                continue
+            p2 = all_points[next_point]
+            total_dist = current_dist + math.sqrt((p2[0] - p1[0])**2 + (p2[1] - p1[1])**2)
+            
+            # every entry is kept, even one longer than an earlier entry for
+            # the same node, the edge of the earlier one may turn out blocked
+            push(to_visit, (total_dist + remaining(next_point), total_dist, next_point, current))
+    
+    return [], float('inf'), expanded
+
+def implicit_astar(all_points: List[Point], start_idx: int, end_idx: int, neighbors: Callable[[int], Iterable[int]],
+                   push: Callable = heapq.heappush, pop: Callable = heapq.heappop) -> SearchResult:
+    # A* that never holds the graph: neighbors(i) is asked for the points i
+    # links to when i is expanded and the answer is dropped afterwards. Only
+    # the distances, parents and queue of the points reached are kept.
+    goal = all_points[end_idx]
+    
+    def remaining(index: int) -> float:
+        point = all_points[index]
+        return math.sqrt((goal[0] - point[0])**2 + (goal[1] - point[1])**2)
+    
+    distances: DistanceMap = {start_idx: 0}
+    came_from: PreviousMap = {start_idx: None}
+    closed = set()
+    to_visit = [(remaining(start_idx), 0, start_idx)]
+    expanded = 0
+    
+    while to_visit:
+        _, current_dist, current = pop(to_visit)
+        if current == end_idx:
+            return rebuild_path(came_from, all_points, end_idx), current_dist, expanded
+        if current in closed or current_dist > distances[current]:
+            continue
+        
+        closed.add(current)
+        expanded += 1
+        p1 = all_points[current]
+        for next_point in neighbors(current):
+            if next_point in closed:
+                continue
+            p2 = all_points[next_point]
+            total_dist = current_dist + math.sqrt((p2[0] - p1[0])**2 + (p2[1] - p1[1])**2)
+            
+            if total_dist < distances.get(next_point, float('inf')):
+                distances[next_point] = total_dist
+                came_from[next_point] = current
+                push(to_visit, (total_dist + remaining(next_point), total_dist, next_point))
+    
+    return [], float('inf'), expanded
+
+SEARCH_STRATEGIES = {
+    "dijkstra": dijkstra,
+    "astar": astar,
+    "bidirectional": bidirectional_dijkstra,
+    "bidirectional_astar": bidirectional_astar,
+}
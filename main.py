@@ -1,95 +1,183 @@
+import bisect
+import importlib.util
 import math
-import heapq
+import time
+from collections import Counter
+from typing import Callable, Collection, Union
 from dataTypes import Point, Edge, Polygon, VisibilityGraph, DistanceMap, PreviousMap, PathResult
+from visibilitySweep import sweep_visibility_graph, obstacle_segments, split_segments, visible_neighbors
+from edgeGrid import EdgeGrid
+from graphSearch import SEARCH_STRATEGIES, lazy_astar, implicit_astar
+from tangentFilter import TangentFilter
+from plannerStats import PlannerStats
+from freeSpace import free_space_index
+from predicates import segments_cross
+
+GRAPH_BUILDERS = ("naive", "sweep", "numpy", "parallel")
+# numpy builds the same graph as naive, several times faster from about a
+# hundred corners on, so it is the default wherever numpy is installed
+DEFAULT_BUILDER = "numpy" if importlib.util.find_spec("numpy") is not None else "naive"
 
 class ShortestPathFinder:
-    def __init__(self, obstacles: list[Polygon], start_point: Point, end_point: Point):
-        self.obstacles = obstacles
+    def __init__(self, obstacles: list[Polygon], start_point: Point, end_point: Point, builder: str = DEFAULT_BUILDER,
+                 search: str = "dijkstra", reduced: bool = False, collect_stats: bool = False,
+                 check_reachable: bool = True, lazy: bool = False, memory_bounded: bool = False,
+                 holes: Collection[int] = ()):
+        if builder not in GRAPH_BUILDERS:
+            raise ValueError(f"Unknown graph builder '{builder}', expected one of {GRAPH_BUILDERS}")
+        if search not in SEARCH_STRATEGIES:
+            raise ValueError(f"Unknown search '{search}', expected one of {tuple(SEARCH_STRATEGIES)}")
+        if lazy and memory_bounded:
+            raise ValueError("lazy and memory_bounded are two different search modes, pick one")
+        
+        started = time.perf_counter()
+        self.stats = PlannerStats() if collect_stats else None
+        self.obstacles = list(obstacles)
         self.start_point = start_point
         self.end_point = end_point
+        self.builder = builder
+        self.search = search
+        self.nodes_expanded = 0
+        self.tangent_filter = TangentFilter(obstacles, holes=holes) if reduced else None
+        self.graph = None
+        self.directions = None
+        self.removed_points = set()
+        self.check_reachable = check_reachable
+        self.free_space = None
+        self.lazy = lazy
+        self.link_cache = {}
+        self.memory_bounded = memory_bounded
         
         self.all_points = [start_point, end_point]
         self.point_to_index = {start_point: 0, end_point: 1}
         
+        self.obstacle_polygons = {}
+        self.obstacle_corners = {}
+        self.obstacle_segment_ids = {}
+        
         current_index = 2
-        for obstacle in obstacles:
+        for obstacle_id, obstacle in enumerate(obstacles):
+            self.obstacle_polygons[obstacle_id] = obstacle
+            self.obstacle_corners[obstacle_id] = list(range(current_index, current_index + len(obstacle)))
             for point in obstacle:
                 self.all_points.append(point)
                 self.point_to_index[point] = current_index
                 current_index += 1
+        self.next_obstacle_id = len(obstacles)
         
         self.edges_of_obstacles = set()
-        for obstacle in obstacles:
-            number_of_points = len(obstacle) 
-            for i in range(number_of_points):
-                point1 = obstacle[i]
-                point2 = obstacle[(i + 1) % number_of_points]
-                edge = (min(self.point_to_index[point1], self.point_to_index[point2]), 
-                       max(self.point_to_index[point1], self.point_to_index[point2]))
-                self.edges_of_obstacles.add(edge)
+        self.edge_counts = Counter()
+        self.obstacle_edge_keys = {}
+        for obstacle_id, obstacle in enumerate(obstacles):
+            self.obstacle_edge_keys[obstacle_id] = self.record_obstacle_edges(obstacle)
+        
+        self.edge_grid = EdgeGrid(obstacle_segments(obstacles))
+        first_segment = 0
+        for obstacle_id, obstacle in enumerate(obstacles):
+            self.obstacle_segment_ids[obstacle_id] = list(range(first_segment, first_segment + len(obstacle)))
+            first_segment += len(obstacle)
+        
+        if self.stats is not None:
+            self.stats.phase_seconds["index"] = time.perf_counter() - started
+            self.do_lines_cross = self.stats.counted(self.do_lines_cross, "intersection_tests")
+            self.can_points_see_each_other = self.stats.counted_visibility(self.can_points_see_each_other,
+                                                                           self.edges_of_obstacles)
+    
+    def record_obstacle_edges(self, obstacle: Polygon) -> list[Edge]:
+        keys = []
+        number_of_points = len(obstacle) 
+        for i in range(number_of_points):
+            point1 = obstacle[i]
+            point2 = obstacle[(i + 1) % number_of_points]
+            edge = (min(self.point_to_index[point1], self.point_to_index[point2]), 
+                   max(self.point_to_index[point1], self.point_to_index[point2]))
+            self.edges_of_obstacles.add(edge)
+            self.edge_counts[edge] += 1
+            keys.append(edge)
+        return keys
     
     def can_points_see_each_other(self, index1: int, index2: int) -> bool:
-        point1 = self.all_points[index1]
-        point2 = self.all_points[index2]
-        
         if (min(index1, index2), max(index1, index2)) in self.edges_of_obstacles:
             return True
         
-        for obstacle in self.obstacles:
-            number_of_points = len(obstacle)
-            for i in range(number_of_points):
-                obstacle_point1 = obstacle[i]
-                obstacle_point2 = obstacle[(i + 1) % number_of_points]
-                
-                if ((point1[0] == obstacle_point1[0] and point1[1] == obstacle_point1[1]) or 
-                    (point1[0] == obstacle_point2[0] and point1[1] == obstacle_point2[1]) or 
-                    (point2[0] == obstacle_point1[0] and point2[1] == obstacle_point1[1]) or 
-                    (point2[0] == obstacle_point2[0] and point2[1] == obstacle_point2[1])):
-                    continue
-                
-                if self.do_lines_cross(point1, point2, obstacle_point1, obstacle_point2):
-                    return False
+        return self.is_segment_clear(self.all_points[index1], self.all_points[index2])
+    
+    def is_segment_clear(self, point1: Point, point2: Point) -> bool:
+        segments = self.edge_grid.segments
+        return self.is_clear_of(point1, point2, (segments[k] for k in self.edge_grid.candidates(point1, point2)))
+    
+    def is_clear_of(self, point1: Point, point2: Point, segments) -> bool:
+        for obstacle_point1, obstacle_point2 in segments:
+            if ((point1[0] == obstacle_point1[0] and point1[1] == obstacle_point1[1]) or 
+                (point1[0] == obstacle_point2[0] and point1[1] == obstacle_point2[1]) or 
+                (point2[0] == obstacle_point1[0] and point2[1] == obstacle_point1[1]) or 
+                (point2[0] == obstacle_point2[0] and point2[1] == obstacle_point2[1])):
+                continue
+            
+            if self.do_lines_cross(point1, point2, obstacle_point1, obstacle_point2):
+                return False
         
         return True
-
+    
     def do_lines_cross(self, point1: Point, point2: Point, obstacle_point1: Point, obstacle_point2: Point) -> bool:
-        def check_direction(p: Point, q: Point, r: Point) -> int:
-            result = (q[1] - p[1]) * (r[0] - q[0]) - (q[0] - p[0]) * (r[1] - q[1])
-            if abs(result) < 1e-10:
-                return 0
-            return 1 if result > 0 else 2
-        
-        def is_point_on_line(p: Point, q: Point, r: Point) -> bool:
-            return (q[0] <= max(p[0], r[0]) + 1e-10 and q[0] >= min(p[0], r[0]) - 1e-10 and
-                    q[1] <= max(p[1], r[1]) + 1e-10 and q[1] >= min(p[1], r[1]) - 1e-10)
-        
-        dir1 = check_direction(point1, point2, obstacle_point1)
-        dir2 = check_direction(point1, point2, obstacle_point2)
-        dir3 = check_direction(obstacle_point1, obstacle_point2, point1)
-        dir4 = check_direction(obstacle_point1, obstacle_point2, point2)
-        
-        if dir1 != dir2 and dir3 != dir4:
-            return True
-        
-        if dir1 == 0 and is_point_on_line(point1, obstacle_point1, point2): return True
-        if dir2 == 0 and is_point_on_line(point1, obstacle_point2, point2): return True
-        if dir3 == 0 and is_point_on_line(obstacle_point1, point1, obstacle_point2): return True
-        if dir4 == 0 and is_point_on_line(obstacle_point1, point2, obstacle_point2): return True
-        
-        if ((point1[0] == obstacle_point1[0] and point1[1] == obstacle_point1[1]) or 
-            (point1[0] == obstacle_point2[0] and point1[1] == obstacle_point2[1]) or 
-            (point2[0] == obstacle_point1[0] and point2[1] == obstacle_point1[1]) or 
-            (point2[0] == obstacle_point2[0] and point2[1] == obstacle_point2[1])):
+        return segments_cross(point1, point2, obstacle_point1, obstacle_point2)
+    
+    def should_link(self, index1: int, index2: int) -> bool:
+        if self.tangent_filter is not None and not self.tangent_filter.keeps_edge(index1, index2, self.all_points):
             return False
+        return self.can_points_see_each_other(index1, index2)
+    
+    def cached_link(self, index1: int, index2: int) -> bool:
+        # should_link for the lazy search, every pair is checked once per obstacle set
+        key = (min(index1, index2), max(index1, index2))
+        if key not in self.link_cache:
+            self.link_cache[key] = self.should_link(index1, index2)
+        return self.link_cache[key]
+    
+    def swept_neighbors(self) -> Callable[[int], list[int]]:
+        # The rows of the graph one at a time for the memory bounded search,
+        # each comes from one rotational sweep around the point. The obstacle
+        # edges are cut at their k crossings once here, after that a sweep
+        # sorts its n + k events and keeps the pieces in a heap, O((n + k)
+        # log(n + k)) per expanded point. Every point is expanded at most
+        # once, so the work is at most that of the "sweep" builder and memory
+        # stays at the obstacle edges plus the points the search has reached.
+        segments = obstacle_segments(self.obstacles)
+        pieces = split_segments(segments)
         
-        return False
-
+        def neighbors(index: int) -> list[int]:
+            row = visible_neighbors(index, self.all_points, segments, self.do_lines_cross,
+                                    self.can_points_see_each_other, self.edges_of_obstacles, pieces)
+            return [j for j in row if j not in self.removed_points and
+                    (self.tangent_filter is None or self.tangent_filter.keeps_edge(index, j, self.all_points))]
+        return neighbors
+    
     def make_visibility_graph(self) -> VisibilityGraph:
+        if self.builder == "sweep":
+            graph = sweep_visibility_graph(self.all_points, self.obstacles, self.edges_of_obstacles,
+                                           self.do_lines_cross, self.can_points_see_each_other)
+        if self.builder == "numpy":
+            from segmentKernel import vectorized_visibility_graph
+            graph = vectorized_visibility_graph(self.all_points, self.obstacles, self.edges_of_obstacles)
+        if self.builder == "parallel":
+            from parallelGraph import parallel_visibility_graph
+            graph = parallel_visibility_graph(self.all_points, self.obstacles, self.edges_of_obstacles)
+        if self.builder != "naive":
+            for index in self.removed_points:
+                for j in graph[index]:
+                    del graph[j][index]
+                graph[index] = {}
+            if self.tangent_filter is not None:
+                return self.tangent_filter.reduce(graph, self.all_points)
+            return graph
+        
         graph: VisibilityGraph = {i: {} for i in range(len(self.all_points))}
         
         for i in range(len(self.all_points)):
+            if i in self.removed_points:
+                continue
             for j in range(i + 1, len(self.all_points)):
-                if self.can_points_see_each_other(i, j):
+                if j not in self.removed_points and self.should_link(i, j):
                     p1 = self.all_points[i]
                     p2 = self.all_points[j]
                     distance = math.sqrt((p2[0] - p1[0])**2 + (p2[1] - p1[1])**2)
@@ -99,49 +187,308 @@ class ShortestPathFinder:
         
         return graph
     
-    def find_shortest_path(self) -> PathResult:
-        graph = self.make_visibility_graph()
+    def add_obstacle(self, obstacle: Polygon) -> int:
+        # a corner is one graph node, two obstacles cannot both have it
+        for point in obstacle:
+            if point in self.point_to_index:
+                raise ValueError(f"Obstacle corner {point} is already a corner of the map or its start or goal")
+        obstacle_id = self.next_obstacle_id
+        self.next_obstacle_id += 1
+        self.obstacles.append(obstacle)
+        self.obstacle_polygons[obstacle_id] = obstacle
+        self.free_space = None
+        self.link_cache.clear()
         
-        start_idx = 0
-        end_idx = 1
+        first_index = len(self.all_points)
+        for point in obstacle:
+            self.point_to_index[point] = len(self.all_points)
+            self.all_points.append(point)
+        self.obstacle_corners[obstacle_id] = list(range(first_index, len(self.all_points)))
+        self.obstacle_edge_keys[obstacle_id] = self.record_obstacle_edges(obstacle)
         
-        distances = {i: float('inf') for i in range(len(self.all_points))}
-        distances[start_idx] = 0
+        new_segments = obstacle_segments([obstacle])
+        self.obstacle_segment_ids[obstacle_id] = [self.edge_grid.add(segment) for segment in new_segments]
+        if self.tangent_filter is not None:
+            self.tangent_filter.add_obstacle(obstacle, first_index)
         
-        to_visit = [(0, start_idx)]
+        if self.graph is None:
+            return obstacle_id
         
-        came_from = {i: None for i in range(len(self.all_points))}
+        # an existing edge can only be blocked by the new polygon's own edges,
+        # so only the edges passing through its box are checked
+        self.index_directions()
+        live = [i for i in range(first_index) if i not in self.removed_points]
+        for i, j in self.edges_through_box(live, polygon_box(obstacle)):
+            if (i, j) not in self.edges_of_obstacles and not self.is_clear_of(self.all_points[i], self.all_points[j],
+                                                                                new_segments):
+                self.unlink(i, j)
         
-        while to_visit:
-            current_dist, current = heapq.heappop(to_visit)
-            
-            if current == end_idx:
+        for i in range(first_index, len(self.all_points)):
+            self.graph[i] = {}
+            self.directions[i] = []
+            for j in range(i):
+                if j not in self.removed_points and self.should_link(i, j):
+                    self.link(i, j)
+        
+        return obstacle_id
+    
+    def remove_obstacle(self, obstacle_id: int):
+        obstacle = self.obstacle_polygons.pop(obstacle_id)
+        for position, candidate in enumerate(self.obstacles):
+            if candidate is obstacle:
+                del self.obstacles[position]
                 break
-            
-            if current_dist > distances[current]:
-                continue
-            
-            for next_point, dist in graph[current].items():
-                total_dist = current_dist + dist
-                
-                if total_dist < distances[next_point]:
-                    distances[next_point] = total_dist
-                    came_from[next_point] = current
-                    heapq.heappush(to_visit, (total_dist, next_point))
-        
-        if distances[end_idx] == float('inf'):
+        self.free_space = None
+        self.link_cache.clear()
+        
+        for k in self.obstacle_segment_ids.pop(obstacle_id):
+            self.edge_grid.remove(k)
+        for edge in self.obstacle_edge_keys.pop(obstacle_id):
+            self.edge_counts[edge] -= 1
+            if self.edge_counts[edge] == 0:
+                del self.edge_counts[edge]
+                self.edges_of_obstacles.discard(edge)
+        
+        removed = self.obstacle_corners.pop(obstacle_id)
+        for index in removed:
+            self.removed_points.add(index)
+            if self.point_to_index.get(self.all_points[index]) == index:
+                del self.point_to_index[self.all_points[index]]
+        
+        if self.graph is None:
+            return
+        
+        self.index_directions()
+        for index in removed:
+            for j in list(self.graph[index]):
+                self.unlink(index, j)
+        
+        # only pairs whose segment passed through the polygon can have been
+        # blocked by it, every other missing pair stays missing
+        live = [i for i in range(len(self.all_points)) if i not in self.removed_points]
+        for i, j in pairs_through_box(self.all_points, live, polygon_box(obstacle)):
+            if j not in self.graph[i] and self.should_link(i, j):
+                self.link(i, j)
+    
+    def link(self, index1: int, index2: int):
+        p1 = self.all_points[index1]
+        p2 = self.all_points[index2]
+        distance = math.sqrt((p2[0] - p1[0])**2 + (p2[1] - p1[1])**2)
+        
+        self.graph[index1][index2] = distance
+        self.graph[index2][index1] = distance
+        if self.directions is not None:
+            bisect.insort(self.directions[index1], (direction(p1, p2), index2))
+            bisect.insort(self.directions[index2], (direction(p2, p1), index1))
+    
+    def unlink(self, index1: int, index2: int):
+        del self.graph[index1][index2]
+        del self.graph[index2][index1]
+        if self.directions is not None:
+            for a, b in ((index1, index2), (index2, index1)):
+                row = self.directions[a]
+                del row[bisect.bisect_left(row, (direction(self.all_points[a], self.all_points[b]), b))]
+    
+    def index_directions(self):
+        # Every point's neighbours sorted by the direction they are in, so the
+        # edges through a box are found by bisecting the rows instead of
+        # checking every edge. Made on the first change to a built graph,
+        # link and unlink keep it up to date.
+        if self.directions is None:
+            self.directions = {i: sorted((direction(self.all_points[i], self.all_points[j]), j) for j in row)
+                               for i, row in self.graph.items()}
+    
+    def edges_through_box(self, indices: list[int], box: tuple[float, float, float, float]) -> list[tuple[int, int]]:
+        # the graph edges i < j from the given points whose segment meets the box
+        min_x, min_y, max_x, max_y = box
+        edges = []
+        for i in indices:
+            apex = self.all_points[i]
+            row = self.directions[i]
+            if min_x <= apex[0] <= max_x and min_y <= apex[1] <= max_y:
+                candidates = row
+            else:
+                # the directions the box is in, less than half a turn
+                center = direction(apex, ((min_x + max_x) / 2, (min_y + max_y) / 2))
+                turns = [(direction(apex, corner) - center + math.pi) % (2 * math.pi) - math.pi
+                         for corner in ((min_x, min_y), (min_x, max_y), (max_x, min_y), (max_x, max_y))]
+                low, high = center + min(turns) - 1e-9, center + max(turns) + 1e-9
+                if low < -math.pi:
+                    ranges = ((low + 2 * math.pi, math.pi), (-math.pi, high))
+                elif high > math.pi:
+                    ranges = ((low, math.pi), (-math.pi, high - 2 * math.pi))
+                else:
+                    ranges = ((low, high),)
+                candidates = [entry for low, high in ranges
+                              for entry in row[bisect.bisect_left(row, (low, -1)):bisect.bisect_right(row, (high, math.inf))]]
+            edges.extend((i, j) for _, j in candidates if j > i and segment_meets_box(apex, self.all_points[j], box))
+        return edges
+    
+    def is_reachable(self) -> bool:
+        # Labels the free space instead of searching, so a start or goal
+        # inside an obstacle or walled in away from the other is turned down
+        # before the graph is built. The index is looked up again after
+        # obstacles change, earlier queries on the same obstacles built it.
+        if self.free_space is None:
+            self.free_space = free_space_index(self.obstacles)
+        return self.free_space.connects(self.start_point, self.end_point)
+    
+    def find_shortest_path(self) -> PathResult:
+        if self.stats is not None:
+            return self.find_shortest_path_with_stats()
+        if self.check_reachable and not self.is_reachable():
+            self.nodes_expanded = 0
             return [], float('inf')
+        if self.memory_bounded:
+            path, distance, self.nodes_expanded = implicit_astar(self.all_points, 0, 1, self.swept_neighbors())
+            return path, distance
+        if self.lazy:
+            # no graph, only the edges the search pops are checked
+            path, distance, self.nodes_expanded = lazy_astar(self.all_points, 0, 1, self.cached_link,
+                                                             self.removed_points)
+            return path, distance
+        if self.graph is None:
+            self.graph = self.make_visibility_graph()
+        path, distance, self.nodes_expanded = SEARCH_STRATEGIES[self.search](self.graph, self.all_points, 0, 1)
+        return path, distance
+    
+    def find_shortest_path_with_stats(self) -> PathResult:
+        if self.check_reachable:
+            with self.stats.phase("reachable"):
+                reachable = self.is_reachable()
+            if not reachable:
+                self.nodes_expanded = 0
+                return [], float('inf')
+        if self.memory_bounded:
+            with self.stats.phase("search"):
+                path, distance, self.nodes_expanded = implicit_astar(self.all_points, 0, 1, self.swept_neighbors(),
+                                                                     self.stats.push, self.stats.pop)
+            self.stats.nodes_expanded += self.nodes_expanded
+            return path, distance
+        if self.lazy:
+            with self.stats.phase("search"):
+                path, distance, self.nodes_expanded = lazy_astar(self.all_points, 0, 1, self.cached_link,
+                                                                 self.removed_points, self.stats.push, self.stats.pop)
+            self.stats.nodes_expanded += self.nodes_expanded
+            self.stats.edges_kept = sum(self.link_cache.values())
+            return path, distance
+        if self.graph is None:
+            with self.stats.phase("build"):
+                self.graph = self.make_visibility_graph()
+        with self.stats.phase("search"):
+            path, distance, self.nodes_expanded = SEARCH_STRATEGIES[self.search](self.graph, self.all_points, 0, 1,
+                                                                                 self.stats.push, self.stats.pop)
+        self.stats.nodes_expanded += self.nodes_expanded
+        self.stats.edges_kept = sum(len(row) for row in self.graph.values()) // 2
+        return path, distance
+
+def direction(p: Point, q: Point) -> float:
+    return math.atan2(q[1] - p[1], q[0] - p[0])
+
+def polygon_box(obstacle: Polygon) -> tuple[float, float, float, float]:
+    xs = [point[0] for point in obstacle]
+    ys = [point[1] for point in obstacle]
+    margin = 1e-9 * max(1.0, max(xs) - min(xs), max(ys) - min(ys))
+    return min(xs) - margin, min(ys) - margin, max(xs) + margin, max(ys) + margin
+
+def segment_meets_box(p1: Point, p2: Point, box: tuple[float, float, float, float]) -> bool:
+    min_x, min_y, max_x, max_y = box
+    if max(p1[0], p2[0]) < min_x or min(p1[0], p2[0]) > max_x:
+        return False
+    if max(p1[1], p2[1]) < min_y or min(p1[1], p2[1]) > max_y:
+        return False
+    
+    sides = [(p2[0] - p1[0]) * (y - p1[1]) - (p2[1] - p1[1]) * (x - p1[0])
+             for x, y in ((min_x, min_y), (min_x, max_y), (max_x, min_y), (max_x, max_y))]
+    return not (all(side > 0 for side in sides) or all(side < 0 for side in sides))
+
+def wedge_span(apex: Point, right: Point, left: Point, low_x: float, high_x: float) -> Union[tuple[float, float], None]:
+    # The y range of the wedge from apex between the directions right and
+    # left (less than half a turn counterclockwise from right) within
+    # low_x <= x <= high_x, None when it misses the strip. The corners of that
+    # part are the apex and where the sides cross the strip's borders, it is
+    # open towards directions straight up or down inside the wedge.
+    ys = [apex[1]] if low_x <= apex[0] <= high_x else []
+    for dx, dy in (right, left):
+        for x in (low_x, high_x):
+            if dx != 0 and (x - apex[0]) / dx >= 0:
+                ys.append(apex[1] + (x - apex[0]) / dx * dy)
+    if not ys:
+        return None
+    
+    def inside(direction: Point) -> bool:
+        return (right[0] * direction[1] - right[1] * direction[0] >= 0 and
+                direction[0] * left[1] - direction[1] * left[0] >= 0)
+    
+    return -math.inf if inside((0.0, -1.0)) else min(ys), math.inf if inside((0.0, 1.0)) else max(ys)
+
+def pairs_through_box(all_points: list[Point], indices: list[int],
+                      box: tuple[float, float, float, float]) -> list[tuple[int, int]]:
+    # The pairs i < j of indices whose segment meets the box. The points are
+    # put in a grid (an EdgeGrid of single points), and from each point only
+    # the cells of the wedge it sees the box in are searched, column by column.
+    grid = EdgeGrid([(all_points[i], all_points[i]) for i in indices])
+    size, margin = grid.cell_size, grid.margin + 1e-9 * grid.cell_size
+    min_x, min_y, max_x, max_y = box
+    center = ((min_x + max_x) / 2, (min_y + max_y) / 2)
+    pairs = []
+    
+    for position, i in enumerate(indices):
+        apex = all_points[i]
+        if min_x <= apex[0] <= max_x and min_y <= apex[1] <= max_y:
+            # the box is all around the point
+            pairs.extend((i, j) for j in indices[position + 1:])
+            continue
         
-        path = []
-        current = end_idx
-        while current is not None:
-            path.append(self.all_points[current])
-            current = came_from[current]
+        # the corners the box spans as seen from the point
+        ahead = (center[0] - apex[0], center[1] - apex[1])
+        corners = []
+        for x, y in ((min_x, min_y), (min_x, max_y), (max_x, min_y), (max_x, max_y)):
+            dx, dy = x - apex[0], y - apex[1]
+            corners.append((math.atan2(ahead[0] * dy - ahead[1] * dx, ahead[0] * dx + ahead[1] * dy), (dx, dy)))
+        right, left = min(corners)[1], max(corners)[1]
         
-        path.reverse()
+        # the other end is past the box on the far side from the point and
+        # on the wedge's side of it, only the columns and rows there are
+        # searched
+        low_x = min_x if apex[0] < min_x else -math.inf
+        high_x = max_x if apex[0] > max_x else math.inf
+        if min(right[0], left[0]) >= 0:
+            low_x = max(low_x, apex[0])
+        if max(right[0], left[0]) <= 0:
+            high_x = min(high_x, apex[0])
+        low_y = min_y if apex[1] < min_y else -math.inf
+        high_y = max_y if apex[1] > max_y else math.inf
+        first_column = max(math.floor((max(low_x, grid.min_x - size) - margin - grid.min_x) / size), 0)
+        last_column = min(math.floor((min(high_x, grid.min_x + grid.columns * size) + margin - grid.min_x) / size),
+                          grid.columns - 1)
         
-        return path, distances[end_idx]
+        # a point on a cell border is in both cells
+        found = set()
+        for column in range(first_column, last_column + 1):
+            column_x = grid.min_x + column * size
+            span = wedge_span(apex, right, left, column_x - margin, column_x + size + margin)
+            if span is None:
+                continue
+            bottom, top = max(span[0], low_y, grid.min_y - size), min(span[1], high_y, grid.min_y + grid.rows * size)
+            first_row = max(math.floor((bottom - margin - grid.min_y) / size), 0)
+            last_row = min(math.floor((top + margin - grid.min_y) / size), grid.rows - 1)
+            for row in range(first_row, last_row + 1):
+                for k in grid.cells.get((column, row), ()):
+                    j = indices[k]
+                    if j > i and j not in found and segment_meets_box(apex, all_points[j], box):
+                        found.add(j)
+                        pairs.append((i, j))
+    return pairs
 
-def compute_shortest_path(obstacles: list[Polygon], start: Point, goal: Point) -> PathResult:
-    finder = ShortestPathFinder(obstacles, start, goal)
-    return finder.find_shortest_path()
\ No newline at end of file
+def compute_shortest_path(obstacles: list[Polygon], start: Point, goal: Point, builder: str = DEFAULT_BUILDER,
+                          search: str = "dijkstra", reduced: bool = False,
+                          collect_stats: bool = False, check_reachable: bool = True, lazy: bool = False,
+                          memory_bounded: bool = False) -> Union[PathResult, tuple[list[Point], float, PlannerStats]]:
+    # with collect_stats the planner's PlannerStats come back as a third value
+    finder = ShortestPathFinder(obstacles, start, goal, builder, search, reduced, collect_stats, check_reachable,
+                                lazy, memory_bounded)
+    path, distance = finder.find_shortest_path()
+    if collect_stats:
+        return path, distance, finder.stats
+    return path, distance
@@ -0,0 +1,542 @@
+import heapq
+import math
+import random
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+from dataTypes import Point, Polygon, PathResult
+from predicates import orientation, incircle
+from polygonUnion import union_polygons, signed_area
+
+Box = Tuple[float, float, float, float]
+Edge = Tuple[int, int]
+
+# orientation() results
+CLOCKWISE = 1
+COUNTERCLOCKWISE = 2
+
+def edge_key(a: int, b: int) -> Edge:
+    return (a, b) if a < b else (b, a)
+
+def cross(o: Point, a: Point, b: Point) -> float:
+    return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+def nearest_on_segment(point: Point, a: Point, b: Point) -> Point:
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    length = dx * dx + dy * dy
+    share = ((point[0] - a[0]) * dx + (point[1] - a[1]) * dy) / length if length else 0.0
+    share = min(max(share, 0.0), 1.0)
+    return a[0] + dx * share, a[1] + dy * share
+
+def funnel(portals: List[Tuple[Point, Point]]) -> List[Point]:
+    # Simple stupid funnel: portals are (left, right) pairs along the channel,
+    # the first and last are the start and the goal twice. The apex moves to
+    # a funnel side whenever the other side would cross over it.
+    apex = left = right = portals[0][0]
+    apex_index = left_index = right_index = 0
+    path = [apex]
+    i = 1
+    while i < len(portals):
+        new_left, new_right = portals[i]
+        
+        if cross(apex, right, new_right) >= 0:
+            if apex == right or cross(apex, left, new_right) < 0:
+                right, right_index = new_right, i
+            else:
+                # the right side crosses the left one, its corner is on the path
+                path.append(left)
+                apex, apex_index = left, left_index
+                left = right = apex
+                left_index = right_index = apex_index
+                i = apex_index + 1
+                continue
+        
+        if cross(apex, left, new_left) <= 0:
+            if apex == left or cross(apex, right, new_left) > 0:
+                left, left_index = new_left, i
+            else:
+                path.append(right)
+                apex, apex_index = right, right_index
+                left = right = apex
+                left_index = right_index = apex_index
+                i = apex_index + 1
+                continue
+        i += 1
+    
+    goal = portals[-1][0]
+    if path[-1] != goal:
+        path.append(goal)
+    # portals sharing a corner put it on the path once for each
+    return [point for k, point in enumerate(path) if k == 0 or point != path[k - 1]]
+
+class NavigationMesh:
+    # Triangulation of the free space for maps too big for a visibility
+    # graph. The obstacles (joined where they overlap or touch) are cut out
+    # of a box around them by a constrained Delaunay triangulation: every
+    # corner is inserted by flips, then every obstacle side is forced in by
+    # flipping the edges that cross it. Triangles inside obstacles are
+    # dropped. A query runs A* over neighboring free triangles to find a
+    # channel from start to goal and pulls the path tight in it with the
+    # funnel algorithm.
+    #
+    # The path is the shortest one inside the channel, and so a valid path
+    # around the obstacles, but A* picks the channel by the lengths of the
+    # entry points, which are not those of the taut path. Where channels
+    # around obstacles are close in length it can pick a longer one: on the
+    # benchmark's convex and clutter worlds and random maps the path is 2%
+    # longer than the exact one on average and up to 11% (benchmark.py
+    # --mesh reports the ratio). In mazes the visibility graph slips
+    # between walls that overlap, there the mesh is the longer but the
+    # valid one. Paths may run along obstacle sides and through touching
+    # corners.
+    def __init__(self, obstacles: List[Polygon], bounds: Optional[Box] = None, margin: float = 1.0):
+        shapes = [list(shape) if signed_area(shape) >= 0 else list(reversed(shape)) for shape in obstacles if len(shape) >= 3]
+        rings = union_polygons(shapes)
+        corners = [point for ring in rings for point in ring]
+        
+        # start and goal have to be inside the bounds, by default the box of
+        # the obstacles grown by margin
+        if bounds is None:
+            if corners:
+                bounds = (min(p[0] for p in corners) - margin, min(p[1] for p in corners) - margin,
+                          max(p[0] for p in corners) + margin, max(p[1] for p in corners) + margin)
+            else:
+                bounds = (-margin, -margin, margin, margin)
+        self.bounds = bounds
+        low_x, low_y, high_x, high_y = bounds
+        if any(not (low_x < p[0] < high_x and low_y < p[1] < high_y) for p in corners):
+            raise ValueError(f"Obstacles must lie strictly inside the bounds {bounds}")
+        
+        self.points: List[Point] = [(low_x, low_y), (high_x, low_y), (high_x, high_y), (low_x, high_y)]
+        # triangles are counterclockwise vertex triples, neighbors[t][i] is the
+        # triangle across the edge opposite vertex i (-1 on the box)
+        self.triangles: List[List[int]] = [[0, 1, 2], [0, 2, 3]]
+        self.neighbors: List[List[int]] = [[-1, 1, -1], [-1, -1, 0]]
+        # the triangle holding each directed edge
+        self.edges: Dict[Edge, int] = {(0, 1): 0, (1, 2): 0, (2, 0): 0, (0, 2): 1, (2, 3): 1, (3, 0): 1}
+        # obstacle sides and how often a ring runs along them, sides are never
+        # flipped or crossed
+        self.constrained: Dict[Edge, int] = {}
+        self.random = random.Random(0)
+        self.last = 0
+        self.nodes_expanded = 0
+        
+        index: Dict[Point, int] = {}
+        ring_ids: List[List[int]] = []
+        for ring in rings:
+            ids = []
+            for point in ring:
+                if point not in index:
+                    index[point] = len(self.points)
+                    self.points.append(point)
+                ids.append(index[point])
+            ring_ids.append(ids)
+        self.vertex_triangle: List[int] = [0, 0, 0, 1] + [-1] * (len(self.points) - 4)
+        
+        for vertex in self.insertion_order(list(range(4, len(self.points)))):
+            self.insert_point(vertex)
+        
+        for ids in ring_ids:
+            for k in range(len(ids)):
+                a, b = ids[k], ids[(k + 1) % len(ids)]
+                if a != b:
+                    self.insert_constraint(a, b)
+        
+        self.free = self.mark_free()
+    
+    def insertion_order(self, vertices: List[int]) -> List[int]:
+        # rows of a grid with about one corner per cell, walked back and forth,
+        # so each insertion starts its walk next to the last one
+        if not vertices:
+            return vertices
+        low_x, low_y, high_x, high_y = self.bounds
+        rows = max(1, int(math.sqrt(len(vertices))))
+        height = (high_y - low_y) / rows
+        
+        def key(vertex: int):
+            x, y = self.points[vertex]
+            row = min(rows - 1, int((y - low_y) / height))
+            return row, x if row % 2 == 0 else -x
+        
+        return sorted(vertices, key=key)
+    
+    def set_triangle(self, t: int, vertices: List[int], neighbors: List[int]):
+        if t == len(self.triangles):
+            self.triangles.append(vertices)
+            self.neighbors.append(neighbors)
+        else:
+            old = self.triangles[t]
+            for k in range(3):
+                if self.edges.get((old[k], old[(k + 1) % 3])) == t:
+                    del self.edges[(old[k], old[(k + 1) % 3])]
+            self.triangles[t] = vertices
+            self.neighbors[t] = neighbors
+        for k in range(3):
+            self.edges[(vertices[k], vertices[(k + 1) % 3])] = t
+            self.vertex_triangle[vertices[k]] = t
+    
+    def replace_neighbor(self, t: int, old: int, new: int):
+        if t != -1:
+            neighbors = self.neighbors[t]
+            neighbors[neighbors.index(old)] = new
+    
+    def locate(self, point: Point) -> Tuple[int, int]:
+        # The triangle holding point and the index of the edge it lies on
+        # (-1 inside), by a walk from the last triangle found. Edges are tried
+        # in random order, which keeps the walk from circling in a
+        # triangulation that is no longer Delaunay.
+        t = self.last
+        while True:
+            vertices = self.triangles[t]
+            on_edge = -1
+            start = self.random.randrange(3)
+            for k in range(3):
+                i = (start + k) % 3
+                turn = orientation(self.points[vertices[(i + 1) % 3]], self.points[vertices[(i + 2) % 3]], point)
+                if turn == CLOCKWISE:
+                    t = self.neighbors[t][i]
+                    break
+                if turn == 0:
+                    on_edge = i
+            else:
+                self.last = t
+                return t, on_edge
+            if t == -1:
+                raise ValueError(f"Point {point} is outside the meshed area {self.bounds}")
+    
+    def insert_point(self, p: int) -> int:
+        # the corner at the point of p afterwards, an existing one is kept
+        t, edge = self.locate(self.points[p])
+        for vertex in self.triangles[t]:
+            if self.points[vertex] == self.points[p]:
+                return vertex
+        
+        if edge == -1:
+            a, b, c = self.triangles[t]
+            n_a, n_b, n_c = self.neighbors[t]
+            t1, t2 = len(self.triangles), len(self.triangles) + 1
+            self.set_triangle(t, [a, b, p], [t1, t2, n_c])
+            self.set_triangle(t1, [b, c, p], [t2, t, n_a])
+            self.set_triangle(t2, [c, a, p], [t, t1, n_b])
+            self.replace_neighbor(n_a, t, t1)
+            self.replace_neighbor(n_b, t, t2)
+            stack = [(t, 2), (t1, 2), (t2, 2)]
+        else:
+            # on the edge opposite vertex edge, both triangles beside it split
+            i = edge
+            a, b, c = self.triangles[t][i], self.triangles[t][(i + 1) % 3], self.triangles[t][(i + 2) % 3]
+            u = self.neighbors[t][i]
+            n_tb, n_tc = self.neighbors[t][(i + 1) % 3], self.neighbors[t][(i + 2) % 3]
+            j = self.neighbors[u].index(t)
+            d = self.triangles[u][j]
+            n_uc, n_ub = self.neighbors[u][(j + 1) % 3], self.neighbors[u][(j + 2) % 3]
+            t1, u1 = len(self.triangles), len(self.triangles) + 1
+            self.set_triangle(t, [a, b, p], [u1, t1, n_tc])
+            self.set_triangle(t1, [a, p, c], [u, n_tb, t])
+            self.set_triangle(u, [d, c, p], [t1, u1, n_ub])
+            self.set_triangle(u1, [d, p, b], [t, n_uc, u])
+            self.replace_neighbor(n_tb, t, t1)
+            self.replace_neighbor(n_uc, u, u1)
+            if edge_key(b, c) in self.constrained:
+                count = self.constrained.pop(edge_key(b, c))
+                for key in (edge_key(b, p), edge_key(p, c)):
+                    self.constrained[key] = self.constrained.get(key, 0) + count
+            stack = [(t, 2), (t1, 1), (u, 2), (u1, 1)]
+        
+        # restore the Delaunay property around p
+        while stack:
+            t, i = stack.pop()
+            u = self.neighbors[t][i]
+            if u == -1:
+                continue
+            vertices = self.triangles[t]
+            b, c = vertices[(i + 1) % 3], vertices[(i + 2) % 3]
+            if edge_key(b, c) in self.constrained:
+                continue
+            d = self.triangles[u][self.neighbors[u].index(t)]
+            if incircle(*(self.points[v] for v in vertices), self.points[d]) > 0:
+                t, u = self.flip(t, i)
+                stack.append((t, 0))
+                stack.append((u, 0))
+        return p
+    
+    def flip(self, t: int, i: int) -> Tuple[int, int]:
+        # Swaps the edge opposite vertex i of t for the other diagonal of the
+        # two triangles beside it. Both new triangles start with that vertex.
+        vertices = self.triangles[t]
+        a, b, c = vertices[i], vertices[(i + 1) % 3], vertices[(i + 2) % 3]
+        u = self.neighbors[t][i]
+        n_tb, n_tc = self.neighbors[t][(i + 1) % 3], self.neighbors[t][(i + 2) % 3]
+        j = self.neighbors[u].index(t)
+        d = self.triangles[u][j]
+        n_uc, n_ub = self.neighbors[u][(j + 1) % 3], self.neighbors[u][(j + 2) % 3]
+        self.set_triangle(t, [a, b, d], [n_uc, u, n_tc])
+        self.set_triangle(u, [a, d, c], [n_ub, n_tb, t])
+        self.replace_neighbor(n_uc, u, t)
+        self.replace_neighbor(n_tb, t, u)
+        return t, u
+    
+    def around(self, vertex: int) -> List[int]:
+        # the triangles around vertex, turning one way and then the other
+        # if the box edge stops the turn
+        start = self.vertex_triangle[vertex]
+        result = [start]
+        for step in (1, 2):
+            t = start
+            while True:
+                t = self.neighbors[t][(self.triangles[t].index(vertex) + step) % 3]
+                if t == -1 or t == start:
+                    break
+                result.append(t)
+            if t == start:
+                break
+        return result
+    
+    def edge_triangle(self, a: int, b: int) -> Tuple[int, int]:
+        # the triangle with the edge from a to b counterclockwise and the index
+        # of the vertex opposite it
+        t = self.edges.get((a, b))
+        if t is None:
+            raise ValueError(f"No edge from {self.points[a]} to {self.points[b]}")
+        vertices = self.triangles[t]
+        return t, (vertices.index(a) + 2) % 3
+    
+    def crosses(self, a: int, b: int, v1: int, v2: int) -> bool:
+        # the segments ab and v1v2 cross at one point inside both
+        p, q, r, s = self.points[a], self.points[b], self.points[v1], self.points[v2]
+        turn1, turn2 = orientation(r, s, p), orientation(r, s, q)
+        turn3, turn4 = orientation(p, q, r), orientation(p, q, s)
+        return 0 not in (turn1, turn2, turn3, turn4) and turn1 != turn2 and turn3 != turn4
+    
+    def insert_constraint(self, v1: int, v2: int):
+        # Sloan's method: collect the edges crossing v1v2 walking from v1, then
+        # flip them out one by one. A corner lying on v1v2 splits it in two.
+        pending = [(v1, v2)]
+        while pending:
+            v1, v2 = pending.pop()
+            start, end = self.points[v1], self.points[v2]
+            
+            # the triangle around v1 whose wedge holds the direction to v2
+            t = self.vertex_triangle[v1]
+            crossing: List[Edge] = []
+            target = v2
+            first = t
+            while True:
+                vertices = self.triangles[t]
+                k = vertices.index(v1)
+                x, y = vertices[(k + 1) % 3], vertices[(k + 2) % 3]
+                if v2 in (x, y):
+                    break
+                turn_x = orientation(start, self.points[x], end)
+                turn_y = orientation(start, self.points[y], end)
+                if turn_x == 0 and self.between(v1, x, v2):
+                    target = x
+                    break
+                if turn_y == 0 and self.between(v1, y, v2):
+                    target = y
+                    break
+                if turn_x == COUNTERCLOCKWISE and turn_y == CLOCKWISE:
+                    crossing.append((y, x))
+                    break
+                t = self.neighbors[t][(k + 1) % 3]
+                if t == -1 or t == first:
+                    raise ValueError(f"Cannot find the side from {start} to {end} in the triangulation")
+            
+            # walk through the triangles beside v1v2, (left, right) edges
+            if crossing:
+                left, right = crossing[0]
+                while True:
+                    u, opposite = self.edge_triangle(left, right)
+                    z = self.triangles[u][opposite]
+                    if z == v2:
+                        break
+                    turn = orientation(start, end, self.points[z])
+                    if turn == 0:
+                        target = z
+                        break
+                    if turn == COUNTERCLOCKWISE:
+                        left = z
+                    else:
+                        right = z
+                    crossing.append((left, right))
+            
+            side = next((edge for edge in crossing if edge_key(*edge) in self.constrained), None)
+            if side is not None:
+                # another side crosses this one (a self-intersecting obstacle),
+                # both are split where they meet and inserted piece by piece
+                count = self.constrained.pop(edge_key(*side))
+                p = self.add_crossing(side[0], side[1], v1, v2)
+                pending += [(v1, p), (p, v2)] + [(side[0], p), (p, side[1])] * count
+                continue
+            
+            if target != v2:
+                pending.append((target, v2))
+            
+            queue = deque(crossing)
+            created: List[Edge] = []
+            while queue:
+                a, b = queue.popleft()
+                t, i = self.edge_triangle(a, b)
+                u = self.neighbors[t][i]
+                c = self.triangles[t][i]
+                d = self.triangles[u][self.neighbors[u].index(t)]
+                turn_a = orientation(self.points[c], self.points[d], self.points[a])
+                turn_b = orientation(self.points[c], self.points[d], self.points[b])
+                if 0 in (turn_a, turn_b) or turn_a == turn_b:
+                    # not a convex quadrilateral yet, come back later
+                    queue.append((a, b))
+                    continue
+                self.flip(t, i)
+                if self.crosses(c, d, v1, target):
+                    queue.append((c, d))
+                else:
+                    created.append((c, d))
+            
+            self.constrained[edge_key(v1, target)] = self.constrained.get(edge_key(v1, target), 0) + 1
+            
+            # the new edges other than the side are made Delaunay again
+            changed = True
+            while changed:
+                changed = False
+                for k, (c, d) in enumerate(created):
+                    if edge_key(c, d) == edge_key(v1, target):
+                        continue
+                    t, i = self.edge_triangle(c, d)
+                    u = self.neighbors[t][i]
+                    if u == -1:
+                        continue
+                    e = self.triangles[u][self.neighbors[u].index(t)]
+                    if incircle(*(self.points[v] for v in self.triangles[t]), self.points[e]) > 0:
+                        t, _ = self.flip(t, i)
+                        created[k] = (self.triangles[t][0], e)
+                        changed = True
+    
+    def add_crossing(self, a: int, b: int, c: int, d: int) -> int:
+        # a new corner where the sides ab and cd cross
+        p, q, r, s = self.points[a], self.points[b], self.points[c], self.points[d]
+        share = cross(r, s, p) / (cross(r, s, p) - cross(r, s, q))
+        self.points.append((p[0] + (q[0] - p[0]) * share, p[1] + (q[1] - p[1]) * share))
+        self.vertex_triangle.append(-1)
+        vertex = self.insert_point(len(self.points) - 1)
+        if vertex != len(self.points) - 1:
+            self.points.pop()
+            self.vertex_triangle.pop()
+        return vertex
+    
+    def between(self, a: int, b: int, c: int) -> bool:
+        # b strictly between a and c, for b already on the line ac
+        p, q, r = self.points[a], self.points[b], self.points[c]
+        return min(p[0], r[0]) <= q[0] <= max(p[0], r[0]) and min(p[1], r[1]) <= q[1] <= max(p[1], r[1]) and q not in (p, r)
+    
+    def mark_free(self) -> List[bool]:
+        # flood fill from the box, crossing an obstacle side flips in and out,
+        # a side run along twice (a flat obstacle) is a wall between free
+        # triangles
+        free = [False] * len(self.triangles)
+        seen = [False] * len(self.triangles)
+        # a triangle at a box corner is outside every obstacle
+        first = self.vertex_triangle[0]
+        seen[first] = True
+        free[first] = True
+        queue = deque([first])
+        while queue:
+            t = queue.popleft()
+            vertices = self.triangles[t]
+            for i, u in enumerate(self.neighbors[t]):
+                if u == -1 or seen[u]:
+                    continue
+                seen[u] = True
+                side = self.constrained.get(edge_key(vertices[(i + 1) % 3], vertices[(i + 2) % 3]), 0) % 2 == 1
+                free[u] = free[t] != side
+                queue.append(u)
+        return free
+    
+    def free_triangle(self, point: Point) -> int:
+        low_x, low_y, high_x, high_y = self.bounds
+        if not (low_x <= point[0] <= high_x and low_y <= point[1] <= high_y):
+            raise ValueError(f"Point {point} is outside the meshed area {self.bounds}")
+        t, edge = self.locate(point)
+        if self.free[t]:
+            return t
+        # on a side or a corner any free triangle touching the point will do
+        vertices = self.triangles[t]
+        candidates = [self.neighbors[t][edge]] if edge != -1 else []
+        if point in (self.points[v] for v in vertices):
+            candidates = self.around(vertices[[self.points[v] for v in vertices].index(point)])
+        for u in candidates:
+            if u != -1 and self.free[u]:
+                return u
+        return -1
+    
+    def channel(self, start: Point, goal: Point, first: int, last: int) -> Optional[List[Tuple[int, int]]]:
+        # A* over free triangles and the edge they are entered by, so a
+        # triangle reached first through a worse edge can still be crossed
+        # from another one. A triangle is entered at the point of the
+        # crossed edge nearest to where the one before was entered, which
+        # follows a taut path around corners far better than edge midpoints.
+        # The result lists (triangle, edge index) for every edge crossed.
+        entry = {(first, -1): start}
+        cost = {(first, -1): 0.0}
+        came_from = {}
+        queue = [(math.dist(start, goal), 0.0, (first, -1))]
+        closed = set()
+        while queue:
+            _, g, state = heapq.heappop(queue)
+            if state in closed:
+                continue
+            closed.add(state)
+            self.nodes_expanded += 1
+            t, _ = state
+            if t == last:
+                steps = []
+                while state[0] != first or state[1] != -1:
+                    previous, i = came_from[state]
+                    steps.append((previous[0], i))
+                    state = previous
+                return steps[::-1]
+            vertices = self.triangles[t]
+            for i, u in enumerate(self.neighbors[t]):
+                if u == -1 or i == state[1] or not self.free[u]:
+                    continue
+                b, c = vertices[(i + 1) % 3], vertices[(i + 2) % 3]
+                if edge_key(b, c) in self.constrained:
+                    continue
+                next_state = (u, self.neighbors[u].index(t))
+                if next_state in closed:
+                    continue
+                point = nearest_on_segment(entry[state], self.points[b], self.points[c])
+                new_cost = g + math.dist(entry[state], point)
+                if new_cost < cost.get(next_state, float('inf')):
+                    cost[next_state] = new_cost
+                    entry[next_state] = point
+                    came_from[next_state] = (state, i)
+                    heapq.heappush(queue, (new_cost + math.dist(point, goal), new_cost, next_state))
+        return None
+    
+    def find_shortest_path(self, start: Point, goal: Point) -> PathResult:
+        self.nodes_expanded = 0
+        if start == goal:
+            return [start], 0
+        first, last = self.free_triangle(start), self.free_triangle(goal)
+        if first == -1 or last == -1:
+            return [], float('inf')
+        
+        steps = self.channel(start, goal, first, last)
+        if steps is None:
+            return [], float('inf')
+        
+        # leaving a counterclockwise triangle across the edge opposite vertex
+        # i, vertex i + 2 is on the left and vertex i + 1 on the right
+        portals = [(start, start)]
+        for t, i in steps:
+            vertices = self.triangles[t]
+            portals.append((self.points[vertices[(i + 2) % 3]], self.points[vertices[(i + 1) % 3]]))
+        portals.append((goal, goal))
+        path = funnel(portals)
+        return path, sum(math.dist(a, b) for a, b in zip(path, path[1:]))
+
+def compute_mesh_path(obstacles: List[Polygon], start_point: Point, end_point: Point, margin: float = 1.0) -> PathResult:
+    # the mesh covers the obstacles and both end points
+    points = [point for obstacle in obstacles for point in obstacle] + [start_point, end_point]
+    bounds = (min(p[0] for p in points) - margin, min(p[1] for p in points) - margin,
+              max(p[0] for p in points) + margin, max(p[1] for p in points) + margin)
+    return NavigationMesh(obstacles, bounds).find_shortest_path(start_point, end_point)
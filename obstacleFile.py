@@ -0,0 +1,282 @@
+import csv
+import json
+import os
+import re
+import struct
+from array import array
+from typing import BinaryIO, Iterator, List, Optional, TextIO
+from dataTypes import Point, Polygon
+
+# Readers for obstacle maps kept in files. Every reader is a generator that
+# reads its file in pieces and gives one obstacle at a time, only the
+# obstacle being read is held besides the list the planner gets in the end.
+# Rings that repeat their first corner at the end lose the copy, holes of
+# polygons are dropped (a planner obstacle has one outline). The obstacles
+# come out as lists of point tuples, not packed arrays: every planner, the
+# polygon union and the map caches work on those, and ShortestPathFinder
+# numbers the corners in the same pass that collects them.
+
+CHUNK_SIZE = 1 << 20
+
+# the next bracket or string in JSON text, and the rest of a string after its
+# opening quote
+JSON_STRUCTURE = re.compile(r'["\[\]{}]')
+JSON_STRING_END = re.compile(r'(?:[^"\\]|\\.)*"')
+WKT_BRACKET = re.compile(r"[()]")
+
+VERTEX_FILE_MAGIC = b"VISPOLYS"
+VERTEX_FILE_VERSION = 1
+
+# magic, version, then per obstacle its corner count (uint32) and the corner
+# coordinates as 8 byte floats, x and y in turn.
+VERTEX_HEADER = struct.Struct("<8sI")
+COUNT = struct.Struct("<I")
+
+def parse_number(text: str):
+    # integer literals stay ints, so grid maps keep the integer predicates
+    if "." in text or "e" in text or "E" in text or "n" in text or "N" in text:
+        return float(text)
+    return int(text)
+
+def open_ring(ring: List[Point]) -> Polygon:
+    if len(ring) > 1 and ring[0] == ring[-1]:
+        ring.pop()
+    return ring
+
+def wkt_ring(text: str) -> Polygon:
+    ring = []
+    for vertex in text.split(","):
+        values = vertex.split()
+        ring.append((parse_number(values[0]), parse_number(values[1])))
+    return open_ring(ring)
+
+def wkt_outlines(geometry: str) -> Iterator[Polygon]:
+    # The rings are at depth 2 of a POLYGON and depth 3 of a MULTIPOLYGON,
+    # the first ring of every polygon is its outline and the rest are holes.
+    # Brackets are counted, so white space between them does not matter.
+    ring_depth = 3 if geometry[:12].upper() == "MULTIPOLYGON" else 2
+    depth = 0
+    outline_next = False
+    start = 0
+    for bracket in WKT_BRACKET.finditer(geometry):
+        if bracket.group() == "(":
+            depth += 1
+            if depth == ring_depth - 1:
+                outline_next = True
+            elif depth == ring_depth:
+                start = bracket.end()
+            elif depth > ring_depth:
+                raise ValueError(f"WKT ring nested too deep in {geometry[:60]!r}")
+            continue
+        if depth == ring_depth and outline_next:
+            yield wkt_ring(geometry[start:bracket.start()])
+            outline_next = False
+        elif depth == ring_depth - 1 and outline_next:
+            raise ValueError(f"WKT polygon without a ring in {geometry[:60]!r}")
+        depth -= 1
+
+def wkt_polygons(file: TextIO) -> Iterator[Polygon]:
+    # POLYGON and MULTIPOLYGON geometries, a geometry may run over several lines
+    pending = []
+    depth = 0
+    for line in file:
+        depth += line.count("(") - line.count(")")
+        pending.append(line)
+        if depth == 0:
+            geometry = "".join(pending).strip()
+            pending = []
+            if geometry.upper().startswith(("POLYGON", "MULTIPOLYGON")):
+                yield from wkt_outlines(geometry)
+    if depth != 0:
+        raise ValueError("WKT input ends inside a geometry")
+
+def geojson_outlines(item: dict) -> Iterator[Polygon]:
+    kind = item.get("type")
+    if kind == "Feature":
+        if item.get("geometry"):
+            yield from geojson_outlines(item["geometry"])
+    elif kind == "FeatureCollection":
+        for feature in item.get("features", ()):
+            yield from geojson_outlines(feature)
+    elif kind == "GeometryCollection":
+        for geometry in item.get("geometries", ()):
+            yield from geojson_outlines(geometry)
+    elif kind == "Polygon":
+        yield open_ring([(point[0], point[1]) for point in item["coordinates"][0]])
+    elif kind == "MultiPolygon":
+        for polygon in item["coordinates"]:
+            yield open_ring([(point[0], point[1]) for point in polygon[0]])
+
+def geojson_polygons(file: TextIO) -> Iterator[Polygon]:
+    # A FeatureCollection is decoded one feature at a time out of its
+    # "features" array, anything else (a single object or one object per
+    # line) object by object.
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    done = False
+    
+    def more() -> bool:
+        nonlocal buffer, position, done
+        chunk = file.read(CHUNK_SIZE)
+        if not chunk:
+            done = True
+            return False
+        buffer = buffer[position:] + chunk
+        position = 0
+        return True
+    
+    def next_value():
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position < len(buffer) or not more():
+                break
+        if position >= len(buffer) or buffer[position] == "]":
+            return None
+        while True:
+            try:
+                value, position = decoder.raw_decode(buffer, position)
+                return value
+            except json.JSONDecodeError:
+                if not more():
+                    raise ValueError("GeoJSON input ends inside an object")
+    
+    def next_character(start: int) -> int:
+        # index of the first character from start on that is not white space
+        while True:
+            while start < len(buffer) and buffer[start] in " \t\r\n":
+                start += 1
+            if start < len(buffer) or not more():
+                return start
+    
+    def features_array() -> int:
+        # Just inside the "features" array when the first value is an object
+        # with that key, -1 otherwise. Strings are skipped whole and the
+        # brackets counted, so "features" inside properties or nested objects
+        # is not taken for it. Reads on until the first value ends.
+        scan = next_character(0)
+        if scan >= len(buffer) or buffer[scan] != "{":
+            return -1
+        depth = 0
+        while True:
+            found = JSON_STRUCTURE.search(buffer, scan)
+            if found is None:
+                scan = len(buffer)
+                if not more():
+                    return -1
+                continue
+            scan = found.start()
+            if buffer[scan] == '"':
+                end = JSON_STRING_END.match(buffer, scan + 1)
+                while end is None:
+                    # the rest of the string is not read yet
+                    if not more():
+                        return -1
+                    end = JSON_STRING_END.match(buffer, scan + 1)
+                key = buffer[scan + 1:end.end() - 1]
+                scan = end.end()
+                if depth == 1 and key == "features":
+                    colon = next_character(scan)
+                    if colon < len(buffer) and buffer[colon] == ":":
+                        value = next_character(colon + 1)
+                        if value < len(buffer) and buffer[value] == "[":
+                            return value + 1
+                continue
+            depth += 1 if buffer[scan] in "[{" else -1
+            scan += 1
+            if depth == 0:
+                return -1
+    
+    more()
+    start = features_array()
+    if start != -1:
+        position = start
+    
+    while True:
+        value = next_value()
+        if value is None:
+            return
+        yield from geojson_outlines(value)
+
+def csv_polygons(file: TextIO) -> Iterator[Polygon]:
+    # rows of obstacle id, x, y, the corners of one obstacle are consecutive
+    # rows with the same id, a header row is skipped
+    current_id = None
+    ring: List[Point] = []
+    for row in csv.reader(file):
+        if len(row) < 3:
+            continue
+        try:
+            point = (parse_number(row[1].strip()), parse_number(row[2].strip()))
+        except ValueError:
+            if current_id is None and not ring:
+                continue
+            raise
+        if row[0] != current_id:
+            if ring:
+                yield open_ring(ring)
+            current_id = row[0]
+            ring = []
+        ring.append(point)
+    if ring:
+        yield open_ring(ring)
+
+def vertex_file_polygons(file: BinaryIO) -> Iterator[Polygon]:
+    header = file.read(VERTEX_HEADER.size)
+    if len(header) < VERTEX_HEADER.size:
+        raise ValueError("Not an obstacle vertex file")
+    magic, version = VERTEX_HEADER.unpack(header)
+    if magic != VERTEX_FILE_MAGIC:
+        raise ValueError("Not an obstacle vertex file")
+    if version != VERTEX_FILE_VERSION:
+        raise ValueError(f"Unsupported vertex file version {version}, expected {VERTEX_FILE_VERSION}")
+    
+    while True:
+        count = file.read(COUNT.size)
+        if not count:
+            return
+        if len(count) < COUNT.size:
+            raise ValueError("Obstacle vertex file is damaged, it ends inside a corner count")
+        size = COUNT.unpack(count)[0]
+        coordinates = array('d')
+        try:
+            coordinates.fromfile(file, 2 * size)
+        except EOFError:
+            raise ValueError("Obstacle vertex file is damaged, it ends inside an obstacle")
+        yield list(zip(coordinates[0::2], coordinates[1::2]))
+
+def save_vertex_file(path: str, obstacles: List[Polygon]):
+    with open(path, "wb") as file:
+        file.write(VERTEX_HEADER.pack(VERTEX_FILE_MAGIC, VERTEX_FILE_VERSION))
+        for obstacle in obstacles:
+            file.write(COUNT.pack(len(obstacle)))
+            array('d', [value for point in obstacle for value in point]).tofile(file)
+
+READERS = {
+    "wkt": wkt_polygons,
+    "geojson": geojson_polygons,
+    "csv": csv_polygons,
+    "vertex": vertex_file_polygons,
+}
+
+EXTENSIONS = {".wkt": "wkt", ".geojson": "geojson", ".json": "geojson", ".csv": "csv", ".bin": "vertex"}
+
+def iter_obstacles(path: str, file_format: Optional[str] = None) -> Iterator[Polygon]:
+    # the format follows from the extension unless it is given
+    if file_format is None:
+        file_format = EXTENSIONS.get(os.path.splitext(path)[1].lower())
+        if file_format is None:
+            raise ValueError(f"Cannot tell the format of '{path}', pass one of {tuple(READERS)}")
+    if file_format not in READERS:
+        raise ValueError(f"Unknown obstacle file format '{file_format}', expected one of {tuple(READERS)}")
+    
+    mode = "rb" if file_format == "vertex" else "r"
+    with open(path, mode, buffering=CHUNK_SIZE, newline=None if mode == "rb" else "") as file:
+        for obstacle in READERS[file_format](file):
+            if len(obstacle) >= 3:
+                yield obstacle
+
+def load_obstacles(path: str, file_format: Optional[str] = None) -> List[Polygon]:
+    return list(iter_obstacles(path, file_format))
@@ -0,0 +1,175 @@
+import math
+import os
+from collections import ChainMap
+from multiprocessing import Pool
+from typing import Collection, List, Mapping, Optional, Tuple
+from dataTypes import Point, Polygon, VisibilityGraph, PathResult
+from main import ShortestPathFinder, DEFAULT_BUILDER
+from graphSearch import SEARCH_STRATEGIES, shortest_path_tree, rebuild_path
+from visibilitySweep import visible_from, split_segments
+from freeSpace import FreeSpaceIndex
+
+batch_state = None
+
+class ObstacleMap:
+    def __init__(self, obstacles: List[Polygon], builder: str = DEFAULT_BUILDER, reduced: bool = False,
+                 graph: Optional[Mapping] = None, skipped: Collection[Point] = (),
+                 free_space: Optional[FreeSpaceIndex] = None, holes: Collection[int] = ()):
+        self.obstacles = obstacles
+        self.builder = builder
+        self.nodes_expanded = 0
+        
+        # The finder is only here for the obstacle corners. Its start and end
+        # slots hold a placeholder and are left out of the shared graph, the
+        # corners keep the same indices (2, 3, ...) they get in a normal query.
+        anchor = next((point for obstacle in obstacles for point in obstacle), (0.0, 0.0))
+        self.finder = ShortestPathFinder(obstacles, anchor, anchor, builder, reduced=reduced, holes=holes)
+        self.corners = self.finder.all_points[2:]
+        # corners that only shape an outline (see unitDisc.grow_obstacles) get no edges
+        skipped = set(skipped)
+        self.finder.removed_points = {i for i in range(2, len(self.finder.all_points))
+                                      if self.finder.all_points[i] in skipped}
+        
+        # a graph loaded from a file (graphFile.py) is used as it is
+        if graph is not None:
+            self.graph = graph
+        else:
+            full_graph = self.finder.make_visibility_graph()
+            self.graph: VisibilityGraph = {}
+            for i in range(2, len(self.finder.all_points)):
+                self.graph[i] = {j: distance for j, distance in full_graph[i].items() if j >= 2}
+        
+        self.pieces = None
+        if builder == "sweep":
+            self.pieces = split_segments(self.finder.edge_grid.segments)
+        
+        self.edge_arrays = None
+        if builder == "numpy":
+            from segmentKernel import ObstacleEdgeArrays
+            self.edge_arrays = ObstacleEdgeArrays(obstacles)
+        
+        # queries between pieces of free space that cannot meet skip the
+        # search, a robot's map brings the index of its grown obstacles
+        self.free_space = free_space if free_space is not None else FreeSpaceIndex(obstacles)
+    
+    def visible_points(self, index: int, all_points: List[Point], targets: List[int]) -> List[int]:
+        point = all_points[index]
+        
+        if self.builder == "sweep":
+            visible = visible_from(index, all_points, self.finder.edge_grid.segments, self.finder.do_lines_cross,
+                                   self.pieces)
+            return [j for j in targets
+                    if j in visible or (all_points[j] == point and self.finder.is_segment_clear(point, point))]
+        
+        if self.builder == "numpy":
+            import numpy as np
+            coordinates = np.array([all_points[j] for j in targets], dtype=float).reshape(-1, 2)
+            blocked = self.edge_arrays.blocked_row(point, coordinates)
+            return [j for position, j in enumerate(targets) if not blocked[position]]
+        
+        return [j for j in targets if self.finder.is_segment_clear(point, all_points[j])]
+    
+    def attach_points(self, points: List[Point]) -> Tuple[VisibilityGraph, List[Point], List[int]]:
+        # Only the query points are checked against the obstacles here. The
+        # first two take the start and end slots 0 and 1, any others go after
+        # the corners. Corners they can see get a ChainMap in front of their
+        # shared row, so the prebuilt graph itself is never written to.
+        if len(points) < 2:
+            points = [points[0], points[0]]
+        all_points = list(points[:2]) + self.corners + list(points[2:])
+        indices = [k if k < 2 else len(self.corners) + k for k in range(len(points))]
+        corner_indices = [i for i in range(2, 2 + len(self.corners)) if i not in self.finder.removed_points]
+        
+        graph = dict(self.graph)
+        for index in indices:
+            graph[index] = {}
+        
+        extra = {}
+        for position, index in enumerate(indices):
+            p1 = all_points[index]
+            targets = sorted(corner_indices + indices[position + 1:])
+            for j in self.visible_points(index, all_points, targets):
+                if self.finder.tangent_filter is not None and not self.finder.tangent_filter.keeps_edge(index, j, all_points):
+                    continue
+                p2 = all_points[j]
+                distance = math.sqrt((p2[0] - p1[0])**2 + (p2[1] - p1[1])**2)
+                
+                graph[index][j] = distance
+                if j in self.graph:
+                    extra.setdefault(j, {})[index] = distance
+                else:
+                    graph[j][index] = distance
+        
+        for j, edges in extra.items():
+            graph[j] = ChainMap(edges, self.graph[j])
+        
+        return graph, all_points, indices
+    
+    def attach(self, start: Point, goal: Point) -> Tuple[VisibilityGraph, List[Point]]:
+        graph, all_points, _ = self.attach_points([start, goal])
+        return graph, all_points
+    
+    def find_shortest_path(self, start: Point, goal: Point, search: str = "dijkstra") -> PathResult:
+        if search not in SEARCH_STRATEGIES:
+            raise ValueError(f"Unknown search '{search}', expected one of {tuple(SEARCH_STRATEGIES)}")
+        
+        if not self.free_space.connects(start, goal):
+            self.nodes_expanded = 0
+            return [], float('inf')
+        
+        graph, all_points = self.attach(start, goal)
+        path, distance, self.nodes_expanded = SEARCH_STRATEGIES[search](graph, all_points, 0, 1)
+        return path, distance
+    
+    def batch_paths(self, sources: List[Point], goals: List[Point], workers: int = 1) -> List[List[PathResult]]:
+        # Attaches every source and goal to one shared graph and runs a single
+        # Dijkstra per distinct source, result[s][g] is the path from
+        # sources[s] to goals[g]. A distance matrix between waypoints is
+        # batch_paths(waypoints, waypoints).
+        if not sources or not goals:
+            return [[] for _ in sources]
+        
+        points = list(dict.fromkeys(list(sources) + list(goals)))
+        graph, all_points, indices = self.attach_points(points)
+        index_of = dict(zip(points, indices))
+        goal_indices = [index_of[goal] for goal in goals]
+        distinct_sources = list(dict.fromkeys(sources))
+        jobs = [(index_of[source], goal_indices) for source in distinct_sources]
+        
+        if workers > 1 and len(jobs) > 1:
+            with Pool(min(workers, len(jobs)), initializer=start_batch_worker,
+                      initargs=(graph, all_points, set(indices))) as pool:
+                results = pool.map(batch_worker, jobs)
+        else:
+            results = [source_paths(graph, all_points, source, targets, set(indices)) for source, targets in jobs]
+        
+        self.nodes_expanded = sum(expanded for _, expanded in results)
+        per_source = {source: paths for source, (paths, _) in zip(distinct_sources, results)}
+        return [[path if self.free_space.connects(source, goal) else ([], float('inf'))
+                 for goal, path in zip(goals, per_source[source])] for source in sources]
+
+def source_paths(graph: VisibilityGraph, all_points: List[Point], source: int, targets: List[int],
+                 terminals: Collection[int]) -> Tuple[List[PathResult], int]:
+    distances, came_from, expanded = shortest_path_tree(graph, source, targets, terminals)
+    paths = []
+    for target in targets:
+        if target not in distances:
+            paths.append(([], float('inf')))
+        else:
+            paths.append((rebuild_path(came_from, all_points, target), distances[target]))
+    return paths, expanded
+
+def start_batch_worker(graph: VisibilityGraph, all_points: List[Point], terminals: Collection[int]):
+    # the attached graph reaches each worker once, jobs only carry indices
+    global batch_state
+    batch_state = (graph, all_points, terminals)
+
+def batch_worker(job: Tuple[int, List[int]]) -> Tuple[List[PathResult], int]:
+    graph, all_points, terminals = batch_state
+    source, targets = job
+    return source_paths(graph, all_points, source, targets, terminals)
+
+def batch_shortest_paths(obstacles: List[Polygon], sources: List[Point], goals: List[Point], builder: str = DEFAULT_BUILDER,
+                         workers: Optional[int] = 1) -> List[List[PathResult]]:
+    obstacle_map = ObstacleMap(obstacles, builder)
+    return obstacle_map.batch_paths(sources, goals, workers or os.cpu_count())
@@ -0,0 +1,87 @@
+import math
+import os
+from array import array
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+from typing import List, Optional, Set, Tuple
+from dataTypes import Point, Edge, Polygon, Segment, VisibilityGraph
+from edgeGrid import EdgeGrid
+from main import ShortestPathFinder
+from visibilitySweep import obstacle_segments
+
+ROWS_PER_TASK = 16
+
+worker_finder = None
+
+def pack_geometry(all_points: List[Point], segments: List[Segment], obstacle_edges: Set[Edge]) -> array:
+    values = array('d', [len(all_points), len(segments), len(obstacle_edges)])
+    for point in all_points:
+        values.extend(point)
+    for a, b in segments:
+        values.extend(a)
+        values.extend(b)
+    for i, j in obstacle_edges:
+        values.extend((i, j))
+    return values
+
+def start_worker(memory_name: str):
+    # Every worker reads the geometry once from the shared block when it
+    # starts, tasks then only carry row numbers.
+    global worker_finder
+    memory = SharedMemory(name=memory_name)
+    values = memory.buf.cast('d')
+    point_count, segment_count, edge_count = int(values[0]), int(values[1]), int(values[2])
+    position = 3
+    all_points = [(values[position + 2 * k], values[position + 2 * k + 1]) for k in range(point_count)]
+    position += 2 * point_count
+    segments = [((values[position + 4 * k], values[position + 4 * k + 1]),
+                 (values[position + 4 * k + 2], values[position + 4 * k + 3])) for k in range(segment_count)]
+    position += 4 * segment_count
+    obstacle_edges = {(int(values[position + 2 * k]), int(values[position + 2 * k + 1])) for k in range(edge_count)}
+    values.release()
+    memory.close()
+    
+    # an empty finder carries the visibility test, it gets the parent's
+    # points, obstacle edges and segments instead of its own
+    worker_finder = ShortestPathFinder([], all_points[0], all_points[1])
+    worker_finder.all_points = all_points
+    worker_finder.edges_of_obstacles = obstacle_edges
+    worker_finder.edge_grid = EdgeGrid(segments)
+
+def visible_rows(rows: List[int]) -> List[Tuple[int, List[int]]]:
+    point_count = len(worker_finder.all_points)
+    return [(i, [j for j in range(i + 1, point_count) if worker_finder.can_points_see_each_other(i, j)])
+            for i in rows]
+
+def parallel_visibility_graph(all_points: List[Point], obstacles: List[Polygon], obstacle_edges: Set[Edge],
+                              workers: Optional[int] = None) -> VisibilityGraph:
+    graph: VisibilityGraph = {i: {} for i in range(len(all_points))}
+    if len(all_points) < 2:
+        return graph
+    
+    values = pack_geometry(all_points, obstacle_segments(obstacles), obstacle_edges)
+    memory = SharedMemory(create=True, size=max(1, len(values) * values.itemsize))
+    try:
+        memory.buf[:len(values) * values.itemsize] = values.tobytes()
+        
+        tasks = [list(range(first, min(first + ROWS_PER_TASK, len(all_points))))
+                 for first in range(0, len(all_points), ROWS_PER_TASK)]
+        visible = {}
+        with Pool(workers or os.cpu_count(), initializer=start_worker, initargs=(memory.name,)) as pool:
+            for rows in pool.imap_unordered(visible_rows, tasks):
+                for i, row in rows:
+                    visible[i] = row
+    finally:
+        memory.close()
+        memory.unlink()
+    
+    for i in range(len(all_points)):
+        p1 = all_points[i]
+        for j in visible[i]:
+            p2 = all_points[j]
+            distance = math.sqrt((p2[0] - p1[0])**2 + (p2[1] - p1[1])**2)
+            
+            graph[i][j] = distance
+            graph[j][i] = distance
+    
+    return graph
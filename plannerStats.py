@@ -0,0 +1,68 @@
+import heapq
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator
+
+class PlannerStats:
+    # Counters for one planner. Nothing in the planners looks at this unless
+    # it was asked for: the counted calls are swapped in on the instance and
+    # the searches get counting heap functions instead of the heapq ones.
+    def __init__(self):
+        self.phase_seconds: Dict[str, float] = {}
+        self.visibility_checks = 0
+        self.intersection_tests = 0
+        self.shortcut_hits = 0
+        self.blocked_early = 0
+        self.edges_kept = 0
+        self.nodes_expanded = 0
+        self.heap_pushes = 0
+        self.heap_pops = 0
+    
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phase_seconds[name] = self.phase_seconds.get(name, 0.0) + time.perf_counter() - started
+    
+    def counted(self, function: Callable, counter: str) -> Callable:
+        def wrapper(*args):
+            setattr(self, counter, getattr(self, counter) + 1)
+            return function(*args)
+        return wrapper
+    
+    def counted_visibility(self, can_see: Callable[[int, int], bool], obstacle_edges) -> Callable[[int, int], bool]:
+        # obstacle sides are visible without any test, every blocked pair
+        # stops at the first crossing it finds
+        def wrapper(index1: int, index2: int) -> bool:
+            self.visibility_checks += 1
+            if (min(index1, index2), max(index1, index2)) in obstacle_edges:
+                self.shortcut_hits += 1
+                return True
+            visible = can_see(index1, index2)
+            if not visible:
+                self.blocked_early += 1
+            return visible
+        return wrapper
+    
+    def push(self, heap: list, item):
+        self.heap_pushes += 1
+        heapq.heappush(heap, item)
+    
+    def pop(self, heap: list):
+        self.heap_pops += 1
+        return heapq.heappop(heap)
+    
+    def as_dict(self) -> Dict:
+        return {
+            "phase_seconds": dict(self.phase_seconds),
+            "visibility_checks": self.visibility_checks,
+            "intersection_tests": self.intersection_tests,
+            "shortcut_hits": self.shortcut_hits,
+            "blocked_early": self.blocked_early,
+            "edges_kept": self.edges_kept,
+            "nodes_expanded": self.nodes_expanded,
+            "heap_pushes": self.heap_pushes,
+            "heap_pops": self.heap_pops,
+        }
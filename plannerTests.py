@@ -0,0 +1,65 @@
+import math
+import random
+from main import ShortestPathFinder, compute_shortest_path
+from shortestPathMap import build_shortest_path_map
+
+# Checks for the planners that the plots in test.sh do not show, run with
+# python3 plannerTests.py (pytest finds them too).
+
+def edge_set(finder: ShortestPathFinder) -> set:
+    return {frozenset((finder.all_points[i], finder.all_points[j])) for i, row in finder.graph.items() for j in row}
+
+def test_add_and_remove_obstacle():
+    # the graph after changing the obstacles is the one a new finder builds
+    obstacles = [[(2, 1), (1, 3), (3, 3)], [(4, 0), (4, 2), (6, 1)], [(5, 4), (7, 6), (7, 2)]]
+    added = [(8, 3), (10, 4), (9, 1)]
+    start, goal = (0, 0), (12, 5)
+    for reduced in (False, True):
+        finder = ShortestPathFinder(obstacles, start, goal, reduced=reduced)
+        finder.find_shortest_path()
+        obstacle_id = finder.add_obstacle(added)
+        _, distance = finder.find_shortest_path()
+        fresh = ShortestPathFinder(obstacles + [added], start, goal, reduced=reduced)
+        _, fresh_distance = fresh.find_shortest_path()
+        assert edge_set(finder) == edge_set(fresh)
+        assert math.isclose(distance, fresh_distance)
+        
+        finder.remove_obstacle(obstacle_id)
+        _, distance = finder.find_shortest_path()
+        fresh = ShortestPathFinder(obstacles, start, goal, reduced=reduced)
+        _, fresh_distance = fresh.find_shortest_path()
+        assert edge_set(finder) == edge_set(fresh)
+        assert math.isclose(distance, fresh_distance)
+
+def test_add_obstacle_sharing_a_corner():
+    # a corner that is already a graph node is turned down, the map is left as it was
+    obstacles = [[(2, 1), (1, 3), (3, 3)]]
+    finder = ShortestPathFinder(obstacles, (0, 0), (5, 5))
+    _, distance = finder.find_shortest_path()
+    for shared in ([(3, 3), (4, 3), (4, 4)], [(5, 5), (6, 5), (6, 6)]):
+        try:
+            finder.add_obstacle(shared)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"{shared} shares a corner and was added")
+    assert len(finder.all_points) == 5 and len(finder.obstacles) == 1
+    assert finder.find_shortest_path()[1] == distance
+
+def test_shortest_path_map_lookup():
+    # goals found through the map's cells are as short as a full search
+    obstacles = [[(2, 1), (1, 3), (3, 3)], [(4, 0), (4, 2), (6, 1)], [(5, 4), (7, 6), (7, 2)], [(8, 3), (10, 4), (9, 1)]]
+    source = (0, 0)
+    shortest_path_map = build_shortest_path_map(obstacles, source)
+    generator = random.Random(0)
+    for _ in range(200):
+        goal = (generator.uniform(-2, 12), generator.uniform(-2, 8))
+        _, distance = shortest_path_map.find_shortest_path(goal)
+        _, expected = compute_shortest_path(obstacles, source, goal)
+        assert distance == expected or math.isclose(distance, expected), goal
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"{name} passed")
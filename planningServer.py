@@ -0,0 +1,398 @@
+import argparse
+import asyncio
+import json
+import os
+import signal
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Set, Tuple
+from dataTypes import Point, Polygon, PathResult
+from obstacleMap import ObstacleMap
+from configSpaceCache import ConfigurationSpaceCache
+from graphFile import geometry_hash
+from main import DEFAULT_BUILDER
+
+# Local planning service. Clients send one JSON object per line and get one
+# back per request, tagged with the request's "id" (answers come back in the
+# order they finish, not the order they were asked):
+#
+#   {"id": 1, "op": "load_map", "map": "depot", "obstacles": [[[2, 1], [1, 3], [3, 3]]]}
+#   {"id": 2, "op": "compute_shortest_path", "map": "depot", "start": [0, 0], "goal": [5, 5]}
+#   {"id": 3, "op": "find_robot_path", "obstacles": [...], "start": [0, 0], "goal": [5, 5], "radius": 0.5}
+#   -> {"id": 2, "path": [[0, 0], [3, 3], [5, 5]], "distance": 7.07}, "distance" is null when there is no path
+#   -> {"id": 9, "error": "..."} for a bad request
+#
+# Queries name a loaded map or carry their obstacles, and take "builder" and
+# "search" as the functions do. Planning runs in a process pool, each worker
+# keeps the maps it prepared (visibility graphs, grown obstacles per radius),
+# so a map is only set up again when a worker sees it for the first time.
+# Jobs on a loaded map only carry its key, a worker that does not have the
+# map's obstacles yet asks for them and gets them once. drop_map has every
+# worker that holds the map forget it with the next job it runs.
+# Identical queries that arrive while one is running wait for its answer.
+# At most max_pending requests are open at a time, after that no connection
+# is read until one finishes, which pushes back on the clients' sockets. A
+# worker that dies (killed, out of memory) breaks the whole pool, it is then
+# replaced and the jobs it had are run once more on the new one.
+
+DEFAULT_PORT = 8765
+LINE_LIMIT = 64 * 1024 * 1024
+OPERATIONS = ("load_map", "drop_map", "compute_shortest_path", "find_robot_path", "stats")
+
+worker_maps: OrderedDict = OrderedDict()
+worker_geometry: OrderedDict = OrderedDict()
+worker_spaces: Optional[ConfigurationSpaceCache] = None
+WORKER_MAPS = 16
+
+class MissingGeometry(Exception):
+    # the worker was sent a map's key without its obstacles and has not seen them
+    pass
+
+def as_polygons(obstacles) -> List[Polygon]:
+    return [[(point[0], point[1]) for point in obstacle] for obstacle in obstacles]
+
+def as_point(value, name: str) -> Point:
+    if not isinstance(value, (list, tuple)) or len(value) != 2:
+        raise ValueError(f"'{name}' must be a point [x, y], got {value!r}")
+    return value[0], value[1]
+
+def forget_maps(keys: Tuple[bytes, ...]):
+    for key in keys:
+        worker_geometry.pop(key, None)
+        for entry in [entry for entry in worker_maps if entry[0] == key]:
+            del worker_maps[entry]
+        if worker_spaces is not None:
+            worker_spaces.forget(key)
+
+def plan(operation: str, key: bytes, obstacles: Optional[List[Polygon]], start: Point, goal: Point, radius: float,
+         builder: str, search: str, dropped: Tuple[bytes, ...] = ()) -> Tuple[int, PathResult]:
+    # Runs in a pool worker, prepared maps stay in the worker between jobs.
+    # obstacles is None when the worker is expected to have them from an
+    # earlier job. The worker's pid comes back with the path, the server
+    # uses it to follow which workers still have to forget dropped maps.
+    forget_maps(dropped)
+    if obstacles is None:
+        if key not in worker_geometry:
+            raise MissingGeometry(key.hex())
+        worker_geometry.move_to_end(key)
+        obstacles = worker_geometry[key]
+    else:
+        worker_geometry[key] = obstacles
+        worker_geometry.move_to_end(key)
+        if len(worker_geometry) > WORKER_MAPS:
+            worker_geometry.popitem(last=False)
+    return os.getpid(), plan_on(operation, key, obstacles, start, goal, radius, builder, search)
+
+def plan_on(operation: str, key: bytes, obstacles: List[Polygon], start: Point, goal: Point, radius: float,
+            builder: str, search: str) -> PathResult:
+    global worker_spaces
+    if operation == "find_robot_path":
+        if worker_spaces is None:
+            worker_spaces = ConfigurationSpaceCache()
+        return worker_spaces.find_robot_path(obstacles, start, goal, radius, builder, search)
+    
+    if (key, builder) in worker_maps:
+        worker_maps.move_to_end((key, builder))
+    else:
+        worker_maps[(key, builder)] = ObstacleMap(obstacles, builder)
+        if len(worker_maps) > WORKER_MAPS:
+            worker_maps.popitem(last=False)
+    return worker_maps[(key, builder)].find_shortest_path(start, goal, search)
+
+class PlanningServer:
+    def __init__(self, workers: Optional[int] = None, max_pending: int = 64):
+        self.workers = workers or os.cpu_count()
+        self.executor = ProcessPoolExecutor(self.workers)
+        self.slots = asyncio.Semaphore(max_pending)
+        self.maps: Dict[str, Tuple[bytes, List[Polygon]]] = {}
+        # pids of the workers that have a loaded map's obstacles, and of those
+        # that still have a dropped one
+        self.holders: Dict[bytes, Set[int]] = {}
+        self.dropped: Dict[bytes, Set[int]] = {}
+        self.in_flight: Dict[tuple, asyncio.Future] = {}
+        self.requests = 0
+        self.coalesced = 0
+        self.planned = 0
+        self.restarts = 0
+        self.shipped = 0
+    
+    async def start(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT, path: Optional[str] = None) -> asyncio.AbstractServer:
+        # a Unix socket when path is given, TCP otherwise
+        if path is not None:
+            return await asyncio.start_unix_server(self.serve_connection, path, limit=LINE_LIMIT)
+        return await asyncio.start_server(self.serve_connection, host, port, limit=LINE_LIMIT)
+    
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+    
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                await self.slots.acquire()
+                try:
+                    line = await reader.readline()
+                except (ValueError, ConnectionError):
+                    # a line over LINE_LIMIT or a dropped client
+                    self.slots.release()
+                    break
+                if not line:
+                    self.slots.release()
+                    break
+                if not line.strip():
+                    self.slots.release()
+                    continue
+                task = asyncio.ensure_future(self.answer(line, writer, lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except asyncio.CancelledError:
+            # the server is shutting down, open requests are dropped
+            for task in tasks:
+                task.cancel()
+        finally:
+            writer.close()
+    
+    async def answer(self, line: bytes, writer: asyncio.StreamWriter, lock: asyncio.Lock):
+        try:
+            self.requests += 1
+            request_id = None
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("A request must be a JSON object")
+                request_id = request.get("id")
+                response = await self.handle(request)
+            except Exception as error:
+                response = {"error": f"{type(error).__name__}: {error}"}
+            response = {"id": request_id, **response}
+            
+            if writer.is_closing():
+                return
+            async with lock:
+                writer.write((json.dumps(response) + "\n").encode())
+                try:
+                    await writer.drain()
+                except ConnectionError:
+                    pass
+        finally:
+            self.slots.release()
+    
+    async def handle(self, request: dict) -> dict:
+        operation = request.get("op")
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown op '{operation}', expected one of {OPERATIONS}")
+        
+        if operation == "stats":
+            return {"requests": self.requests, "coalesced": self.coalesced, "planned": self.planned,
+                    "maps": len(self.maps), "in_flight": len(self.in_flight), "restarts": self.restarts,
+                    "shipped": self.shipped, "dropping": len(self.dropped)}
+        
+        if operation == "drop_map":
+            entry = self.maps.pop(request.get("map"), None)
+            if entry is not None and not self.is_loaded(entry[0]):
+                self.dropped.setdefault(entry[0], set()).update(self.holders.pop(entry[0], ()))
+            return {"map": request.get("map"), "dropped": entry is not None}
+        
+        if operation == "load_map":
+            name = request.get("map")
+            if not isinstance(name, str):
+                raise ValueError("load_map needs a 'map' name")
+            obstacles = as_polygons(request.get("obstacles", []))
+            key = geometry_hash(obstacles)
+            self.maps[name] = (key, obstacles)
+            # workers that were told to forget the same obstacles may keep them
+            self.holders.setdefault(key, set()).update(self.dropped.pop(key, ()))
+            return {"map": name, "obstacles": len(obstacles)}
+        
+        if "map" in request:
+            if request["map"] not in self.maps:
+                raise ValueError(f"Unknown map '{request['map']}', load it first")
+            key, obstacles = self.maps[request["map"]]
+            loaded = True
+        else:
+            obstacles = as_polygons(request.get("obstacles", []))
+            key = geometry_hash(obstacles)
+            loaded = False
+        start = as_point(request.get("start"), "start")
+        goal = as_point(request.get("goal"), "goal")
+        radius = float(request.get("radius", 1.0)) if operation == "find_robot_path" else 0.0
+        builder = request.get("builder", DEFAULT_BUILDER)
+        search = request.get("search", "dijkstra")
+        
+        path, distance = await self.plan(operation, key, obstacles, start, goal, radius, builder, search, loaded)
+        return {"path": [list(point) for point in path], "distance": None if distance == float('inf') else distance}
+    
+    async def plan(self, operation: str, key: bytes, obstacles: List[Polygon], start: Point, goal: Point,
+                   radius: float, builder: str, search: str, loaded: bool = False) -> PathResult:
+        # the same query asked again while it runs shares the running job
+        job = (operation, key, start, goal, radius, builder, search)
+        future = self.in_flight.get(job)
+        if future is None:
+            self.planned += 1
+            future = asyncio.ensure_future(self.run(operation, key, obstacles, start, goal, radius, builder, search,
+                                                    loaded))
+            self.in_flight[job] = future
+            future.add_done_callback(lambda done: self.in_flight.pop(job) if self.in_flight.get(job) is done else None)
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(future)
+    
+    async def run(self, operation: str, key: bytes, obstacles: List[Polygon], start: Point, goal: Point,
+                  radius: float, builder: str, search: str, loaded: bool) -> PathResult:
+        # A loaded map is sent as its key, and once more with its obstacles to
+        # a worker that does not have them. A second broken pool fails the
+        # job, it is likely the one killing workers.
+        sent = None if loaded else obstacles
+        restarted = False
+        while True:
+            executor = self.executor
+            dropped = tuple(self.dropped)
+            try:
+                pid, result = await asyncio.get_running_loop().run_in_executor(
+                    executor, plan, operation, key, sent, start, goal, radius, builder, search, dropped)
+            except MissingGeometry:
+                self.shipped += 1
+                sent = obstacles
+                continue
+            except BrokenProcessPool:
+                if restarted:
+                    raise
+                restarted = True
+                self.replace_executor(executor)
+                continue
+            if executor is self.executor:
+                self.worker_ran(pid, key if loaded else None, dropped)
+            return result
+    
+    def is_loaded(self, key: bytes) -> bool:
+        return any(loaded_key == key for loaded_key, _ in self.maps.values())
+    
+    def worker_ran(self, pid: int, key: Optional[bytes], dropped: Tuple[bytes, ...]):
+        # the worker forgot the dropped maps it was sent and now has the job's map
+        for dropped_key in dropped:
+            holders = self.dropped.get(dropped_key)
+            if holders is not None:
+                holders.discard(pid)
+                if not holders:
+                    del self.dropped[dropped_key]
+        if key is not None:
+            if self.is_loaded(key):
+                self.holders.setdefault(key, set()).add(pid)
+            else:
+                # the map was dropped while the job ran
+                self.dropped.setdefault(key, set()).add(pid)
+    
+    def replace_executor(self, broken: ProcessPoolExecutor):
+        # every job of a broken pool fails, only the first one to see it
+        # starts the new pool
+        if self.executor is broken:
+            self.executor = ProcessPoolExecutor(self.workers)
+            self.restarts += 1
+            self.holders.clear()
+            self.dropped.clear()
+            broken.shutdown(wait=False, cancel_futures=True)
+
+class PlanningClient:
+    # asyncio client, requests can be sent concurrently over one connection
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.next_id = 0
+        self.waiting: Dict[int, asyncio.Future] = {}
+        self.listener = asyncio.ensure_future(self.listen())
+    
+    @classmethod
+    async def connect(cls, host: str = "127.0.0.1", port: int = DEFAULT_PORT, path: Optional[str] = None) -> "PlanningClient":
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path, limit=LINE_LIMIT)
+        else:
+            reader, writer = await asyncio.open_connection(host, port, limit=LINE_LIMIT)
+        return cls(reader, writer)
+    
+    async def listen(self):
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self.waiting.pop(response.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        finally:
+            for future in self.waiting.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("The planning server closed the connection"))
+            self.waiting.clear()
+    
+    async def request(self, operation: str, **fields) -> dict:
+        self.next_id += 1
+        request_id = self.next_id
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[request_id] = future
+        self.writer.write((json.dumps({"id": request_id, "op": operation, **fields}) + "\n").encode())
+        await self.writer.drain()
+        response = await future
+        if "error" in response:
+            raise ValueError(response["error"])
+        return response
+    
+    async def load_map(self, name: str, obstacles: List[Polygon]) -> dict:
+        return await self.request("load_map", map=name, obstacles=obstacles)
+    
+    async def query(self, operation: str, start: Point, goal: Point, map_name: Optional[str],
+                    obstacles: Optional[List[Polygon]], **options) -> PathResult:
+        if map_name is not None:
+            options["map"] = map_name
+        else:
+            options["obstacles"] = obstacles or []
+        response = await self.request(operation, start=start, goal=goal, **options)
+        distance = response["distance"]
+        return [tuple(point) for point in response["path"]], float('inf') if distance is None else distance
+    
+    async def compute_shortest_path(self, start: Point, goal: Point, map_name: Optional[str] = None,
+                                    obstacles: Optional[List[Polygon]] = None, **options) -> PathResult:
+        return await self.query("compute_shortest_path", start, goal, map_name, obstacles, **options)
+    
+    async def find_robot_path(self, start: Point, goal: Point, map_name: Optional[str] = None,
+                              obstacles: Optional[List[Polygon]] = None, radius: float = 1.0, **options) -> PathResult:
+        return await self.query("find_robot_path", start, goal, map_name, obstacles, radius=radius, **options)
+    
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+        await self.listener
+
+async def serve(host: str, port: int, path: Optional[str], workers: Optional[int], max_pending: int):
+    server = PlanningServer(workers, max_pending)
+    try:
+        listener = await server.start(host, port, path)
+        async with listener:
+            # SIGTERM stops the server the way Ctrl-C does, so the pool workers
+            # are shut down instead of left behind
+            serving = asyncio.ensure_future(listener.serve_forever())
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, serving.cancel)
+            try:
+                await serving
+            except asyncio.CancelledError:
+                pass
+    finally:
+        server.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve compute_shortest_path and find_robot_path as JSON lines")
+    parser.add_argument("--host", default="127.0.0.1", help="TCP address to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="TCP port to listen on")
+    parser.add_argument("--unix", help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, help="planning processes (default one per CPU)")
+    parser.add_argument("--max-pending", type=int, default=64, help="open requests before connections stop being read")
+    args = parser.parse_args()
+    
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.workers, args.max_pending))
+    except KeyboardInterrupt:
+        pass
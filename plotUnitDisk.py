@@ -3,18 +3,31 @@ import numpy as np
 from matplotlib.patches import Polygon as PlotPolygon, Circle
 from matplotlib.collections import PatchCollection
 import os
-from typing import List
+from typing import List, Optional
 from dataTypes import Point, Polygon
 from main import ShortestPathFinder
-from unitDisc import RobotPathFinder, make_bigger, find_robot_path
+from unitDisc import RobotPathFinder, grow_obstacles
+from renderPipeline import headless_axes, add_outlines, render_scenarios
 
 def visualize_unit_disk_path(obstacles: List[Polygon], start: Point, goal: Point, 
                             title: str = "Unit Disk Robot Path Planning", 
-                            save_path: str = None, show_plot: bool = True):
+                            save_path: str = None, show_plot: bool = True,
+                            path: List[Point] = None, distance: float = None, radius: float = 1.0, dpi: int = 300,
+                            grown_obstacles: Optional[List[Polygon]] = None):
+    # a path already planned is drawn as it is, with the grown obstacles it
+    # was planned around (finder.bigger_obstacles), without show_plot the
+    # figure is drawn headless
+    if path is None:
+        robot_finder = RobotPathFinder(obstacles, start, goal, radius=radius)
+        path, distance = robot_finder.find_path()
+        grown_obstacles = robot_finder.bigger_obstacles
+    if grown_obstacles is None:
+        grown_obstacles = grow_obstacles(obstacles, radius)[0]
     
-    path, distance = find_robot_path(obstacles, start, goal)
-    
-    fig, ax = plt.subplots(figsize=(12, 10))
+    if show_plot:
+        fig, ax = plt.subplots(figsize=(12, 10))
+    else:
+        fig, ax = headless_axes((12, 10))
     
     original_patches = []
     for polygon in obstacles:
@@ -23,22 +36,16 @@ def visualize_unit_disk_path(obstacles: List[Polygon], start: Point, goal: Point
     p_original = PatchCollection(original_patches, alpha=0.3, facecolor='gray', edgecolor='black', linewidth=1.5)
     ax.add_collection(p_original)
     
-    expanded_patches = []
-    for polygon in obstacles:
-        expanded = make_bigger(polygon)
-        expanded_patches.append(PlotPolygon(np.array(expanded)))
-    
-    p_expanded = PatchCollection(expanded_patches, alpha=0.2, facecolor='red', edgecolor='red', linewidth=1, linestyle='--')
-    ax.add_collection(p_expanded)
+    add_outlines(ax, grown_obstacles, alpha=0.2, facecolor='red', edgecolor='red', linewidth=1, linestyle='--')
     
     ax.plot(start[0], start[1], 'go', markersize=12, label='Start')
     ax.plot(goal[0], goal[1], 'ro', markersize=12, label='Goal')
     
-    start_circle = Circle(start, radius=1, fill=True, alpha=0.3, color='green')
-    goal_circle = Circle(goal, radius=1, fill=True, alpha=0.3, color='red')
+    start_circle = Circle(start, radius=radius, fill=True, alpha=0.3, color='green')
+    goal_circle = Circle(goal, radius=radius, fill=True, alpha=0.3, color='red')
     ax.add_patch(start_circle)
     ax.add_patch(goal_circle)
-     
+    
     if path:
         path_x = [point[0] for point in path]
         path_y = [point[1] for point in path]
@@ -51,14 +58,14 @@ def visualize_unit_disk_path(obstacles: List[Polygon], start: Point, goal: Point
             ax.plot(waypoints_x, waypoints_y, 'yo', markersize=8, label='Waypoints')
             
             for i in range(1, len(path) - 1):
-                waypoint_circle = Circle(path[i], radius=1, fill=True, alpha=0.1, color='blue')
+                waypoint_circle = Circle(path[i], radius=radius, fill=True, alpha=0.1, color='blue')
                 ax.add_patch(waypoint_circle)
     
     all_points = [point for polygon in obstacles for point in polygon] + [start, goal]
-    min_x = min(p[0] for p in all_points) - 2
-    max_x = max(p[0] for p in all_points) + 2
-    min_y = min(p[1] for p in all_points) - 2
-    max_y = max(p[1] for p in all_points) + 2
+    min_x = min(p[0] for p in all_points) - 1 - radius
+    max_x = max(p[0] for p in all_points) + 1 + radius
+    min_y = min(p[1] for p in all_points) - 1 - radius
+    max_y = max(p[1] for p in all_points) + 1 + radius
     
     ax.set_xlim(min_x, max_x)
     ax.set_ylim(min_y, max_y)
@@ -74,105 +81,67 @@ def visualize_unit_disk_path(obstacles: List[Polygon], start: Point, goal: Point
     ax.legend(loc='upper right', fontsize=12)
     
     if save_path:
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
+        fig.savefig(save_path, dpi=dpi, bbox_inches='tight')
     
     if show_plot:
         plt.tight_layout()
         plt.show()
-    else:
-        plt.close(fig)
 
-def run_test_cases():
-    os.makedirs("unit_disk_plots", exist_ok=True)
-    
-    obstacles1 = [
-        [(1, 1), (1, 3), (3, 3), (3, 1)],
-        [(5, 2), (7, 4), (9, 2), (7, 0)]
-    ]
-    start1 = (0, 0)
-    goal1 = (10, 3)
-    
-    visualize_unit_disk_path(
-        obstacles1, start1, goal1,
-        title="Test Case 1: Simple scenario with two obstacles",
-        save_path="unit_disk_plots/test_case_1.png"
-    )
-    
-    obstacles2 = [
-        [(2, 0), (2, 4), (4, 4), (4, 0)],
-        [(6, 6), (6, 10), (8, 10), (8, 6)],
-        [(10, 0), (10, 4), (12, 4), (12, 0)]
-    ]
-    start2 = (0, 2)
-    goal2 = (14, 8)
-    
-    visualize_unit_disk_path(
-        obstacles2, start2, goal2,
-        title="Test Case 2: Narrow passage between obstacles",
-        save_path="unit_disk_plots/test_case_2.png"
-    )
-    
-    obstacles3 = [
-        [(2, 2), (2, 5), (4, 5), (4, 2)],
-        [(6, 1), (7, 3), (9, 3), (10, 1), (8, 0)],
-        [(5, 6), (6, 8), (8, 8), (9, 6), (7, 5)],
-        [(12, 4), (13, 6), (15, 6), (16, 4), (14, 3)]
-    ]
-    start3 = (1, 1)
-    goal3 = (15, 7)
-    
-    visualize_unit_disk_path(
-        obstacles3, start3, goal3,
-        title="Test Case 3: Complex environment",
-        save_path="unit_disk_plots/test_case_3.png"
-    )
+TEST_CASES = [
+    {
+        "title": "Test Case 1: Simple scenario with two obstacles",
+        "obstacles": [
+            [(1, 1), (1, 3), (3, 3), (3, 1)],
+            [(5, 2), (7, 4), (9, 2), (7, 0)]
+        ],
+        "start": (0, 0),
+        "goal": (10, 3)
+    },
+    {
+        "title": "Test Case 2: Narrow passage between obstacles",
+        "obstacles": [
+            [(2, 0), (2, 4), (4, 4), (4, 0)],
+            [(6, 6), (6, 10), (8, 10), (8, 6)],
+            [(10, 0), (10, 4), (12, 4), (12, 0)]
+        ],
+        "start": (0, 2),
+        "goal": (14, 8)
+    },
+    {
+        "title": "Test Case 3: Complex environment",
+        "obstacles": [
+            [(2, 2), (2, 5), (4, 5), (4, 2)],
+            [(6, 1), (7, 3), (9, 3), (10, 1), (8, 0)],
+            [(5, 6), (6, 8), (8, 8), (9, 6), (7, 5)],
+            [(12, 4), (13, 6), (15, 6), (16, 4), (14, 3)]
+        ],
+        "start": (1, 1),
+        "goal": (15, 7)
+    }
+]
+
+def run_test_cases(workers: Optional[int] = None, dpi: int = 100):
+    # drawn headless over a process pool, see renderPipeline.py
+    scenarios = [dict(test_case, radius=1.0, save_path=f"unit_disk_plots/test_case_{number}.png")
+                 for number, test_case in enumerate(TEST_CASES, 1)]
+    render_scenarios(scenarios, workers, dpi)
     
     print("All test cases completed. Results saved in unit_disk_plots directory.")
 
-def create_comparison_plot():
-    fig, axs = plt.subplots(1, 3, figsize=(18, 6))
-    
-    test_cases = [
-        {
-            "title": "Simple scenario",
-            "obstacles": [
-                [(1, 1), (1, 3), (3, 3), (3, 1)],
-                [(5, 2), (7, 4), (9, 2), (7, 0)]
-            ],
-            "start": (0, 0),
-            "goal": (10, 3)
-        },
-        {
-            "title": "Narrow passage",
-            "obstacles": [
-                [(2, 0), (2, 4), (4, 4), (4, 0)],
-                [(6, 6), (6, 10), (8, 10), (8, 6)],
-                [(10, 0), (10, 4), (12, 4), (12, 0)]
-            ],
-            "start": (0, 2),
-            "goal": (14, 8)
-        },
-        {
-            "title": "Complex environment",
-            "obstacles": [
-                [(2, 2), (2, 5), (4, 5), (4, 2)],
-                [(6, 1), (7, 3), (9, 3), (10, 1), (8, 0)],
-                [(5, 6), (6, 8), (8, 8), (9, 6), (7, 5)],
-                [(12, 4), (13, 6), (15, 6), (16, 4), (14, 3)]
-            ],
-            "start": (1, 1),
-            "goal": (15, 7)
-        }
-    ]
-    
-    for i, test_case in enumerate(test_cases):
+def create_comparison_plot(dpi: int = 100):
+    fig, axs = headless_axes((18, 6), 1, 3)
+    
+    titles = ["Simple scenario", "Narrow passage", "Complex environment"]
+    
+    for i, test_case in enumerate(TEST_CASES):
         ax = axs[i]
         
         obstacles = test_case["obstacles"]
         start = test_case["start"]
         goal = test_case["goal"]
         
-        path, distance = find_robot_path(obstacles, start, goal)
+        robot_finder = RobotPathFinder(obstacles, start, goal)
+        path, distance = robot_finder.find_path()
         
         original_patches = []
         for polygon in obstacles:
@@ -181,13 +150,8 @@ def create_comparison_plot():
         p_original = PatchCollection(original_patches, alpha=0.3, facecolor='gray', edgecolor='black', linewidth=1.5)
         ax.add_collection(p_original)
         
-        expanded_patches = []
-        for polygon in obstacles:
-            expanded = make_bigger(polygon)
-            expanded_patches.append(PlotPolygon(np.array(expanded)))
-        
-        p_expanded = PatchCollection(expanded_patches, alpha=0.2, facecolor='red', edgecolor='red', linewidth=1, linestyle='--')
-        ax.add_collection(p_expanded)
+        add_outlines(ax, robot_finder.bigger_obstacles, alpha=0.2, facecolor='red', edgecolor='red', linewidth=1,
+                     linestyle='--')
         
         ax.plot(start[0], start[1], 'go', markersize=8, label='Start')
         ax.plot(goal[0], goal[1], 'ro', markersize=8, label='Goal')
@@ -217,7 +181,7 @@ def create_comparison_plot():
         ax.set_ylim(min_y, max_y)
         
         ax.grid(True, linestyle='--', alpha=0.5)
-        ax.set_title(f"{test_case['title']}\nDistance: {distance:.2f}", fontsize=12)
+        ax.set_title(f"{titles[i]}\nDistance: {distance:.2f}", fontsize=12)
         
         if i == 0:
             ax.plot([], [], 'gray', linewidth=2, label='Original')
@@ -225,16 +189,14 @@ def create_comparison_plot():
             ax.plot([], [], 'b-', linewidth=2, label='Path')
             ax.legend(loc='upper right', fontsize=10)
     
-    plt.suptitle("Unit Disk Robot Path Planning", fontsize=16)
+    fig.suptitle("Unit Disk Robot Path Planning", fontsize=16)
+    fig.tight_layout(rect=[0, 0, 1, 0.95])
     
     os.makedirs("unit_disk_plots", exist_ok=True)
-    plt.savefig("unit_disk_plots/comparison.png", dpi=300, bbox_inches='tight')
-    
-    plt.tight_layout(rect=[0, 0, 1, 0.95])
-    plt.show()
+    fig.savefig("unit_disk_plots/comparison.png", dpi=dpi, bbox_inches='tight')
     
     print("Comparison plot saved to unit_disk_plots/comparison.png")
 
 if __name__ == "__main__":
     run_test_cases()
-    create_comparison_plot()
\ No newline at end of file
+    create_comparison_plot()
@@ -0,0 +1,192 @@
+import math
+from typing import Dict, List, Optional, Set
+from dataTypes import Point, Polygon, Segment
+
+def turn(p: Point, q: Point, r: Point) -> float:
+    return (q[0] - p[0]) * (r[1] - p[1]) - (q[1] - p[1]) * (r[0] - p[0])
+
+def signed_area(polygon: Polygon) -> float:
+    area = 0.0
+    for i in range(len(polygon)):
+        p1 = polygon[i]
+        p2 = polygon[(i + 1) % len(polygon)]
+        area += p1[0] * p2[1] - p2[0] * p1[1]
+    return area / 2
+
+def on_segment(point: Point, a: Point, b: Point) -> bool:
+    return (turn(a, b, point) == 0 and min(a[0], b[0]) <= point[0] <= max(a[0], b[0]) and
+            min(a[1], b[1]) <= point[1] <= max(a[1], b[1]))
+
+def meeting_points(a: Point, b: Point, c: Point, d: Point) -> List[Point]:
+    # Where segments ab and cd meet. Endpoints lying on the other segment are
+    # returned as they are, so touching and overlapping edges split exactly
+    # at existing corners.
+    points = [p for p in (c, d) if on_segment(p, a, b)] + [p for p in (a, b) if on_segment(p, c, d)]
+    if points:
+        return points
+    
+    d1, d2 = turn(a, b, c), turn(a, b, d)
+    d3, d4 = turn(c, d, a), turn(c, d, b)
+    if d1 * d2 < 0 and d3 * d4 < 0:
+        t = d3 / (d3 - d4)
+        return [(a[0] + t * (b[0] - a[0]), a[1] + t * (b[1] - a[1]))]
+    return []
+
+def locate(point: Point, polygon: Polygon) -> int:
+    # 1 inside, 0 on the boundary, -1 outside
+    inside = False
+    for i in range(len(polygon)):
+        a = polygon[i]
+        b = polygon[(i + 1) % len(polygon)]
+        if on_segment(point, a, b):
+            return 0
+        if (a[1] > point[1]) != (b[1] > point[1]):
+            x = a[0] + (point[1] - a[1]) * (b[0] - a[0]) / (b[1] - a[1])
+            if x > point[0]:
+                inside = not inside
+    return 1 if inside else -1
+
+def split_edges(polygon: Polygon, cuts: Dict[int, List[Point]]) -> List[Segment]:
+    pieces = []
+    for k in range(len(polygon)):
+        a = polygon[k]
+        b = polygon[(k + 1) % len(polygon)]
+        length = (b[0] - a[0])**2 + (b[1] - a[1])**2
+        inner = {point for point in cuts.get(k, ()) if point != a and point != b}
+        ordered = sorted(inner, key=lambda point: ((point[0] - a[0]) * (b[0] - a[0]) + (point[1] - a[1]) * (b[1] - a[1])) / length)
+        corners = [a] + ordered + [b]
+        pieces.extend((corners[i], corners[i + 1]) for i in range(len(corners) - 1))
+    return pieces
+
+def link_rings(pieces: List[Segment]) -> Optional[List[Polygon]]:
+    # Kept pieces all run with the union on their left. Where several leave
+    # the same point the walk takes the one that turns furthest right, so
+    # obstacles that only touch at a corner stay separate rings.
+    leaving: Dict[Point, List[int]] = {}
+    for k, (a, _) in enumerate(pieces):
+        leaving.setdefault(a, []).append(k)
+    
+    used = [False] * len(pieces)
+    rings = []
+    for first in range(len(pieces)):
+        if used[first]:
+            continue
+        used[first] = True
+        ring = [pieces[first][0]]
+        previous, current = pieces[first]
+        while current != ring[0]:
+            ring.append(current)
+            back = math.atan2(previous[1] - current[1], previous[0] - current[0])
+            best, best_angle = None, None
+            for k in leaving.get(current, ()):
+                if used[k]:
+                    continue
+                b = pieces[k][1]
+                angle = (back - math.atan2(b[1] - current[1], b[0] - current[0])) % (2 * math.pi)
+                if angle == 0:
+                    angle = 2 * math.pi
+                if best is None or angle < best_angle:
+                    best, best_angle = k, angle
+            if best is None:
+                return None
+            used[best] = True
+            previous, current = pieces[best]
+        rings.append(ring)
+    return rings
+
+def drop_straight_corners(ring: Polygon) -> Polygon:
+    changed = True
+    while changed and len(ring) > 3:
+        changed = False
+        for i in range(len(ring)):
+            if turn(ring[i - 1], ring[i], ring[(i + 1) % len(ring)]) == 0:
+                ring = ring[:i] + ring[i + 1:]
+                changed = True
+                break
+    return ring
+
+def union_polygons(polygons: List[Polygon]) -> List[Polygon]:
+    # Polygons that overlap or touch are replaced by the boundary rings of
+    # their union (holes included), every other polygon comes back as it is.
+    # Edges are cut where they meet edges of an overlapping polygon and a
+    # piece is kept when its midpoint is outside all of them. A piece shared
+    # by two polygons is kept once if both run the same way and dropped if
+    # they run opposite ways (the two interiors meet there).
+    shapes = [list(polygon) if signed_area(polygon) >= 0 else list(reversed(polygon)) for polygon in polygons]
+    boxes = [(min(p[0] for p in shape), min(p[1] for p in shape), max(p[0] for p in shape), max(p[1] for p in shape))
+             for shape in shapes]
+    
+    cuts: List[Dict[int, List[Point]]] = [{} for _ in shapes]
+    neighbors: List[Set[int]] = [set() for _ in shapes]
+    group = list(range(len(shapes)))
+    
+    def find(i: int) -> int:
+        while group[i] != i:
+            group[i] = group[group[i]]
+            i = group[i]
+        return i
+    
+    order = sorted(range(len(shapes)), key=lambda i: boxes[i][0])
+    for position, i in enumerate(order):
+        for j in order[position + 1:]:
+            if boxes[j][0] > boxes[i][2]:
+                break
+            if boxes[j][1] > boxes[i][3] or boxes[j][3] < boxes[i][1]:
+                continue
+            
+            linked = False
+            shape_i, shape_j = shapes[i], shapes[j]
+            for ki in range(len(shape_i)):
+                a, b = shape_i[ki], shape_i[(ki + 1) % len(shape_i)]
+                for kj in range(len(shape_j)):
+                    c, d = shape_j[kj], shape_j[(kj + 1) % len(shape_j)]
+                    points = meeting_points(a, b, c, d)
+                    if points:
+                        cuts[i].setdefault(ki, []).extend(points)
+                        cuts[j].setdefault(kj, []).extend(points)
+                        linked = True
+            if not linked and (locate(shape_i[0], shape_j) >= 0 or locate(shape_j[0], shape_i) >= 0):
+                linked = True
+            if linked:
+                neighbors[i].add(j)
+                neighbors[j].add(i)
+                group[find(i)] = find(j)
+    
+    members: Dict[int, List[int]] = {}
+    for i in range(len(shapes)):
+        members.setdefault(find(i), []).append(i)
+    
+    result = []
+    for root in sorted(members, key=lambda root: members[root][0]):
+        component = members[root]
+        if len(component) == 1:
+            result.append(polygons[component[0]])
+            continue
+        
+        pieces = {i: split_edges(shapes[i], cuts[i]) for i in component}
+        piece_sets = {i: set(pieces[i]) for i in component}
+        kept = []
+        for i in component:
+            for p, q in pieces[i]:
+                middle = ((p[0] + q[0]) / 2, (p[1] + q[1]) / 2)
+                keep = True
+                for j in neighbors[i]:
+                    place = locate(middle, shapes[j])
+                    if place == 1 or (place == 0 and ((q, p) in piece_sets[j] or
+                                                      ((p, q) in piece_sets[j] and j < i))):
+                        keep = False
+                        break
+                if keep:
+                    kept.append((p, q))
+        
+        rings = link_rings(kept)
+        if rings is None:
+            # the cut points did not line up, keep the polygons as they were
+            result.extend(polygons[i] for i in component)
+            continue
+        for ring in rings:
+            ring = drop_straight_corners(ring)
+            if len(ring) >= 3 and signed_area(ring) != 0:
+                result.append(ring)
+    
+    return result
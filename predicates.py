@@ -0,0 +1,92 @@
+import sys
+from dataTypes import Point
+
+# Largest relative error of the float orientation determinant below
+# (Shewchuk's ccwerrboundA), a result bigger than the bound has the right sign.
+EPSILON = sys.float_info.epsilon / 2
+ORIENTATION_BOUND = (3 + 16 * EPSILON) * EPSILON
+
+# The same for the incircle determinant (Shewchuk's iccerrboundA).
+INCIRCLE_BOUND = (10 + 96 * EPSILON) * EPSILON
+
+# Integers up to this size multiply and subtract without rounding in floats.
+EXACT_FLOAT_INTEGER = 2**25
+
+def as_integers(values: tuple) -> tuple:
+    # Floats are dyadic fractions, over their largest denominator (a power
+    # of two) they are all integers. Scaling every value by the same factor
+    # keeps the sign of the determinants below.
+    if all(type(value) is int for value in values):
+        return values
+    ratios = [float(value).as_integer_ratio() for value in values]
+    scale = max(denominator for _, denominator in ratios)
+    return tuple(numerator * (scale // denominator) for numerator, denominator in ratios)
+
+def exact_orientation(p: Point, q: Point, r: Point) -> int:
+    values = as_integers((p[0], p[1], q[0], q[1], r[0], r[1]))
+    px, py, qx, qy, rx, ry = values
+    result = (qy - py) * (rx - qx) - (qx - px) * (ry - qy)
+    if result == 0:
+        return 0
+    return 1 if result > 0 else 2
+
+def orientation(p: Point, q: Point, r: Point) -> int:
+    # 0 when p, q and r are on one line, otherwise 1 or 2 for the two turns
+    left = (q[1] - p[1]) * (r[0] - q[0])
+    right = (q[0] - p[0]) * (r[1] - q[1])
+    result = left - right
+    bound = ORIENTATION_BOUND * (abs(left) + abs(right))
+    if result > bound:
+        return 1
+    if result < -bound:
+        return 2
+    if p == r or q == r or p == q or p[0] == q[0] == r[0] or p[1] == q[1] == r[1]:
+        return 0
+    return exact_orientation(p, q, r)
+
+def in_box(p: Point, q: Point, r: Point) -> bool:
+    # q within the bounding box of p and r, for q already on the line pr
+    return min(p[0], r[0]) <= q[0] <= max(p[0], r[0]) and min(p[1], r[1]) <= q[1] <= max(p[1], r[1])
+
+def segments_cross(p1: Point, p2: Point, q1: Point, q2: Point) -> bool:
+    # true when the segments share any point, touching included
+    turn1 = orientation(p1, p2, q1)
+    turn2 = orientation(p1, p2, q2)
+    turn3 = orientation(q1, q2, p1)
+    turn4 = orientation(q1, q2, p2)
+    
+    if turn1 != turn2 and turn3 != turn4:
+        return True
+    
+    if turn1 == 0 and in_box(p1, q1, p2): return True
+    if turn2 == 0 and in_box(p1, q2, p2): return True
+    if turn3 == 0 and in_box(q1, p1, q2): return True
+    if turn4 == 0 and in_box(q1, p2, q2): return True
+    
+    return False
+
+def exact_incircle(a: Point, b: Point, c: Point, d: Point) -> int:
+    ax, ay, bx, by, cx, cy, dx, dy = as_integers((a[0], a[1], b[0], b[1], c[0], c[1], d[0], d[1]))
+    adx, ady, bdx, bdy, cdx, cdy = ax - dx, ay - dy, bx - dx, by - dy, cx - dx, cy - dy
+    result = ((adx * adx + ady * ady) * (bdx * cdy - bdy * cdx) + (bdx * bdx + bdy * bdy) * (cdx * ady - cdy * adx) +
+              (cdx * cdx + cdy * cdy) * (adx * bdy - ady * bdx))
+    return (result > 0) - (result < 0)
+
+def incircle(a: Point, b: Point, c: Point, d: Point) -> int:
+    # 1 when d is inside the circle through the counterclockwise a, b, c,
+    # -1 outside, 0 on it
+    adx, ady = a[0] - d[0], a[1] - d[1]
+    bdx, bdy = b[0] - d[0], b[1] - d[1]
+    cdx, cdy = c[0] - d[0], c[1] - d[1]
+    alift = adx * adx + ady * ady
+    blift = bdx * bdx + bdy * bdy
+    clift = cdx * cdx + cdy * cdy
+    result = alift * (bdx * cdy - bdy * cdx) + blift * (cdx * ady - cdy * adx) + clift * (adx * bdy - ady * bdx)
+    permanent = ((abs(bdx * cdy) + abs(bdy * cdx)) * alift + (abs(cdx * ady) + abs(cdy * adx)) * blift +
+                 (abs(adx * bdy) + abs(ady * bdx)) * clift)
+    bound = INCIRCLE_BOUND * permanent
+    if result > bound:
+        return 1
+    if result < -bound:
+        return -1
+    return exact_incircle(a, b, c, d)
@@ -0,0 +1,109 @@
+import argparse
+import json
+import os
+from multiprocessing import Pool
+from typing import Iterable, List, Optional, Tuple
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib.patches import PathPatch
+from matplotlib.path import Path
+from dataTypes import Point, Polygon, VisibilityGraph
+
+# Headless rendering for many planning results at once. Figures are made on
+# the Agg canvas directly, never through pyplot, so no display is needed and
+# pyplot's figure list does not grow. Each scenario is planned once and the
+# graph of that query is drawn as it is, the edges as one LineCollection.
+#
+# A scenario is a dict with "obstacles", "start", "goal" and "save_path",
+# optionally "title", "show_visibility" (default true) and "radius" (a
+# unit disk robot of that radius, drawn like plotUnitDisk.py).
+
+def headless_axes(figsize: Tuple[float, float], rows: int = 1, columns: int = 1):
+    # one axes, or a rows x columns array of them like plt.subplots
+    figure = Figure(figsize=figsize)
+    FigureCanvasAgg(figure)
+    return figure, figure.subplots(rows, columns)
+
+def add_visibility_edges(ax, graph: VisibilityGraph, all_points: List[Point], **style) -> LineCollection:
+    # every edge once, in a single artist instead of one line per edge
+    segments = [(all_points[i], all_points[j]) for i, row in graph.items() for j in row if j > i]
+    edges = LineCollection(segments, colors=style.pop("colors", "c"), alpha=style.pop("alpha", 0.3),
+                           linewidths=style.pop("linewidths", 1), **style)
+    ax.add_collection(edges)
+    return edges
+
+def add_outlines(ax, rings: List[Polygon], **style) -> PathPatch:
+    # the rings as one path, a hole runs the other way round than the outline
+    # around it and stays empty under the nonzero fill rule
+    vertices, codes = [], []
+    for ring in rings:
+        vertices.extend(list(ring) + [ring[0]])
+        codes.extend([Path.MOVETO] + [Path.LINETO] * (len(ring) - 1) + [Path.CLOSEPOLY])
+    outlines = PathPatch(Path(vertices, codes), **style)
+    ax.add_patch(outlines)
+    return outlines
+
+def render_scenario(scenario: dict, dpi: int = 100) -> Tuple[str, float]:
+    # the plotting modules import pyplot, they are only loaded where a
+    # scenario is drawn
+    obstacles = [[tuple(point) for point in obstacle] for obstacle in scenario["obstacles"]]
+    start, goal = tuple(scenario["start"]), tuple(scenario["goal"])
+    save_path = scenario["save_path"]
+    title = scenario.get("title", os.path.splitext(os.path.basename(save_path))[0])
+    if os.path.dirname(save_path):
+        os.makedirs(os.path.dirname(save_path), exist_ok=True)
+    
+    if "radius" in scenario:
+        from unitDisc import RobotPathFinder
+        from plotUnitDisk import visualize_unit_disk_path
+        robot_finder = RobotPathFinder(obstacles, start, goal, radius=scenario["radius"])
+        path, distance = robot_finder.find_path()
+        visualize_unit_disk_path(obstacles, start, goal, title, save_path, show_plot=False, path=path,
+                                 distance=distance, radius=scenario["radius"], dpi=dpi,
+                                 grown_obstacles=robot_finder.bigger_obstacles)
+        return save_path, distance
+    
+    from main import ShortestPathFinder
+    from plot import visualize_path
+    finder = ShortestPathFinder(obstacles, start, goal)
+    path, distance = finder.find_shortest_path()
+    visualize_path(obstacles, start, goal, path, f"{title}\nDistance: {distance:.2f}",
+                   scenario.get("show_visibility", True), save_path, show_plot=False,
+                   visibility_graph=finder.graph, graph_points=finder.all_points, dpi=dpi)
+    return save_path, distance
+
+def render_job(job: Tuple[dict, int]) -> Tuple[str, float]:
+    return render_scenario(*job)
+
+def render_scenarios(scenarios: Iterable[dict], workers: Optional[int] = None, dpi: int = 100) -> List[Tuple[str, float]]:
+    # (save_path, distance) per scenario in the given order, the scenarios are
+    # spread over a process pool (workers=1 draws them here)
+    jobs = [(scenario, dpi) for scenario in scenarios]
+    workers = workers or os.cpu_count()
+    if workers > 1 and len(jobs) > 1:
+        with Pool(min(workers, len(jobs))) as pool:
+            return pool.map(render_job, jobs, chunksize=max(1, len(jobs) // (4 * workers)))
+    return [render_job(job) for job in jobs]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render planning scenarios to images without a display")
+    parser.add_argument("scenarios", help="JSON file with a list of scenarios, or JSON lines with one per line")
+    parser.add_argument("--output-dir", default="plots", help="where scenarios without a save_path are written")
+    parser.add_argument("--workers", type=int, help="rendering processes (default one per CPU)")
+    parser.add_argument("--dpi", type=int, default=100, help="image resolution")
+    args = parser.parse_args()
+    
+    with open(args.scenarios) as file:
+        text = file.read()
+    try:
+        scenarios = json.loads(text)
+    except json.JSONDecodeError:
+        scenarios = [json.loads(line) for line in text.splitlines() if line.strip()]
+    if isinstance(scenarios, dict):
+        scenarios = [scenarios]
+    for number, scenario in enumerate(scenarios):
+        scenario.setdefault("save_path", os.path.join(args.output_dir, f"scenario_{number}.png"))
+    
+    for save_path, distance in render_scenarios(scenarios, args.workers, args.dpi):
+        print(f"{save_path}: distance {distance:.2f}")
@@ -0,0 +1,312 @@
+import numpy as np
+from typing import List, Set, Tuple
+from dataTypes import Point, Edge, Polygon, VisibilityGraph
+from visibilitySweep import obstacle_segments
+from edgeGrid import EdgeGrid
+from predicates import EPSILON, ORIENTATION_BOUND, EXACT_FLOAT_INTEGER, exact_orientation
+
+# Upper bound on (segment, obstacle edge) candidates tested in one array
+# operation, keeps the temporaries of a batch at a few tens of megabytes.
+BATCH_CANDIDATES = 1 << 20
+
+# Splits a float into two halves whose products are exact (Dekker), and the
+# range where differences and their products neither overflow nor lose bits
+# below the smallest normal float.
+SPLITTER = 2.0**27 + 1
+SAFE_LOW = 2.0**-450
+SAFE_HIGH = 2.0**450
+
+# Error of the determinant from exact head products and first order tail
+# terms (Shewchuk's ccwerrboundC and resulterrbound).
+CORRECTION_BOUND = (9 + 64 * EPSILON) * EPSILON * EPSILON
+SUM_BOUND = (3 + 8 * EPSILON) * EPSILON
+
+def small_integers(*arrays) -> bool:
+    # the determinant of such coordinates is exact in floats
+    return all(np.all((array == np.round(array)) & (np.abs(array) <= EXACT_FLOAT_INTEGER)) for array in arrays)
+
+def two_sum(a, b) -> Tuple[np.ndarray, np.ndarray]:
+    # a + b = x + y exactly, y the rounding error of x (Knuth)
+    x = a + b
+    b_virtual = x - a
+    a_virtual = x - b_virtual
+    return x, (a - a_virtual) + (b - b_virtual)
+
+def two_product(a, b) -> Tuple[np.ndarray, np.ndarray]:
+    # a * b = x + y exactly (Dekker), a and b split into 26 bit halves
+    x = a * b
+    a_high, a_low = split(a)
+    b_high, b_low = split(b)
+    error = ((x - a_high * b_high) - a_low * b_high) - a_high * b_low
+    return x, a_low * b_low - error
+
+def split(a) -> Tuple[np.ndarray, np.ndarray]:
+    c = SPLITTER * a
+    high = c - (c - a)
+    return high, a - high
+
+def expansion_sign(terms: List[np.ndarray]) -> np.ndarray:
+    # sign of the exact sum of the terms, grown into a nonoverlapping
+    # expansion (Shewchuk) whose largest nonzero part has the sign of the whole
+    expansion = [terms[0]]
+    for term in terms[1:]:
+        grown = []
+        for part in expansion:
+            term, error = two_sum(term, part)
+            grown.append(error)
+        expansion = grown + [term]
+    signs = np.zeros(len(terms[0]))
+    for part in expansion:
+        signs = np.where(part != 0, np.sign(part), signs)
+    return signs
+
+def expansion_turns(px, py, qx, qy, rx, ry) -> Tuple[np.ndarray, np.ndarray]:
+    # The orientation determinant without rounding, in floats. Each of the
+    # four differences is exact as head + tail (two_sum), the tails are zero
+    # for nearby coordinates (Sterbenz) and then the determinant is the
+    # exact sum of the two head products as two floats each (two_product).
+    # Rows with a tail add the first order tail terms, and only where that
+    # is still within its error bound are the tails multiplied out in full.
+    # Returns the signs and which of them are settled, the rest (values
+    # where the products could overflow or underflow) need exact_orientation.
+    differences = [two_sum(a, -b) for a, b in ((qy, py), (rx, qx), (qx, px), (ry, qy))]
+    settled = np.ones(len(px), dtype=bool)
+    tails = np.zeros(len(px), dtype=bool)
+    for head, tail in differences:
+        for part in (head, tail):
+            magnitude = np.abs(part)
+            settled &= (part == 0) | ((magnitude >= SAFE_LOW) & (magnitude <= SAFE_HIGH))
+        tails |= tail != 0
+    
+    (a, a_tail), (b, b_tail), (c, c_tail), (d, d_tail) = differences
+    left, left_error = two_product(a, b)
+    right, right_error = two_product(c, d)
+    turns = expansion_sign([left, left_error, -right, -right_error])
+    
+    # the first order tail terms usually settle the sign (Shewchuk's
+    # orient2dadapt, stage C)
+    estimate = ((left - right) + (left_error - right_error) + (a * b_tail + a_tail * b) - (c * d_tail + c_tail * d))
+    bound = CORRECTION_BOUND * (np.abs(left) + np.abs(right)) + SUM_BOUND * np.abs(estimate)
+    sure = tails & (np.abs(estimate) > bound)
+    turns[sure] = np.sign(estimate[sure])
+    
+    rows = np.flatnonzero(tails & ~sure & settled)
+    if len(rows):
+        terms = []
+        for x, x_tail, y, y_tail, sign in ((a, a_tail, b, b_tail, 1), (c, c_tail, d, d_tail, -1)):
+            for first, second in ((x, y), (x, y_tail), (x_tail, y), (x_tail, y_tail)):
+                product, error = two_product(first[rows], second[rows])
+                terms += [sign * product, sign * error]
+        turns[rows] = expansion_sign(terms)
+    return turns, settled
+
+def get_turns(px, py, qx, qy, rx, ry, exact: bool = False) -> np.ndarray:
+    # Signs of the orientation determinant (0 collinear). Same filter as
+    # predicates.orientation: results above the error bound keep their sign,
+    # repeated points and points on one row or column are collinear, the few
+    # left over are decided by expansion_turns and what that cannot settle
+    # goes through the exact scalar test.
+    with np.errstate(over='ignore', invalid='ignore'):
+        left = (qy - py) * (rx - qx)
+        right = (qx - px) * (ry - qy)
+        result = left - right
+    turns = np.sign(result)
+    if exact:
+        return turns
+    
+    # an overflowed result (inf or nan) is never above the bound
+    bound = np.abs(left, out=left)
+    bound += np.abs(right, out=right)
+    bound *= ORIENTATION_BOUND
+    unsure = np.nonzero(~(np.abs(result, out=result) > bound))
+    if len(unsure[0]) == 0:
+        return turns
+    
+    x1, y1, x2, y2, x3, y3 = (array[unsure] for array in np.broadcast_arrays(px, py, qx, qy, rx, ry))
+    collinear = (((x1 == x3) & (y1 == y3)) | ((x2 == x3) & (y2 == y3)) | ((x1 == x2) & (y1 == y2)) |
+                 ((x1 == x2) & (x2 == x3)) | ((y1 == y2) & (y2 == y3)))
+    turns[unsure] = np.where(collinear, 0, turns[unsure])
+    rows = np.flatnonzero(~collinear)
+    with np.errstate(over='ignore', invalid='ignore'):
+        signs, settled = expansion_turns(x1[rows], y1[rows], x2[rows], y2[rows], x3[rows], y3[rows])
+    turns[tuple(axis[rows] for axis in unsure)] = signs
+    for k in rows[~settled].tolist():
+        turn = exact_orientation((float(x1[k]), float(y1[k])), (float(x2[k]), float(y2[k])), (float(x3[k]), float(y3[k])))
+        turns[tuple(axis[k] for axis in unsure)] = (0, 1, -1)[turn]
+    return turns
+
+def is_between(px, py, qx, qy, rx, ry) -> np.ndarray:
+    return ((qx <= np.maximum(px, rx)) & (qx >= np.minimum(px, rx)) &
+            (qy <= np.maximum(py, ry)) & (qy >= np.minimum(py, ry)))
+
+def expand(counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # owner k repeated counts[k] times, with the steps 0 .. counts[k] - 1
+    owner = np.repeat(np.arange(len(counts)), counts)
+    step = np.arange(len(owner)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owner, step
+
+class ObstacleEdgeArrays:
+    def __init__(self, obstacles: List[Polygon]):
+        segments = obstacle_segments(obstacles)
+        coordinates = np.array([[a[0], a[1], b[0], b[1]] for a, b in segments], dtype=float).reshape(-1, 4)
+        self.ax = np.ascontiguousarray(coordinates[:, 0])
+        self.ay = np.ascontiguousarray(coordinates[:, 1])
+        self.bx = np.ascontiguousarray(coordinates[:, 2])
+        self.by = np.ascontiguousarray(coordinates[:, 3])
+        self.small_integers = small_integers(coordinates)
+        
+        # The EdgeGrid of the scalar builders as flat arrays, the edges of
+        # cell (column, row) are cell_edges[cell_start[c]:cell_start[c + 1]]
+        # with c = column * rows + row.
+        self.grid = EdgeGrid(segments)
+        cells = self.grid.columns * self.grid.rows
+        counts = np.zeros(cells, dtype=np.int64)
+        for (column, row), edges in self.grid.cells.items():
+            counts[column * self.grid.rows + row] = len(edges)
+        self.cell_start = np.concatenate(([0], np.cumsum(counts)))
+        self.cell_edges = np.zeros(int(self.cell_start[-1]), dtype=np.int64)
+        for (column, row), edges in self.grid.cells.items():
+            first = self.cell_start[column * self.grid.rows + row]
+            self.cell_edges[first:first + len(edges)] = edges
+        # a segment passes at most columns + rows cells
+        per_cell = len(self.cell_edges) / max(1, np.count_nonzero(counts))
+        self.batch = max(1, int(BATCH_CANDIDATES // ((self.grid.columns + self.grid.rows) * max(1.0, per_cell))))
+    
+    def __len__(self) -> int:
+        return len(self.ax)
+    
+    def blocked_pairs(self, px, py, qx, qy) -> np.ndarray:
+        # whether some obstacle edge crosses segment k = p[k] q[k], for
+        # equally long coordinate arrays, in batches of segments
+        blocked = np.zeros(len(px), dtype=bool)
+        if len(self) == 0:
+            return blocked
+        for first in range(0, len(px), self.batch):
+            last = first + self.batch
+            blocked[first:last] = self.blocked_batch(px[first:last], py[first:last], qx[first:last], qy[first:last])
+        return blocked
+    
+    def blocked_batch(self, px, py, qx, qy) -> np.ndarray:
+        # The cells EdgeGrid.cells_along walks, a band of columns at a time.
+        # Like the scalar test that stops at the first crossing edge, the
+        # columns next to the ends of the segments go first (where the
+        # corners of their own obstacles and of neighbors are) and a segment
+        # found blocked is not walked any further.
+        grid = self.grid
+        swap = px > qx
+        left_x, left_y = np.where(swap, qx, px), np.where(swap, qy, py)
+        right_x, right_y = np.where(swap, px, qx), np.where(swap, py, qy)
+        
+        def cell(values, low, count):
+            return np.clip(np.floor((values - low) / grid.cell_size), 0, count - 1).astype(np.int64)
+        
+        first_column = cell(left_x - grid.margin, grid.min_x, grid.columns)
+        last_column = cell(right_x + grid.margin, grid.min_x, grid.columns)
+        columns = last_column - first_column + 1
+        left_half = (columns + 1) // 2
+        dx = right_x - left_x
+        slope = np.divide(right_y - left_y, dx, out=np.zeros_like(dx), where=dx != 0)
+        
+        blocked = np.zeros(len(px), dtype=bool)
+        remaining = np.arange(len(px))
+        low, width = 0, 1
+        while len(remaining):
+            # the columns low .. low + width - 1 away from the nearer end
+            from_left = np.clip(left_half[remaining] - low, 0, width)
+            from_right = np.clip(columns[remaining] - left_half[remaining] - low, 0, width)
+            owner, step = expand(from_left + from_right)
+            segment = remaining[owner]
+            on_left = step < from_left[owner]
+            column = np.where(on_left, first_column[segment] + low + step,
+                              last_column[segment] - low - (step - from_left[owner]))
+            
+            column_start = grid.min_x + column * grid.cell_size
+            low_x, high_x, y0 = left_x[segment], right_x[segment], left_y[segment]
+            x_low = np.where(column == first_column[segment], low_x, np.minimum(np.maximum(low_x, column_start), high_x))
+            x_high = np.where(column == last_column[segment], high_x,
+                              np.maximum(np.minimum(high_x, column_start + grid.cell_size), low_x))
+            vertical = dx[segment] == 0
+            y_a = np.where(vertical, y0, y0 + (x_low - low_x) * slope[segment])
+            y_b = np.where(vertical, right_y[segment], y0 + (x_high - low_x) * slope[segment])
+            first_row = cell(np.minimum(y_a, y_b) - grid.margin, grid.min_y, grid.rows)
+            last_row = cell(np.maximum(y_a, y_b) + grid.margin, grid.min_y, grid.rows)
+            
+            owner, step = expand(last_row - first_row + 1)
+            self.test_cells(segment[owner], column[owner] * grid.rows + first_row[owner] + step, px, py, qx, qy, blocked)
+            low += width
+            width *= 2
+            remaining = remaining[~blocked[remaining] & (left_half[remaining] > low)]
+        return blocked
+    
+    def test_cells(self, segment, cells, px, py, qx, qy, blocked: np.ndarray):
+        # marks the segments crossed by an obstacle edge of their cell
+        owner, step = expand(self.cell_start[cells + 1] - self.cell_start[cells])
+        segment = segment[owner]
+        edge = self.cell_edges[self.cell_start[cells[owner]] + step]
+        sx, sy, tx, ty = px[segment], py[segment], qx[segment], qy[segment]
+        ax, ay, bx, by = self.ax[edge], self.ay[edge], self.bx[edge], self.by[edge]
+        
+        shares_corner = (((ax == sx) & (ay == sy)) | ((bx == sx) & (by == sy)) |
+                         ((ax == tx) & (ay == ty)) | ((bx == tx) & (by == ty)))
+        exact = self.small_integers and small_integers(sx, sy, tx, ty)
+        
+        turn1 = get_turns(sx, sy, tx, ty, ax, ay, exact)
+        turn2 = get_turns(sx, sy, tx, ty, bx, by, exact)
+        turn3 = get_turns(ax, ay, bx, by, sx, sy, exact)
+        turn4 = get_turns(ax, ay, bx, by, tx, ty, exact)
+        
+        crosses = (turn1 != turn2) & (turn3 != turn4)
+        crosses |= (turn1 == 0) & is_between(sx, sy, ax, ay, tx, ty)
+        crosses |= (turn2 == 0) & is_between(sx, sy, bx, by, tx, ty)
+        crosses |= (turn3 == 0) & is_between(ax, ay, sx, sy, bx, by)
+        crosses |= (turn4 == 0) & is_between(ax, ay, tx, ty, bx, by)
+        
+        blocked[segment[crosses & ~shares_corner]] = True
+    
+    def blocked_row(self, point: Point, targets: np.ndarray) -> np.ndarray:
+        # targets is an (m, 2) array, the result says for every segment
+        # point -> target whether some obstacle edge crosses it
+        targets = np.asarray(targets, dtype=float).reshape(-1, 2)
+        px = np.full(len(targets), float(point[0]))
+        py = np.full(len(targets), float(point[1]))
+        return self.blocked_pairs(px, py, targets[:, 0].copy(), targets[:, 1].copy())
+    
+    def is_blocked(self, point1: Point, point2: Point) -> bool:
+        return bool(self.blocked_row(point1, np.array([point2], dtype=float))[0])
+
+def vectorized_visibility_graph(all_points: List[Point], obstacles: List[Polygon],
+                                obstacle_edges: Set[Edge]) -> VisibilityGraph:
+    # all pairs i < j, a block of rows at a time, only tested against the
+    # obstacle edges of the grid cells they pass
+    edge_arrays = ObstacleEdgeArrays(obstacles)
+    coordinates = np.array(all_points, dtype=float).reshape(-1, 2)
+    count = len(all_points)
+    graph: VisibilityGraph = {i: {} for i in range(count)}
+    shortcuts = np.array(sorted(i * count + j for i, j in obstacle_edges if i < j), dtype=np.int64)
+    
+    # pairs in each block of rows
+    block = max(edge_arrays.batch, count)
+    row = 0
+    while row < count - 1:
+        last = row + 1
+        pairs = count - 1 - row
+        while last < count - 1 and pairs + count - 1 - last <= block:
+            pairs += count - 1 - last
+            last += 1
+        
+        first, step = expand(count - 1 - np.arange(row, last))
+        first += row
+        second = first + 1 + step
+        px, py = coordinates[first, 0], coordinates[first, 1]
+        qx, qy = coordinates[second, 0], coordinates[second, 1]
+        visible = ~edge_arrays.blocked_pairs(px, py, qx, qy)
+        visible |= np.isin(first * count + second, shortcuts)
+        
+        dx, dy = qx[visible] - px[visible], qy[visible] - py[visible]
+        distances = np.sqrt(dx * dx + dy * dy)
+        for i, j, distance in zip(first[visible].tolist(), second[visible].tolist(), distances.tolist()):
+            graph[i][j] = distance
+            graph[j][i] = distance
+        row = last
+    
+    return graph
@@ -0,0 +1,116 @@
+import heapq
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+from dataTypes import Point, Polygon, PathResult
+from obstacleMap import ObstacleMap
+from graphSearch import shortest_path_tree, rebuild_path
+from main import segment_meets_box, DEFAULT_BUILDER
+
+Box = Tuple[float, float, float, float]
+
+def box_distance(point: Point, box: Box) -> float:
+    dx = max(box[0] - point[0], 0.0, point[0] - box[2])
+    dy = max(box[1] - point[1], 0.0, point[1] - box[3])
+    return math.sqrt(dx * dx + dy * dy)
+
+class ShortestPathMap:
+    # A shortest path tree from one fixed source over the obstacle corners,
+    # with a grid over the corners for point location. The path to any goal
+    # is the path to the last corner the goal can see plus one straight
+    # segment, the goals sharing that corner are its region of the map.
+    #
+    # The regions are not stored as polygons, each grid cell keeps the
+    # corners whose region can reach into it. In a cell no obstacle side
+    # crosses, the step from its center to any goal in it is free, so no goal
+    # there is further than the center's distance plus half the diagonal,
+    # and only corners whose tree distance plus distance to the cell is under
+    # that can be last on a goal's path. A query looks up its cell and tries
+    # those corners, shortest total first, the first visible one is the
+    # answer. Goals in cells that obstacle sides cross, or outside the grid,
+    # try every corner. Everything kept here pickles, the map can be built
+    # once and handed to other processes.
+    def __init__(self, obstacle_map: ObstacleMap, source: Point):
+        self.source = source
+        self.finder = obstacle_map.finder
+        self.free_space = obstacle_map.free_space
+        
+        graph, all_points, _ = obstacle_map.attach_points([source])
+        self.all_points = all_points
+        self.distances, self.came_from, _ = shortest_path_tree(graph, 0, terminals={0, 1})
+        self.distances.pop(1, None)
+        
+        # about one cell per corner, over the corners the tree reaches and the source
+        points = [all_points[index] for index in self.distances]
+        self.min_x, self.min_y = min(point[0] for point in points), min(point[1] for point in points)
+        width = max(point[0] for point in points) - self.min_x
+        height = max(point[1] for point in points) - self.min_y
+        if width > 0 and height > 0:
+            self.cell_size = math.sqrt(width * height / len(points))
+        else:
+            self.cell_size = max(width, height, 1.0) / len(points)
+        self.columns = int(width // self.cell_size) + 1
+        self.rows = int(height // self.cell_size) + 1
+        
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+        for column in range(self.columns):
+            for row in range(self.rows):
+                box = self.cell_box(column, row)
+                if self.crossed(box):
+                    continue
+                center = ((box[0] + box[2]) / 2, (box[1] + box[3]) / 2)
+                if not self.free_space.connects(source, center):
+                    # no goal in the cell is reachable
+                    self.cells[(column, row)] = []
+                    continue
+                _, distance = self.nearest_corner(center, self.distances)
+                bound = (distance + math.dist(center, box[:2])) * (1 + 1e-9)
+                self.cells[(column, row)] = [index for index, tree_distance in self.distances.items()
+                                             if tree_distance + box_distance(all_points[index], box) <= bound]
+    
+    def cell_box(self, column: int, row: int) -> Box:
+        x, y = self.min_x + column * self.cell_size, self.min_y + row * self.cell_size
+        return x, y, x + self.cell_size, y + self.cell_size
+    
+    def crossed(self, box: Box) -> bool:
+        # an obstacle side meets the box, found through the finder's edge grid
+        grid = self.finder.edge_grid
+        columns = range(grid.clamp(math.floor((box[0] - grid.margin - grid.min_x) / grid.cell_size), grid.columns),
+                        grid.clamp(math.floor((box[2] + grid.margin - grid.min_x) / grid.cell_size), grid.columns) + 1)
+        rows = range(grid.clamp(math.floor((box[1] - grid.margin - grid.min_y) / grid.cell_size), grid.rows),
+                     grid.clamp(math.floor((box[3] + grid.margin - grid.min_y) / grid.cell_size), grid.rows) + 1)
+        return any(segment_meets_box(*grid.segments[k], box)
+                   for column in columns for row in rows for k in grid.cells.get((column, row), ()))
+    
+    def nearest_corner(self, goal: Point, indices: Iterable[int]) -> PathResult:
+        # the corner among indices with the shortest total that sees goal
+        all_points = list(self.all_points)
+        all_points[1] = goal
+        candidates = []
+        for index in indices:
+            point = all_points[index]
+            candidates.append((self.distances[index] + math.sqrt((goal[0] - point[0])**2 + (goal[1] - point[1])**2), index))
+        heapq.heapify(candidates)
+        
+        tangent_filter = self.finder.tangent_filter
+        while candidates:
+            total, index = heapq.heappop(candidates)
+            if tangent_filter is not None and not tangent_filter.keeps_edge(index, 1, all_points):
+                continue
+            if self.finder.is_segment_clear(all_points[index], goal):
+                return rebuild_path(self.came_from, all_points, index) + [goal], total
+        
+        return [], float('inf')
+    
+    def find_shortest_path(self, goal: Point) -> PathResult:
+        if goal == self.source:
+            return [goal], 0
+        if not self.free_space.connects(self.source, goal):
+            return [], float('inf')
+        
+        cell = (math.floor((goal[0] - self.min_x) / self.cell_size), math.floor((goal[1] - self.min_y) / self.cell_size))
+        indices: Optional[List[int]] = self.cells.get(cell)
+        return self.nearest_corner(goal, self.distances if indices is None else indices)
+
+def build_shortest_path_map(obstacles: List[Polygon], source: Point, builder: str = DEFAULT_BUILDER,
+                            reduced: bool = False) -> ShortestPathMap:
+    return ShortestPathMap(ObstacleMap(obstacles, builder, reduced), source)
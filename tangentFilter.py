@@ -0,0 +1,59 @@
+from typing import Collection, Dict, List, Set, Tuple
+from dataTypes import Point, Polygon, VisibilityGraph
+
+class TangentFilter:
+    # Shortest paths only bend at convex corners and only leave a corner
+    # along a line that keeps the whole corner on one side. This drops reflex
+    # corners and every edge that would cut into the polygon at one of its
+    # endpoints, which leaves the reduced (bitangent) visibility graph.
+    # holes are the positions in obstacles of rings with free space inside
+    # (the holes of a merged outline), their corners turn the other way.
+    def __init__(self, obstacles: List[Polygon], first_index: int = 2, holes: Collection[int] = ()):
+        self.corner_neighbors: Dict[int, Tuple[Point, Point]] = {}
+        self.reflex_corners: Set[int] = set()
+        
+        index = first_index
+        for number, obstacle in enumerate(obstacles):
+            self.add_obstacle(obstacle, index, number in holes)
+            index += len(obstacle)
+    
+    def add_obstacle(self, obstacle: Polygon, first_index: int, hole: bool = False):
+        number_of_points = len(obstacle)
+        area = 0.0
+        for i in range(number_of_points):
+            p1 = obstacle[i]
+            p2 = obstacle[(i + 1) % number_of_points]
+            area += p1[0] * p2[1] - p2[0] * p1[1]
+        if hole:
+            area = -area
+        
+        for i in range(number_of_points):
+            previous_point = obstacle[i - 1]
+            point = obstacle[i]
+            next_point = obstacle[(i + 1) % number_of_points]
+            self.corner_neighbors[first_index + i] = (previous_point, next_point)
+            
+            turn = ((point[0] - previous_point[0]) * (next_point[1] - point[1]) -
+                    (point[1] - previous_point[1]) * (next_point[0] - point[0]))
+            if turn * area < 0:
+                self.reflex_corners.add(first_index + i)
+    
+    def is_tangent(self, corner: int, other: int, all_points: List[Point]) -> bool:
+        if corner not in self.corner_neighbors:
+            return True
+        
+        previous_point, next_point = self.corner_neighbors[corner]
+        p = all_points[corner]
+        q = all_points[other]
+        side1 = (q[0] - p[0]) * (previous_point[1] - p[1]) - (q[1] - p[1]) * (previous_point[0] - p[0])
+        side2 = (q[0] - p[0]) * (next_point[1] - p[1]) - (q[1] - p[1]) * (next_point[0] - p[0])
+        return side1 * side2 >= 0
+    
+    def keeps_edge(self, i: int, j: int, all_points: List[Point]) -> bool:
+        if i in self.reflex_corners or j in self.reflex_corners:
+            return False
+        return self.is_tangent(i, j, all_points) and self.is_tangent(j, i, all_points)
+    
+    def reduce(self, graph: VisibilityGraph, all_points: List[Point]) -> VisibilityGraph:
+        return {i: {j: distance for j, distance in neighbors.items() if self.keeps_edge(i, j, all_points)}
+                for i, neighbors in graph.items()}
@@ -4,3 +4,5 @@ python3 plot.py
 python3 plot.py novis 1 
 python3 plot.py comparison 
 python3 plotUnitDisk.py
+python3 benchmark.py --worlds maze,corridor --sizes 10,100 --builders naive,sweep --reduced > /dev/null
+python3 plannerTests.py
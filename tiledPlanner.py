@@ -0,0 +1,294 @@
+import math
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from dataTypes import Point, Polygon, VisibilityGraph, PathResult
+from main import ShortestPathFinder
+from graphSearch import shortest_path_tree, rebuild_path
+from polygonUnion import locate
+
+Box = Tuple[float, float, float, float]
+
+def polygon_bounds(polygon: Polygon) -> Box:
+    xs = [point[0] for point in polygon]
+    ys = [point[1] for point in polygon]
+    return min(xs), min(ys), max(xs), max(ys)
+
+def boxes_meet(box1: Box, box2: Box) -> bool:
+    return box1[0] <= box2[2] and box2[0] <= box1[2] and box1[1] <= box2[3] and box2[1] <= box1[3]
+
+def in_box(point: Point, box: Box) -> bool:
+    return box[0] <= point[0] <= box[2] and box[1] <= point[1] <= box[3]
+
+def spaced(low: float, high: float, spacing: float) -> List[float]:
+    # low, high and evenly spaced values between them no further apart than spacing
+    steps = max(1, math.ceil((high - low) / spacing))
+    return [low + (high - low) * k / steps for k in range(steps)] + [high]
+
+class Tile:
+    # Visibility graph over the obstacle corners and portals inside one
+    # (closed) tile. Two points of the tile see each other along a segment
+    # that stays in the tile, so only obstacles touching the tile are checked.
+    def __init__(self, box: Box, obstacles: List[Polygon], portals: List[Point]):
+        self.box = box
+        anchor = next((point for obstacle in obstacles for point in obstacle), (box[0], box[1]))
+        self.finder = ShortestPathFinder(obstacles, anchor, anchor, check_reachable=False)
+        self.sides = set()
+        for obstacle in obstacles:
+            for k in range(len(obstacle)):
+                a, b = obstacle[k], obstacle[(k + 1) % len(obstacle)]
+                self.sides.add((a, b))
+                self.sides.add((b, a))
+        
+        # shortest paths between the tile's coarse nodes, filled in by TiledPlanner
+        self.links: Optional[List[Tuple[Point, Point, float]]] = None
+        
+        corners = [point for obstacle in obstacles for point in obstacle if self.contains(point)]
+        self.points: List[Point] = list(dict.fromkeys(corners + portals))
+        self.index = {point: i for i, point in enumerate(self.points)}
+        self.graph: VisibilityGraph = {i: {} for i in range(len(self.points))}
+        for i in range(len(self.points)):
+            for j in range(i + 1, len(self.points)):
+                if self.sees(self.points[i], self.points[j]):
+                    distance = math.dist(self.points[i], self.points[j])
+                    self.graph[i][j] = distance
+                    self.graph[j][i] = distance
+    
+    def contains(self, point: Point) -> bool:
+        return in_box(point, self.box)
+    
+    def sees(self, point1: Point, point2: Point) -> bool:
+        # obstacle sides are always visible, as in the full graph
+        return (point1, point2) in self.sides or self.finder.is_segment_clear(point1, point2)
+    
+    def attach(self, point: Point) -> Tuple[VisibilityGraph, int]:
+        # the tile graph with one more node for point, the shared rows are copied
+        # only where the new node links to them
+        index = len(self.points)
+        graph = dict(self.graph)
+        graph[index] = {}
+        for j, other in enumerate(self.points):
+            if other == point:
+                graph[index][j] = 0.0
+            elif self.sees(point, other):
+                graph[index][j] = math.dist(point, other)
+            else:
+                continue
+            graph[j] = dict(self.graph[j])
+            graph[j][index] = graph[index][j]
+        return graph, index
+    
+    def local_path(self, graph: VisibilityGraph, source: int, target: int, points: List[Point]) -> List[Point]:
+        _, came_from, _ = shortest_path_tree(graph, source, [target])
+        return rebuild_path(came_from, points, target)
+
+class TiledPlanner:
+    # Hierarchical planning for maps too big for one graph. The world is cut
+    # into square tiles, each with its own small visibility graph. Portals
+    # are free points spaced along the borders between tiles, and together
+    # with the corners lying on a border they are the nodes of a coarse
+    # graph whose edges are the shortest paths between them inside a tile.
+    # A query links start and goal into their tiles, searches the coarse
+    # graph and expands only the tile paths on the route it found.
+    #
+    # The path found is never shorter than the true shortest path. It is
+    # longer by at most portal_spacing for every tile border the shortest
+    # path crosses, as long as the border is free of obstacles within
+    # portal_spacing / 2 of the crossing. There a detour to the nearest
+    # portal and back costs at most twice half the spacing. Smaller portal
+    # spacing shrinks the gap at the cost of a bigger coarse graph.
+    def __init__(self, obstacles: List[Polygon], tile_size: float, portal_spacing: Optional[float] = None,
+                 bounds: Optional[Box] = None):
+        if tile_size <= 0:
+            raise ValueError(f"tile_size must be positive, got {tile_size}")
+        self.obstacles = obstacles
+        self.tile_size = tile_size
+        self.portal_spacing = portal_spacing or tile_size / 8
+        self.nodes_expanded = 0
+        
+        # The tiles first cover bounds (by default the box of the obstacles
+        # grown by one portal spacing), a start or goal outside them extends
+        # the tiled area. The shortest path between them stays in the convex
+        # hull of them and the obstacles, so it stays in the area too.
+        self.boxes = [polygon_bounds(obstacle) for obstacle in obstacles]
+        self.extent: Optional[Box] = None
+        if self.boxes:
+            self.extent = (min(box[0] for box in self.boxes), min(box[1] for box in self.boxes),
+                           max(box[2] for box in self.boxes), max(box[3] for box in self.boxes))
+        if bounds is None:
+            margin = self.portal_spacing
+            if self.extent is not None:
+                bounds = (self.extent[0] - margin, self.extent[1] - margin,
+                          self.extent[2] + margin, self.extent[3] + margin)
+            else:
+                bounds = (-margin, -margin, margin, margin)
+        
+        # tile (column, row) is the square at origin + (column, row) * tile_size,
+        # columns and rows are the ranges of them in the area
+        self.origin = bounds[0], bounds[1]
+        self.columns = (0, 0)
+        self.rows = (0, 0)
+        self.tiles: Dict[Tuple[int, int], Tile] = {}
+        self.cover((0, max(1, math.ceil((bounds[2] - bounds[0]) / tile_size))),
+                   (0, max(1, math.ceil((bounds[3] - bounds[1]) / tile_size))))
+    
+    def tile_box(self, column: int, row: int) -> Box:
+        # computed the same way for every tile, neighboring tiles share borders exactly
+        size = self.tile_size
+        return (self.origin[0] + column * size, self.origin[1] + row * size,
+                self.origin[0] + (column + 1) * size, self.origin[1] + (row + 1) * size)
+    
+    def cover(self, columns: Tuple[int, int], rows: Tuple[int, int]):
+        # Makes the tiles of a bigger area. Tiles that were there keep their
+        # graphs, only those on the old edge are made again, they get portals
+        # on their borders with the new tiles.
+        old_columns, old_rows = self.columns, self.rows
+        self.columns, self.rows = columns, rows
+        for column in range(*columns):
+            for row in range(*rows):
+                if (column, row) in self.tiles and not (
+                        column == old_columns[0] and columns[0] < column or
+                        column == old_columns[1] - 1 and columns[1] > old_columns[1] or
+                        row == old_rows[0] and rows[0] < row or
+                        row == old_rows[1] - 1 and rows[1] > old_rows[1]):
+                    continue
+                box = self.tile_box(column, row)
+                shapes = []
+                if self.extent is not None and boxes_meet(box, self.extent):
+                    shapes = [obstacle for obstacle, bounds in zip(self.obstacles, self.boxes)
+                              if boxes_meet(box, bounds)]
+                self.tiles[(column, row)] = Tile(box, shapes, self.portals(box, column, row, shapes))
+        self.bounds = self.tile_box(columns[0], rows[0])[:2] + self.tile_box(columns[1] - 1, rows[1] - 1)[2:]
+        
+        # points in more than one tile are the coarse nodes
+        tile_count: Dict[Point, int] = defaultdict(int)
+        for tile in self.tiles.values():
+            for point in tile.points:
+                tile_count[point] += 1
+        self.nodes: List[Point] = [point for point, count in tile_count.items() if count > 1]
+        self.node_index = {point: k for k, point in enumerate(self.nodes)}
+        
+        self.coarse: VisibilityGraph = {k: {} for k in range(len(self.nodes))}
+        self.coarse_tile: Dict[Tuple[int, int], Tuple[int, int]] = {}
+        for key, tile in self.tiles.items():
+            if tile.links is None:
+                border = [i for i, point in enumerate(tile.points) if tile_count[point] > 1]
+                tile.links = []
+                for i in border:
+                    distances, _, _ = shortest_path_tree(tile.graph, i, border)
+                    tile.links += [(tile.points[i], tile.points[j], distances[j]) for j in border
+                                   if j != i and j in distances]
+            for point1, point2, distance in tile.links:
+                u, v = self.node_index[point1], self.node_index[point2]
+                if distance < self.coarse[u].get(v, float('inf')):
+                    self.coarse[u][v] = distance
+                    self.coarse_tile[(u, v)] = key
+    
+    def portals(self, box: Box, column: int, row: int, obstacles: List[Polygon]) -> List[Point]:
+        # free points spaced along the borders the tile shares with other tiles
+        candidates = []
+        if column > self.columns[0]:
+            candidates += [(box[0], y) for y in spaced(box[1], box[3], self.portal_spacing)]
+        if column < self.columns[1] - 1:
+            candidates += [(box[2], y) for y in spaced(box[1], box[3], self.portal_spacing)]
+        if row > self.rows[0]:
+            candidates += [(x, box[1]) for x in spaced(box[0], box[2], self.portal_spacing)]
+        if row < self.rows[1] - 1:
+            candidates += [(x, box[3]) for x in spaced(box[0], box[2], self.portal_spacing)]
+        return [point for point in dict.fromkeys(candidates) if all(locate(point, obstacle) < 0 for obstacle in obstacles)]
+    
+    def reach(self, point: Point):
+        # extends the tiled area to the tiles the point is in
+        if in_box(point, self.bounds):
+            return
+        x = (point[0] - self.origin[0]) / self.tile_size
+        y = (point[1] - self.origin[1]) / self.tile_size
+        self.cover((min(self.columns[0], math.floor(x)), max(self.columns[1], math.ceil(x))),
+                   (min(self.rows[0], math.floor(y)), max(self.rows[1], math.ceil(y))))
+    
+    def tiles_of(self, point: Point) -> List[Tuple[int, int]]:
+        self.reach(point)
+        column = min(math.floor((point[0] - self.origin[0]) / self.tile_size), self.columns[1] - 1)
+        row = min(math.floor((point[1] - self.origin[1]) / self.tile_size), self.rows[1] - 1)
+        return [(c, r) for c in (column - 1, column, column + 1) for r in (row - 1, row, row + 1)
+                if (c, r) in self.tiles and self.tiles[(c, r)].contains(point)]
+    
+    def find_shortest_path(self, start: Point, goal: Point) -> PathResult:
+        if start == goal:
+            self.nodes_expanded = 0
+            return [start], 0
+        # before the coarse graph is copied, extending the area makes it again
+        self.reach(start)
+        self.reach(goal)
+        
+        # the coarse graph gets two more nodes, links out of the start tiles
+        # and into the goal tiles carry the local distances and paths
+        start_node, goal_node = len(self.nodes), len(self.nodes) + 1
+        all_points = self.nodes + [start, goal]
+        graph = dict(self.coarse)
+        graph[start_node] = {}
+        graph[goal_node] = {}
+        local: Dict[Tuple[int, int], Tuple[Tuple[int, int], VisibilityGraph, List[Point], int, int]] = {}
+        
+        def link(u: int, v: int, distance: float, key, tile_graph, points, source, target):
+            if distance < graph[u].get(v, float('inf')):
+                if u != start_node:
+                    graph[u] = dict(graph[u])
+                graph[u][v] = distance
+                local[(u, v)] = (key, tile_graph, points, source, target)
+        
+        goal_tiles = set(self.tiles_of(goal))
+        goal_graphs = {}
+        for key in goal_tiles:
+            tile = self.tiles[key]
+            tile_graph, index = tile.attach(goal)
+            goal_graphs[key] = (tile_graph, index)
+            distances, _, _ = shortest_path_tree(tile_graph, index)
+            for i, distance in distances.items():
+                if i < len(tile.points) and tile.points[i] in self.node_index:
+                    link(self.node_index[tile.points[i]], goal_node, distance, key, tile_graph,
+                         tile.points + [goal], i, index)
+        
+        for key in self.tiles_of(start):
+            tile = self.tiles[key]
+            tile_graph, index = tile.attach(start)
+            points = tile.points + [start]
+            distances, _, _ = shortest_path_tree(tile_graph, index)
+            for i, distance in distances.items():
+                if i < len(tile.points) and tile.points[i] in self.node_index:
+                    link(start_node, self.node_index[tile.points[i]], distance, key, tile_graph, points, index, i)
+            
+            if key in goal_tiles:
+                # both in this tile, the goal joins the start's copy of the tile graph
+                both = dict(tile_graph)
+                goal_index = index + 1
+                both[goal_index] = {}
+                for j, other in enumerate(points):
+                    if other == goal:
+                        distance = 0.0
+                    elif tile.sees(goal, other):
+                        distance = math.dist(goal, other)
+                    else:
+                        continue
+                    both[goal_index][j] = distance
+                    both[j] = dict(both[j])
+                    both[j][goal_index] = distance
+                distances, _, _ = shortest_path_tree(both, index, [goal_index])
+                if goal_index in distances:
+                    link(start_node, goal_node, distances[goal_index], key, both, points + [goal], index, goal_index)
+        
+        distances, came_from, self.nodes_expanded = shortest_path_tree(graph, start_node, [goal_node])
+        if goal_node not in distances:
+            return [], float('inf')
+        
+        route = rebuild_path(came_from, list(range(len(all_points))), goal_node)
+        path = [start]
+        for u, v in zip(route, route[1:]):
+            if (u, v) in local:
+                key, tile_graph, points, source, target = local[(u, v)]
+            else:
+                key = self.coarse_tile[(u, v)]
+                tile = self.tiles[key]
+                tile_graph, points = tile.graph, tile.points
+                source, target = tile.index[self.nodes[u]], tile.index[self.nodes[v]]
+            path += self.tiles[key].local_path(tile_graph, source, target, points)[1:]
+        return path, distances[goal_node]
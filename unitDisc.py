@@ -1,13 +1,40 @@
 import math
-import heapq
+import time
 from dataTypes import Point, Polygon, VisibilityGraph, PathResult
-from typing import List
+from typing import Callable, Collection, List, Set, Tuple, Union
+from visibilitySweep import sweep_visibility_graph, obstacle_segments, split_segments, visible_neighbors
+from edgeGrid import EdgeGrid
+from graphSearch import SEARCH_STRATEGIES, implicit_astar
+from tangentFilter import TangentFilter
+from plannerStats import PlannerStats
+from polygonUnion import union_polygons, signed_area
+from freeSpace import FreeSpaceIndex, free_space_index
+from predicates import segments_cross
+from main import DEFAULT_BUILDER
+
+GRAPH_BUILDERS = ("naive", "sweep", "numpy", "parallel")
 
 class ShortestPathFinder:
-    def __init__(self, obstacles: List[Polygon], start_point: Point, end_point: Point):
+    def __init__(self, obstacles: List[Polygon], start_point: Point, end_point: Point, builder: str = DEFAULT_BUILDER,
+                 search: str = "dijkstra", reduced: bool = False, collect_stats: bool = False,
+                 memory_bounded: bool = False, holes: Collection[int] = ()):
+        if builder not in GRAPH_BUILDERS:
+            raise ValueError(f"Unknown graph builder '{builder}', expected one of {GRAPH_BUILDERS}")
+        if search not in SEARCH_STRATEGIES:
+            raise ValueError(f"Unknown search '{search}', expected one of {tuple(SEARCH_STRATEGIES)}")
+        
+        started = time.perf_counter()
+        self.stats = PlannerStats() if collect_stats else None
         self.obstacles = obstacles
         self.start_point = start_point
         self.end_point = end_point
+        self.builder = builder
+        self.search = search
+        self.nodes_expanded = 0
+        self.tangent_filter = TangentFilter(obstacles, holes=holes) if reduced else None
+        self.memory_bounded = memory_bounded
+        # corners that only shape an obstacle outline and get no graph node
+        self.skipped_points = set()
         
         self.all_points = [start_point, end_point]
         self.point_numbers = {start_point: 0, end_point: 1}
@@ -28,6 +55,13 @@ class ShortestPathFinder:
                 small_num = min(self.point_numbers[corner1], self.point_numbers[corner2])
                 big_num = max(self.point_numbers[corner1], self.point_numbers[corner2])
                 self.shape_edges.add((small_num, big_num))
+        
+        self.edge_grid = EdgeGrid(obstacle_segments(obstacles))
+        
+        if self.stats is not None:
+            self.stats.phase_seconds["index"] = time.perf_counter() - started
+            self.lines_cross = self.stats.counted(self.lines_cross, "intersection_tests")
+            self.can_see = self.stats.counted_visibility(self.can_see, self.shape_edges)
     
     def can_see(self, point1_num: int, point2_num: int) -> bool:
         point1 = self.all_points[point1_num]
@@ -36,54 +70,52 @@ class ShortestPathFinder:
         if (min(point1_num, point2_num), max(point1_num, point2_num)) in self.shape_edges:
             return True
         
-        for shape in self.obstacles:
-            total_corners = len(shape)
-            for i in range(total_corners):
-                shape_point1 = shape[i]
-                shape_point2 = shape[(i + 1) % total_corners]
-                
-                if ((point1[0] == shape_point1[0] and point1[1] == shape_point1[1]) or 
-                    (point1[0] == shape_point2[0] and point1[1] == shape_point2[1]) or 
-                    (point2[0] == shape_point1[0] and point2[1] == shape_point1[1]) or 
-                    (point2[0] == shape_point2[0] and point2[1] == shape_point2[1])):
-                    continue
-                
-                if self.lines_cross(point1, point2, shape_point1, shape_point2):
-                    return False
+        for k in self.edge_grid.candidates(point1, point2):
+            shape_point1, shape_point2 = self.edge_grid.segments[k]
+            
+            if ((point1[0] == shape_point1[0] and point1[1] == shape_point1[1]) or 
+                (point1[0] == shape_point2[0] and point1[1] == shape_point2[1]) or 
+                (point2[0] == shape_point1[0] and point2[1] == shape_point1[1]) or 
+                (point2[0] == shape_point2[0] and point2[1] == shape_point2[1])):
+                continue
+            
+            if self.lines_cross(point1, point2, shape_point1, shape_point2):
+                return False
         
         return True
     
     def lines_cross(self, p1: Point, p2: Point, q1: Point, q2: Point) -> bool:
-        def get_turn(p: Point, q: Point, r: Point) -> int:
-            result = (q[1] - p[1]) * (r[0] - q[0]) - (q[0] - p[0]) * (r[1] - q[1])
-            if abs(result) < 1e-10:
-                return 0
-            return 1 if result > 0 else 2
-        
-        def is_between(p: Point, q: Point, r: Point) -> bool:
-            return (q[0] <= max(p[0], r[0]) + 1e-10 and q[0] >= min(p[0], r[0]) - 1e-10 and
-                    q[1] <= max(p[1], r[1]) + 1e-10 and q[1] >= min(p[1], r[1]) - 1e-10)
-        
-        turn1 = get_turn(p1, p2, q1)
-        turn2 = get_turn(p1, p2, q2)
-        turn3 = get_turn(q1, q2, p1)
-        turn4 = get_turn(q1, q2, p2)
-        
-        if turn1 != turn2 and turn3 != turn4:
-            return True
-        
-        if turn1 == 0 and is_between(p1, q1, p2): return True
-        if turn2 == 0 and is_between(p1, q2, p2): return True
-        if turn3 == 0 and is_between(q1, p1, q2): return True
-        if turn4 == 0 and is_between(q1, p2, q2): return True
-        
-        return False
+        return segments_cross(p1, p2, q1, q2)
     
     def make_map(self) -> VisibilityGraph:
+        if self.builder == "sweep":
+            connections = sweep_visibility_graph(self.all_points, self.obstacles, self.shape_edges,
+                                           self.lines_cross, self.can_see)
+        if self.builder == "numpy":
+            from segmentKernel import vectorized_visibility_graph
+            connections = vectorized_visibility_graph(self.all_points, self.obstacles, self.shape_edges)
+        if self.builder == "parallel":
+            from parallelGraph import parallel_visibility_graph
+            connections = parallel_visibility_graph(self.all_points, self.obstacles, self.shape_edges)
+        if self.builder != "naive":
+            for number in self.skipped_points:
+                for other in connections[number]:
+                    del connections[other][number]
+                connections[number] = {}
+            if self.tangent_filter is not None:
+                return self.tangent_filter.reduce(connections, self.all_points)
+            return connections
+        
         connections = {i: {} for i in range(len(self.all_points))}
         
         for i in range(len(self.all_points)):
+            if i in self.skipped_points:
+                continue
             for j in range(i + 1, len(self.all_points)):
+                if j in self.skipped_points:
+                    continue
+                if self.tangent_filter is not None and not self.tangent_filter.keeps_edge(i, j, self.all_points):
+                    continue
                 if self.can_see(i, j):
                     point1 = self.all_points[i]
                     point2 = self.all_points[j]
@@ -94,47 +126,44 @@ class ShortestPathFinder:
         
         return connections
     
+    def swept_neighbors(self) -> Callable[[int], List[int]]:
+        # one row of the map at a time for the memory bounded search, see
+        # main.ShortestPathFinder.swept_neighbors for the costs
+        segments = obstacle_segments(self.obstacles)
+        pieces = split_segments(segments)
+        
+        def neighbors(number: int) -> List[int]:
+            row = visible_neighbors(number, self.all_points, segments, self.lines_cross, self.can_see,
+                                    self.shape_edges, pieces)
+            return [other for other in row if other not in self.skipped_points and
+                    (self.tangent_filter is None or self.tangent_filter.keeps_edge(number, other, self.all_points))]
+        return neighbors
+    
     def find_path(self) -> PathResult:
+        if self.stats is not None:
+            return self.find_path_with_stats()
+        if self.memory_bounded:
+            path, distance, self.nodes_expanded = implicit_astar(self.all_points, 0, 1, self.swept_neighbors())
+            return path, distance
         connections = self.make_map()
-        
-        start_num = 0
-        end_num = 1
-        
-        distances = {i: float('inf') for i in range(len(self.all_points))}
-        distances[start_num] = 0
-        
-        to_check = [(0, start_num)]
-        
-        came_from = {i: None for i in range(len(self.all_points))}
-        
-        while to_check:
-            current_dist, current = heapq.heappop(to_check)
-            
-            if current == end_num:
-                break
-            
-            if current_dist > distances[current]:
-                continue
-            
-            for next_point, weight in connections[current].items():
-                new_dist = current_dist + weight
-                
-                if new_dist < distances[next_point]:
-                    distances[next_point] = new_dist
-                    came_from[next_point] = current
-                    heapq.heappush(to_check, (new_dist, next_point))
-        
-        if distances[end_num] == float('inf'):
-            return [], float('inf')
-        
-        path = []
-        current = end_num
-        while current is not None:
-            path.append(self.all_points[current])
-            current = came_from[current]
-        
-        path.reverse()
-        return path, distances[end_num]
+        path, distance, self.nodes_expanded = SEARCH_STRATEGIES[self.search](connections, self.all_points, 0, 1)
+        return path, distance
+    
+    def find_path_with_stats(self) -> PathResult:
+        if self.memory_bounded:
+            with self.stats.phase("search"):
+                path, distance, self.nodes_expanded = implicit_astar(self.all_points, 0, 1, self.swept_neighbors(),
+                                                                     self.stats.push, self.stats.pop)
+            self.stats.nodes_expanded += self.nodes_expanded
+            return path, distance
+        with self.stats.phase("build"):
+            connections = self.make_map()
+        with self.stats.phase("search"):
+            path, distance, self.nodes_expanded = SEARCH_STRATEGIES[self.search](connections, self.all_points, 0, 1,
+                                                                                 self.stats.push, self.stats.pop)
+        self.stats.nodes_expanded += self.nodes_expanded
+        self.stats.edges_kept = sum(len(row) for row in connections.values()) // 2
+        return path, distance
 
 def make_bigger(shape: Polygon, size: float = 1.0) -> Polygon:
     bigger_shape = []
@@ -157,21 +186,109 @@ def make_bigger(shape: Polygon, size: float = 1.0) -> Polygon:
     
     return bigger_shape
 
+def grow_obstacles(obstacles: List[Polygon], radius: float = 1.0, merge: bool = True) -> Tuple[List[Polygon], Set[Point]]:
+    # Grows every obstacle by the robot radius. With merge, overlapping grown
+    # obstacles become one outline, so the corners buried inside a neighbor
+    # are gone. The new corners where two outlines cross are reflex corners
+    # of the union, a shortest path never bends there, they come back as
+    # the second value so planners can keep them out of the graph. Merged
+    # outlines run counterclockwise, the holes in them clockwise.
+    bigger_obstacles = [make_bigger(shape, radius) for shape in obstacles]
+    if not merge:
+        return bigger_obstacles, set()
+    
+    grown_corners = {corner for shape in bigger_obstacles for corner in shape}
+    merged = union_polygons([shape if signed_area(shape) >= 0 else shape[::-1] for shape in bigger_obstacles])
+    return merged, {corner for shape in merged for corner in shape if corner not in grown_corners}
+
+def grown_holes(merged: List[Polygon]) -> Set[int]:
+    # the positions of the holes in grow_obstacles(..., merge=True)[0]
+    return {number for number, shape in enumerate(merged) if signed_area(shape) < 0}
+
+def grown_free_space(obstacles: List[Polygon], radius: float = 1.0) -> FreeSpaceIndex:
+    # Pieces of the free space of a robot with that radius. Made from the
+    # grown obstacles before they are merged, the holes of a merged outline
+    # would be read as obstacles of their own.
+    return free_space_index([make_bigger(shape, radius) for shape in obstacles])
+
 class RobotPathFinder:
-    def __init__(self, obstacles: List[Polygon], start: Point, end: Point):
+    def __init__(self, obstacles: List[Polygon], start: Point, end: Point, builder: str = DEFAULT_BUILDER,
+                 search: str = "dijkstra", reduced: bool = False, collect_stats: bool = False, merge: bool = True,
+                 radius: float = 1.0, memory_bounded: bool = False, check_reachable: bool = True):
+        started = time.perf_counter()
         self.obstacles = obstacles
         self.start = start
         self.end = end
+        self.radius = radius
+        self.search = search
+        self.check_reachable = check_reachable
+        
+        self.nodes_expanded = 0
         
-        self.bigger_obstacles = [make_bigger(shape) for shape in obstacles]
-        self.point_finder = ShortestPathFinder(self.bigger_obstacles, start, end)
+        # A plain query plans on the configuration space kept in
+        # configSpaceCache.robot_spaces. Stats and memory_bounded need a
+        # finder of their own that times or sweeps this query.
+        self.space = None
+        if not collect_stats and not memory_bounded:
+            if search not in SEARCH_STRATEGIES:
+                raise ValueError(f"Unknown search '{search}', expected one of {tuple(SEARCH_STRATEGIES)}")
+            from configSpaceCache import robot_spaces
+            self.space = robot_spaces.configuration_space(obstacles, radius, builder, reduced, merge)
+            self.bigger_obstacles = self.space.obstacles
+            self.point_finder = None
+            self.stats = None
+            return
+        
+        self.bigger_obstacles, crossing_corners = grow_obstacles(obstacles, radius, merge)
+        holes = grown_holes(self.bigger_obstacles) if merge else set()
+        inflate_time = time.perf_counter() - started
+        self.point_finder = ShortestPathFinder(self.bigger_obstacles, start, end, builder, search, reduced, collect_stats,
+                                               memory_bounded, holes)
+        self.point_finder.skipped_points = {number for number in range(2, len(self.point_finder.all_points))
+                                            if self.point_finder.all_points[number] in crossing_corners}
+        self.stats = self.point_finder.stats
+        if self.stats is not None:
+            self.stats.phase_seconds["inflate"] = inflate_time
+    
+    def is_reachable(self) -> bool:
+        # the same check ConfigurationSpaceCache makes, a start or goal the
+        # robot cannot stand on or that is walled off from the other has no path
+        return grown_free_space(self.obstacles, self.radius).connects(self.start, self.end)
     
     def find_path(self) -> PathResult:
-        return self.point_finder.find_path()
+        if self.space is not None:
+            # the space turns down unreachable goals itself
+            if self.check_reachable:
+                path, distance = self.space.find_shortest_path(self.start, self.end, self.search)
+                self.nodes_expanded = self.space.nodes_expanded
+                return path, distance
+            graph, all_points = self.space.attach(self.start, self.end)
+            path, distance, self.nodes_expanded = SEARCH_STRATEGIES[self.search](graph, all_points, 0, 1)
+            return path, distance
+        if self.check_reachable:
+            if self.stats is not None:
+                with self.stats.phase("reachable"):
+                    reachable = self.is_reachable()
+            else:
+                reachable = self.is_reachable()
+            if not reachable:
+                self.nodes_expanded = 0
+                return [], float('inf')
+        path, distance = self.point_finder.find_path()
+        self.nodes_expanded = self.point_finder.nodes_expanded
+        return path, distance
 
-def find_robot_path(obstacles: List[Polygon], start: Point, end: Point) -> PathResult:
-    finder = RobotPathFinder(obstacles, start, end)
-    return finder.find_path()
+def find_robot_path(obstacles: List[Polygon], start: Point, end: Point, builder: str = DEFAULT_BUILDER,
+                    search: str = "dijkstra", reduced: bool = False,
+                    collect_stats: bool = False, merge: bool = True, radius: float = 1.0,
+                    memory_bounded: bool = False,
+                    check_reachable: bool = True) -> Union[PathResult, Tuple[List[Point], float, PlannerStats]]:
+    finder = RobotPathFinder(obstacles, start, end, builder, search, reduced, collect_stats, merge, radius,
+                             memory_bounded, check_reachable)
+    path, distance = finder.find_path()
+    if collect_stats:
+        return path, distance, finder.stats
+    return path, distance
 
 if __name__ == "__main__":
     shapes = [
@@ -187,4 +304,4 @@ if __name__ == "__main__":
     print("Robot's Path:")
     for i, point in enumerate(path):
         print(f"Stop {i}: {point}")
-    print(f"Total distance: {total_distance}")
\ No newline at end of file
+    print(f"Total distance: {total_distance}")
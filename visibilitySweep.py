@@ -0,0 +1,284 @@
+import itertools
+import math
+from collections import defaultdict
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+from dataTypes import Point, Edge, Polygon, Segment, VisibilityGraph
+from edgeGrid import EdgeGrid
+from predicates import orientation
+
+TWO_PI = 2 * math.pi
+
+def get_angle(origin: Point, point: Point) -> float:
+    angle = math.atan2(point[1] - origin[1], point[0] - origin[0])
+    return angle + TWO_PI if angle < 0 else angle
+
+def obstacle_segments(obstacles: List[Polygon]) -> List[Segment]:
+    segments = []
+    for obstacle in obstacles:
+        number_of_points = len(obstacle)
+        for i in range(number_of_points):
+            segments.append((obstacle[i], obstacle[(i + 1) % number_of_points]))
+    return segments
+
+def split_segments(segments: List[Segment]) -> Tuple[List[Segment], List[int]]:
+    # Segments whose interiors cross another segment (overlapping obstacles)
+    # would swap places along the sweep ray without an event. They are cut at
+    # their crossings into pieces that only meet at their ends, each piece
+    # comes back with the segment it was cut from.
+    grid = EdgeGrid(segments)
+    cuts: Dict[int, List[Tuple[float, Point]]] = defaultdict(list)
+    for k, (a, b) in enumerate(segments):
+        for m in grid.candidates(a, b):
+            if m <= k:
+                continue
+            c, d = segments[m]
+            turn_c, turn_d = orientation(a, b, c), orientation(a, b, d)
+            turn_a, turn_b = orientation(c, d, a), orientation(c, d, b)
+            if 0 in (turn_a, turn_b, turn_c, turn_d) or turn_a == turn_b or turn_c == turn_d:
+                continue
+            ex, ey, fx, fy = b[0] - a[0], b[1] - a[1], d[0] - c[0], d[1] - c[1]
+            share = ((c[0] - a[0]) * fy - (c[1] - a[1]) * fx) / (ex * fy - ey * fx)
+            point = (a[0] + share * ex, a[1] + share * ey)
+            cuts[k].append((share, point))
+            cuts[m].append((((point[0] - c[0]) * fx + (point[1] - c[1]) * fy) / (fx * fx + fy * fy), point))
+    
+    pieces, parents = [], []
+    for k, (a, b) in enumerate(segments):
+        corners = [a] + [point for _, point in sorted(cuts.get(k, ()))] + [b]
+        for p, q in zip(corners, corners[1:]):
+            if p != q or a == b:
+                pieces.append((p, q))
+                parents.append(k)
+    return pieces, parents
+
+class ActiveSegments:
+    # Binary heap of the pieces the sweep ray passes through, nearest first.
+    # Pieces that never cross keep their order along the ray as long as both
+    # are active, so the heap stays valid while the ray turns. closer(k, m,
+    # ray) compares two pieces on the current ray.
+    def __init__(self, closer: Callable[[int, int, tuple], bool]):
+        self.closer = closer
+        self.heap: List[int] = []
+        self.position: Dict[int, int] = {}
+    
+    def place(self, i: int, k: int):
+        self.heap[i] = k
+        self.position[k] = i
+    
+    def sift_up(self, i: int, ray: tuple):
+        k = self.heap[i]
+        while i > 0:
+            parent = (i - 1) // 2
+            if not self.closer(k, self.heap[parent], ray):
+                break
+            self.place(i, self.heap[parent])
+            i = parent
+        self.place(i, k)
+    
+    def sift_down(self, i: int, ray: tuple):
+        k = self.heap[i]
+        size = len(self.heap)
+        while 2 * i + 1 < size:
+            child = 2 * i + 1
+            if child + 1 < size and self.closer(self.heap[child + 1], self.heap[child], ray):
+                child += 1
+            if not self.closer(self.heap[child], k, ray):
+                break
+            self.place(i, self.heap[child])
+            i = child
+        self.place(i, k)
+    
+    def insert(self, k: int, ray: tuple):
+        self.heap.append(k)
+        self.sift_up(len(self.heap) - 1, ray)
+    
+    def remove(self, k: int, ray: tuple):
+        i = self.position.pop(k)
+        last = self.heap.pop()
+        if i < len(self.heap):
+            self.place(i, last)
+            self.sift_up(i, ray)
+            self.sift_down(self.position[last], ray)
+    
+    def nearer_than(self, limit: float, distance: Callable[[int], float]) -> Iterator[int]:
+        # the pieces at most limit away, a piece farther than that has only
+        # farther pieces below it in the heap
+        stack = [0] if self.heap else []
+        while stack:
+            i = stack.pop()
+            k = self.heap[i]
+            if distance(k) > limit:
+                continue
+            yield k
+            stack.extend(child for child in (2 * i + 1, 2 * i + 2) if child < len(self.heap))
+
+def visible_from(index: int, all_points: List[Point], segments: List[Segment],
+                 lines_cross: Callable[[Point, Point, Point, Point], bool],
+                 pieces: Optional[Tuple[List[Segment], List[int]]] = None) -> Set[int]:
+    # Lee's rotational sweep around all_points[index]. The pieces the ray
+    # passes through are kept in a heap by their distance along the ray, a
+    # point is only tested against the pieces in front of it, normally just
+    # the nearest one. pieces is split_segments(segments), pass it in when
+    # sweeping around many points.
+    origin = all_points[index]
+    if pieces is None:
+        pieces = split_segments(segments)
+    pieces, parents = pieces
+    
+    starts: Dict[float, List[int]] = defaultdict(list)
+    ends: Dict[float, List[int]] = defaultdict(list)
+    points_at: Dict[float, List[int]] = defaultdict(list)
+    directions: Dict[float, Point] = {}
+    end_angle: Dict[int, float] = {}
+    wrapping = []
+    always_checked = set()
+    start_angle: Dict[int, float] = {}
+    # (a - origin) x (b - a), ex and ey of piece k = (a, b), for its distance
+    # along a ray
+    lines: Dict[int, Tuple[float, float, float]] = {}
+    
+    for k, (a, b) in enumerate(pieces):
+        parent = segments[parents[k]]
+        if parent[0] == origin or parent[1] == origin:
+            continue
+        if parents[k] in always_checked:
+            continue
+        # the cut points are rounded, whether origin is on the segment is
+        # decided on the segment itself
+        c, d = parent
+        if ((c[0] - origin[0]) * (d[1] - origin[1]) == (c[1] - origin[1]) * (d[0] - origin[0]) and
+                (c[0] - origin[0]) * (d[0] - origin[0]) <= 0 and (c[1] - origin[1]) * (d[1] - origin[1]) <= 0):
+            # origin sits on the segment itself, it faces every direction
+            always_checked.add(parents[k])
+            continue
+        
+        turn = (a[0] - origin[0]) * (b[1] - origin[1]) - (a[1] - origin[1]) * (b[0] - origin[0])
+        if turn >= 0:
+            first, last = a, b
+        else:
+            first, last = b, a
+        
+        start = get_angle(origin, first)
+        end = get_angle(origin, last) if turn != 0 else start
+        directions.setdefault(start, (first[0] - origin[0], first[1] - origin[1]))
+        directions.setdefault(end, (last[0] - origin[0], last[1] - origin[1]))
+        start_angle[k] = start
+        end_angle[k] = end
+        ex, ey = b[0] - a[0], b[1] - a[1]
+        lines[k] = ((a[0] - origin[0]) * ey - (a[1] - origin[1]) * ex, ex, ey)
+        ends[end].append(k)
+        starts[start].append(k)
+        if start > end:
+            wrapping.append(k)
+    
+    for j, point in enumerate(all_points):
+        if j == index or point == origin:
+            continue
+        angle = get_angle(origin, point)
+        directions.setdefault(angle, (point[0] - origin[0], point[1] - origin[1]))
+        points_at[angle].append(j)
+    
+    def along(k: int, direction: Point) -> float:
+        # distance from origin to piece k in the unit direction
+        cross, ex, ey = lines[k]
+        denominator = direction[0] * ey - direction[1] * ex
+        return cross / denominator if denominator else math.inf
+    
+    def closer(k: int, m: int, ray: tuple) -> bool:
+        # ray is (angle, direction, side), the side (1 just after the ray, -1
+        # just before it) breaks ties between pieces meeting on the ray. Both
+        # pieces are active on that side, there their order is the one they
+        # keep for as long as they are both in the heap.
+        angle, direction, side = ray
+        dk = along(k, direction)
+        dm = along(m, direction)
+        if abs(dk - dm) > 1e-9 * max(1.0, dk, dm):
+            return dk < dm
+        if side > 0:
+            gap = min((end_angle[k] - angle) % TWO_PI, (end_angle[m] - angle) % TWO_PI)
+        else:
+            gap = min((angle - start_angle[k]) % TWO_PI, (angle - start_angle[m]) % TWO_PI)
+        middle = angle + side * gap / 2
+        direction = (math.cos(middle), math.sin(middle))
+        return along(k, direction) < along(m, direction)
+    
+    active = ActiveSegments(closer)
+    for k in wrapping:
+        active.insert(k, (0.0, (1.0, 0.0), -1))
+    
+    visible = set()
+    for angle in sorted(directions):
+        dx, dy = directions[angle]
+        length = math.hypot(dx, dy)
+        direction = (dx / length, dy / length)
+        # the heap holds the pieces reaching this ray from before it, the
+        # ones starting on it are checked on their own until the points on
+        # the ray are done
+        starting = starts.get(angle, ())
+        for j in points_at.get(angle, ()):
+            target = all_points[j]
+            reach = math.dist(origin, target)
+            to_target = ((target[0] - origin[0]) / reach, (target[1] - origin[1]) / reach)
+            limit = reach + 1e-9 * max(1.0, reach)
+            # the pieces this close are in front of the target or end at
+            # it, the first one of a segment not ending there blocks
+            nearest = active.nearer_than(limit, lambda k: along(k, to_target))
+            blocked = False
+            for k in itertools.chain(always_checked, (parents[k] for k in starting), (parents[k] for k in nearest)):
+                a, b = segments[k]
+                if a != target and b != target and lines_cross(origin, target, a, b):
+                    blocked = True
+                    break
+            if not blocked:
+                visible.add(j)
+        
+        for k in ends.get(angle, ()):
+            if k in active.position:
+                active.remove(k, (angle, direction, -1))
+        for k in starting:
+            if end_angle[k] != angle:
+                active.insert(k, (angle, direction, 1))
+    
+    return visible
+
+def visible_neighbors(index: int, all_points: List[Point], segments: List[Segment],
+                      lines_cross: Callable[[Point, Point, Point, Point], bool], can_see: Callable[[int, int], bool],
+                      obstacle_edges: Set[Edge], pieces: Optional[Tuple[List[Segment], List[int]]] = None) -> List[int]:
+    # One row of the sweep graph, the points all_points[index] links to
+    visible = visible_from(index, all_points, segments, lines_cross, pieces)
+    origin = all_points[index]
+    row = []
+    for j in range(len(all_points)):
+        if j == index:
+            continue
+        if all_points[j] == origin:
+            if not can_see(index, j):
+                continue
+        elif j not in visible and (min(index, j), max(index, j)) not in obstacle_edges:
+            continue
+        row.append(j)
+    return row
+
+def sweep_visibility_graph(all_points: List[Point], obstacles: List[Polygon], obstacle_edges: Set[Edge],
+                           lines_cross: Callable[[Point, Point, Point, Point], bool],
+                           can_see: Callable[[int, int], bool]) -> VisibilityGraph:
+    segments = obstacle_segments(obstacles)
+    pieces = split_segments(segments)
+    graph: VisibilityGraph = {i: {} for i in range(len(all_points))}
+    
+    for i in range(len(all_points)):
+        visible = visible_from(i, all_points, segments, lines_cross, pieces)
+        for j in range(i + 1, len(all_points)):
+            p1 = all_points[i]
+            p2 = all_points[j]
+            if p1 == p2:
+                if not can_see(i, j):
+                    continue
+            elif j not in visible and (i, j) not in obstacle_edges:
+                continue
+            
+            distance = math.sqrt((p2[0] - p1[0])**2 + (p2[1] - p1[1])**2)
+            graph[i][j] = distance
+            graph[j][i] = distance
+    
+    return graph